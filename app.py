@@ -1,14 +1,10 @@
 ﻿from __future__ import annotations
-from services.music.spotify.core import get_spotify_token
 import importlib
 import os
 import streamlit as st
-from views.music.genres.page import render_genres_page_roots as render_genres_page
 
-from views.music.influence_map.influence_map import render_influence_map_page
-from views.music.genealogy.genealogy_page_up_down import render_genealogy_page
-
-# app.py — Music & Cinema with Tabs + Typography normalization
+# app.py — Music & Cinema with a section router + Typography normalization
+# Só a secção ativa é importada e executada (st.tabs corria as 4 em cada rerun).
 
 
 # ------------------------------------------------------------
@@ -81,8 +77,32 @@ h3 {{ font-size: var(--h3) !important; line-height: 1.3;  }}
   box-shadow: 0 0 0 2px rgba(34,211,238,.35) inset;
 }}
 
+/* Router de secções (radio com aspeto de tabs) */
+.st-key-ui_section [role="radiogroup"] {{
+  border-bottom: 1px solid rgba(255,255,255,.08);
+  gap: .25rem;
+}}
+.st-key-ui_section [role="radiogroup"] label {{
+  font-size: 1.05rem;
+  padding: 0.5rem 0.75rem;
+  margin: 0;
+  border: 1px solid rgba(148,163,184,.25);
+  border-bottom: none;
+  border-top-left-radius: .75rem;
+  border-top-right-radius: .75rem;
+}}
+.st-key-ui_section [role="radiogroup"] label > div:first-child {{
+  display: none;                     /* esconde a bolinha do radio */
+}}
+.st-key-ui_section [role="radiogroup"] label:has(input:checked) {{
+  color: {ACCENT};
+  background: {ACTIVE_BG};
+  border-color: {ACCENT};
+  font-weight: 600;
+}}
+
 @media (max-width: 640px) {{
-  .stTabs [role="tab"] {{
+  .stTabs [role="tab"], .st-key-ui_section [role="radiogroup"] label {{
     font-size: 1rem;
     padding: 0.4rem 0.6rem;
   }}
@@ -111,24 +131,65 @@ with c2:
 
 st.markdown("<div style='height:8px'></div>", unsafe_allow_html=True)
 
+# ------------------------------------------------------------
+# Router: secção/sub-secção em st.session_state, espelhadas no URL
+# (?section=music&sub=playlists) para deep-links. Páginas importadas só
+# quando a secção é aberta.
+# ------------------------------------------------------------
+SECTIONS = {
+    "music": f"{MUSIC_ICON} Music",
+    "cinema": f"{CINEMA_ICON} Cinema",
+    "radio": f"{RADIO_ICON} Radio",
+    "podcasts": f"{PODCASTS_ICON} Podcasts",
+}
+MUSIC_SUBS = {
+    "spotify": "🎧 Spotify",
+    "playlists": "🎼 Playlists",
+    "genres": "🧭 Genres",
+    "wikipedia": "📚 Wikipedia",
+    # "genealogy": "🧬 Genealogy",
+    # "influence": "🗺️ Influence map",
+}
+#CINEMA_SUBS = {..., "soundtracks": "🎼 Soundtracks", ...}
+CINEMA_SUBS = {"movies": "🍿 Movies", "series": "📺 Series", "artists": "👤 Artists"}
+
+
+def _page(module: str, attr: str):
+    """Import tardio da página (só quando a secção é renderizada)."""
+    return getattr(importlib.import_module(module), attr)
+
+
+def _routed_radio(key: str, options: dict, param: str, label: str) -> str:
+    """st.radio horizontal cujo valor inicial vem do query param e que o mantém atualizado."""
+    if key not in st.session_state:
+        q = st.query_params.get(param)
+        st.session_state[key] = q if q in options else next(iter(options))
+    elif st.session_state[key] not in options:
+        st.session_state[key] = next(iter(options))
+    choice = st.radio(
+        label=label,
+        options=list(options),
+        format_func=options.get,
+        horizontal=True,
+        key=key,
+        label_visibility="collapsed",
+    )
+    if st.query_params.get(param) != choice:
+        st.query_params[param] = choice
+    return choice
+
+
 # ------------------------------------------------------------
 # Spotify token (usado nas páginas de música)
 # ------------------------------------------------------------
-#
 SPOTIFY_CLIENT_ID = os.getenv("SPOTIFY_CLIENT_ID", "")
 SPOTIFY_CLIENT_SECRET = os.getenv("SPOTIFY_CLIENT_SECRET", "")
-TOKEN = get_spotify_token(SPOTIFY_CLIENT_ID, SPOTIFY_CLIENT_SECRET)
 
-# ------------------------------------------------------------
-# Imports das páginas
-# ------------------------------------------------------------
-# Music
-from views.music.spotify.page import render_spotify_page
-from views.music.playlists.playlists_page import render_playlists_page
-from views.radio.radio import render_radio_page
 
-from views.music.wiki.wiki_page import render_wikipedia_page
-from views.podcasts.podcasts import render_podcasts_page
+def _spotify_token():
+    from services.music.spotify.core import get_spotify_token
+    return get_spotify_token(SPOTIFY_CLIENT_ID, SPOTIFY_CLIENT_SECRET)
+
 
 # Cinema — resolve diferença de nomes/assinaturas
 def _resolve_cinema_runner():
@@ -159,93 +220,63 @@ def _resolve_cinema_runner():
             # st.exception(_e)
         return run
 
-render_cinema = _resolve_cinema_runner()
 
 # ------------------------------------------------------------
-# Abas principais (substitui o 1º radio)
+# Secções principais (só a ativa corre)
 # ------------------------------------------------------------
-#tab_music, tab_cinema = st.tabs([f"{MUSIC_ICON} Music", f"{CINEMA_ICON} Cinema"])
-tab_music, tab_cinema, tab_radio, tab_podcasts = st.tabs([
-    f"{MUSIC_ICON} Music",
-    f"{CINEMA_ICON} Cinema",
-    f"{RADIO_ICON} Radio",
-    f"{PODCASTS_ICON} Podcasts",
-])
+section_key = _routed_radio("ui_section", SECTIONS, "section", "main_section")
+if section_key not in ("music", "cinema") and "sub" in st.query_params:
+    del st.query_params["sub"]
 
 st.markdown("<div style='height:8px'></div>", unsafe_allow_html=True)
 
 # =========================
-# Aba: Music
+# Secção: Music
 # =========================
-with tab_music:
-    music_labels = [
-        "🎧 Spotify",
-        "🎼 Playlists",
-        #"📻 Radio",
-        "🧭 Genres",
-        "📚 Wikipedia",
-        # "🧬 Genealogy",
-        # "🗺️ Influence map",
-    ]
-    music_choice = st.radio(
-        label="music_submenu",
-        options=music_labels,
-        horizontal=True,
-        key="ui_music_submenu",
-        label_visibility="collapsed",
-    )
-    selected = music_choice.split(" ", 1)[1] if " " in music_choice else music_choice
+if section_key == "music":
+    selected = _routed_radio("ui_music_sub", MUSIC_SUBS, "sub", "music_submenu")
 
     st.markdown("---")
-    if selected == "Spotify":
-        render_spotify_page(TOKEN, SPOTIFY_CLIENT_ID, SPOTIFY_CLIENT_SECRET)
-    elif selected == "Playlists":
-        render_playlists_page()    
-    elif selected == "Genres":
-        render_genres_page()
-    elif selected == "Wikipedia":
-        render_wikipedia_page(TOKEN)
+    if selected == "spotify":
+        # token client-credentials só é pedido quando a página precisa
+        token = _spotify_token()
+        _page("views.music.spotify.page", "render_spotify_page")(token, SPOTIFY_CLIENT_ID, SPOTIFY_CLIENT_SECRET)
+    elif selected == "playlists":
+        _page("views.music.playlists.playlists_page", "render_playlists_page")()
+    elif selected == "genres":
+        _page("views.music.genres.page", "render_genres_page_roots")()
+    elif selected == "wikipedia":
+        _page("views.music.wiki.wiki_page", "render_wikipedia_page")(_spotify_token())
+
 # =========================
-# Aba: Radio
+# Secção: Radio
 # =========================
-
-with tab_radio:
-    render_radio_page()
+elif section_key == "radio":
+    _page("views.radio.radio", "render_radio_page")()
 
 # =========================
-# Aba: Podcasts
+# Secção: Podcasts
 # =========================
-with tab_podcasts:
+elif section_key == "podcasts":
+    try:
+        render_podcasts_page = _page("views.podcasts.podcasts", "render_podcasts_page")
+    except (ImportError, AttributeError):
+        render_podcasts_page = None
     if render_podcasts_page:
         render_podcasts_page()
     else:
         st.subheader("Podcasts")
         st.info("Página de Podcasts ainda não criada (views/podcasts/podcasts.py).")
+
 # =========================
-# Aba: Cinema
+# Secção: Cinema
 # =========================
-with tab_cinema:
-    #cinema_labels = ["🍿 Movies", "📺 Series", "🎼 Soundtracks", "👤 Artists"]
-    cinema_labels = ["🍿 Movies", "📺 Series", "👤 Artists"]
-    cinema_choice = st.radio(
-        label="cinema_submenu",
-        options=cinema_labels,
-        horizontal=True,
-        key="ui_cinema_submenu",
-        label_visibility="collapsed",
-    )
-    section = cinema_choice.split(" ", 1)[1] if " " in cinema_choice else cinema_choice
+elif section_key == "cinema":
+    sub = _routed_radio("ui_cinema_sub", CINEMA_SUBS, "sub", "cinema_submenu")
 
     st.markdown("---")
-    if section == "Artists":
+    if sub == "artists":
         # Importa só quando necessário
-        from cinema.artists.page import render_artists_page
-        render_artists_page()
+        _page("cinema.artists.page", "render_artists_page")()
     else:
-        render_cinema(section=section)
-
-
-
-
-
-
+        _resolve_cinema_runner()(section=CINEMA_SUBS[sub].split(" ", 1)[1])
@@ -3,6 +3,11 @@ from __future__ import annotations
 
 import os
 import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait as futures_wait
+
 import requests
 import pandas as pd
 import streamlit as st
@@ -104,46 +109,130 @@ def _person_bio(pid: int) -> dict:
 def _person_combined_credits(pid: int) -> dict:
     return _tmdb_get(f"/person/{pid}/combined_credits")
 
-# CHANGED: providers de streaming (watch/providers), com cache e fallback de região
-@st.cache_data(ttl=86400, show_spinner=False)
-def _tmdb_watch_providers(media_type: str, tmdb_id: int, region: str) -> str:
-    """
-    media_type: 'movie' | 'tv'
-    devolve providers (flatrate/ads/free/buy/rent) em ordem de relevância, para a região dada.
-    """
+# ------------------------------------------------------------------
+# Providers de streaming (watch/providers)
+# - um pedido por título devolve TODAS as regiões → guarda-se o mapa completo
+#   por (media_type, id); mudar de região não faz pedidos novos
+# - pedidos da página em paralelo; página seguinte pré-carregada em background
+# - LRU com _PROVIDERS_MAX mapas; falhas (rede, 429…) não ficam em cache
+# ------------------------------------------------------------------
+_PROVIDER_KINDS = ("flatrate", "ads", "free", "buy", "rent")
+_PROVIDERS_TTL = 86400
+_PROVIDERS_MAX = 5000
+
+def _fetch_providers_map(media_type: str, tmdb_id: int) -> dict[str, dict[str, list[str]]]:
+    """{região: {flatrate: [nomes], ads: [...], ...}} (sem st.*: corre em threads).
+    Título inexistente (404) → {}; outras falhas levantam exceção (não se guardam)."""
     if not tmdb_id or not TMDB_API_KEY:
-        return ""
+        return {}
     url = f"{TMDB_API}/{ 'movie' if media_type=='movie' else 'tv' }/{int(tmdb_id)}/watch/providers"
-    try:
-        r = requests.get(url, params={"api_key": TMDB_API_KEY}, timeout=8)
-        r.raise_for_status()
-        data = r.json() or {}
-        results = data.get("results") or {}
-        region_data = results.get(region) or {}
-
+    r = requests.get(url, params={"api_key": TMDB_API_KEY}, timeout=8)
+    if r.status_code == 404:
+        return {}
+    r.raise_for_status()
+    results = (r.json() or {}).get("results") or {}
+    return {
+        region: {k: [p.get("provider_name") for p in (block.get(k) or []) if p.get("provider_name")]
+                 for k in _PROVIDER_KINDS}
+        for region, block in results.items()
+    }
+
+def _providers_for_region(pmap: dict, region: str) -> str:
+    """Providers por ordem de relevância para a região; fallback para US se vazio."""
+    def _names(reg: str) -> list[str]:
         names: list[str] = []
-        for key in ("flatrate", "ads", "free", "buy", "rent"):
-            for p in (region_data.get(key) or []):
-                n = p.get("provider_name")
-                if n and n not in names:
+        for k in _PROVIDER_KINDS:
+            for n in ((pmap.get(reg) or {}).get(k) or []):
+                if n not in names:
                     names.append(n)
-
-        # fallback para US se a região escolhida não tiver dados
-        if not names and region != "US":
-            region_data = results.get("US") or {}
-            for key in ("flatrate", "ads", "free", "buy", "rent"):
-                for p in (region_data.get(key) or []):
-                    n = p.get("provider_name")
-                    if n and n not in names:
-                        names.append(n)
-
-        return ", ".join(names[:4])
+        return names
+
+    names = _names(region)
+    if not names and region != "US":
+        names = _names("US")
+    return ", ".join(names[:4])
+
+@st.cache_resource(show_spinner=False)
+def _providers_store() -> dict:
+    """Cache de processo: mapas completos + futures em curso (partilhado entre sessões)."""
+    return {
+        "lock": threading.Lock(),
+        "maps": OrderedDict(),  # (mt, id) -> (ts, mapa), LRU até _PROVIDERS_MAX
+        "futs": {},      # (mt, id) -> Future
+        "pool": ThreadPoolExecutor(max_workers=8, thread_name_prefix="tmdb-prov"),
+    }
+
+def _submit_providers(keys) -> dict:
+    """Agenda os pedidos em falta; devolve {key: Future|None} (None = já em cache)."""
+    store = _providers_store()
+    now = time.time()
+    out = {}
+    with store["lock"]:
+        for key in keys:
+            hit = store["maps"].get(key)
+            if hit and now - hit[0] < _PROVIDERS_TTL:
+                store["maps"].move_to_end(key)
+                out[key] = None
+                continue
+            fut = store["futs"].get(key)
+            if fut is None:
+                fut = store["pool"].submit(_fetch_providers_map, *key)
+                store["futs"][key] = fut
+            out[key] = fut
+    return out
+
+def _keep_providers(store: dict, key, fut) -> dict | None:
+    """Guarda o resultado de um pedido terminado (falhas só libertam o future)."""
+    try:
+        pmap = fut.result()
     except Exception:
-        return ""
+        pmap = None
+    with store["lock"]:
+        if store["futs"].get(key) is fut:
+            store["futs"].pop(key, None)
+        if pmap is None:
+            return None
+        store["maps"][key] = (time.time(), pmap)
+        store["maps"].move_to_end(key)
+        while len(store["maps"]) > _PROVIDERS_MAX:
+            store["maps"].popitem(last=False)
+    return pmap
+
+def _providers_maps(keys) -> dict:
+    """Mapas de providers para `keys` [(media_type, id)], pedidos em paralelo
+    (um pedido que falhou dá {} só neste render)."""
+    store = _providers_store()
+    pending = _submit_providers(keys)
+    futures_wait([f for f in pending.values() if f is not None])
+    got = {k: _keep_providers(store, k, f) for k, f in pending.items() if f is not None}
+    with store["lock"]:
+        return {k: got.get(k) or (store["maps"].get(k) or (0, {}))[1] for k in keys}
+
+def _prefetch_providers(keys) -> None:
+    """Pré-carrega em background (não bloqueia o render); guarda quando terminar."""
+    store = _providers_store()
+    for key, fut in _submit_providers(keys).items():
+        if fut is not None:
+            fut.add_done_callback(lambda f, k=key: _keep_providers(store, k, f))
+
+def _provider_keys(rows: pd.DataFrame) -> list[tuple[str, int]]:
+    keys = []
+    for t, tid in zip(rows.get("type", []), rows.get("tmdb_id", [])):
+        try:
+            keys.append(("movie" if str(t).lower().startswith("movie") else "tv", int(tid)))
+        except (TypeError, ValueError):
+            keys.append(None)
+    return keys
 
 # ------------------------------------------------------------------
 # Filmography build
 # ------------------------------------------------------------------
+@st.cache_data(ttl=86400, show_spinner=False)
+def _person_filmography(pid: int) -> pd.DataFrame:
+    """Filmografia completa (o combined_credits do TMDb não é paginado: vem tudo
+    num pedido) — construída uma vez por pessoa; a paginação é só local."""
+    return _filmography_df(_person_combined_credits(pid) or {})
+
 def _filmography_df(credits: dict) -> pd.DataFrame:
     rows: list[dict] = []
 
@@ -240,7 +329,6 @@ def render_artists_page() -> None:
     sel = st.session_state.get("artists_selected")
     if sel:
         det = _person_bio(sel) or {}
-        cr = _person_combined_credits(sel) or {}
 
         name = det.get("name") or "—"
         born = det.get("birthday") or ""
@@ -285,7 +373,7 @@ def render_artists_page() -> None:
         # Filmography (com Streaming + paginação + rating 1 casa)
         # ======================
         st.subheader("Filmography")
-        df = _filmography_df(cr)
+        df = _person_filmography(sel)
 
         if df.empty:
             st.info("No credits found.")
@@ -322,58 +410,7 @@ def render_artists_page() -> None:
         if q.strip():
             fdf = fdf[fdf["title"].str.contains(q.strip(), case=False, na=False)]
 
-        # Paginação (10 por página)
-        PER_PAGE = 10
-        total = len(fdf)
-        total_pages = max(1, (total - 1) // PER_PAGE + 1)
-        page_key = "artists_film_page"
-
-        cur = int(st.session_state.get(page_key, 1))
-        cur = max(1, min(cur, total_pages))
-
-        c_prev, c_mid, c_next = st.columns([0.15, 0.7, 0.15])
-        with c_prev:
-            if st.button("⟨ Prev", disabled=(cur <= 1), key="art_prev"):
-                cur = max(1, cur - 1)
-        with c_next:
-            if st.button("Next ⟩", disabled=(cur >= total_pages), key="art_next"):
-                cur = min(total_pages, cur + 1)
-        st.session_state[page_key] = cur
-        c_mid.caption(f"Page {cur} / {total_pages} • {total} items")
-
-        start = (cur - 1) * PER_PAGE
-        end = min(cur * PER_PAGE, total)
-        page_rows = fdf.iloc[start:end].copy()
-
-        # Streaming (watch/providers) apenas para esta página — usa a região escolhida
-        if "tmdb_id" not in page_rows.columns:
-            page_rows["tmdb_id"] = ""
-
-        def _stream_for_row(r: pd.Series) -> str:
-            mt = "movie" if str(r.get("type")).lower().startswith("movie") else "tv"
-            tid = r.get("tmdb_id")
-            try:
-                tid = int(tid)
-            except Exception:
-                return ""
-            region = st.session_state.get("artists_region", TMDB_REGION_DEFAULT)  # CHANGED
-            return _tmdb_watch_providers(mt, tid, region=region)
-
-        page_rows["streaming"] = page_rows.apply(_stream_for_row, axis=1)
-
-        # Apresentação (rating 1 casa decimal)
-        cols_show = ["type", "title", "year", "streaming", "role", "job", "rating"]
-        for c in cols_show:
-            if c not in page_rows.columns:
-                page_rows[c] = ""
-
-        page_rows["rating"] = pd.to_numeric(page_rows["rating"], errors="coerce").fillna(0).round(1)
-
-        st.dataframe(
-            page_rows[cols_show].style.format({"rating": "{:.1f}"}),
-            use_container_width=True,
-            hide_index=True,
-        )
+        _filmography_page(fdf, REGION_SELECTED)
 
         # Voltar à lista
         st.markdown("")
@@ -381,3 +418,58 @@ def render_artists_page() -> None:
             st.session_state.pop("artists_selected", None)
             st.session_state.pop("artists_film_page", None)
             st.rerun()
+
+
+@st.fragment
+def _filmography_page(fdf: pd.DataFrame, region: str) -> None:
+    """Página da filmografia (Prev/Next + providers da página) num fragmento:
+    mudar de página só re-executa isto, não a bio nem os filtros."""
+    # Paginação (10 por página)
+    PER_PAGE = 10
+    total = len(fdf)
+    total_pages = max(1, (total - 1) // PER_PAGE + 1)
+    page_key = "artists_film_page"
+
+    cur = int(st.session_state.get(page_key, 1))
+    cur = max(1, min(cur, total_pages))
+
+    c_prev, c_mid, c_next = st.columns([0.15, 0.7, 0.15])
+    with c_prev:
+        if st.button("⟨ Prev", disabled=(cur <= 1), key="art_prev"):
+            cur = max(1, cur - 1)
+    with c_next:
+        if st.button("Next ⟩", disabled=(cur >= total_pages), key="art_next"):
+            cur = min(total_pages, cur + 1)
+    st.session_state[page_key] = cur
+    c_mid.caption(f"Page {cur} / {total_pages} • {total} items")
+
+    start = (cur - 1) * PER_PAGE
+    end = min(cur * PER_PAGE, total)
+    page_rows = fdf.iloc[start:end].copy()
+
+    # Streaming (watch/providers) apenas para esta página — usa a região escolhida
+    if "tmdb_id" not in page_rows.columns:
+        page_rows["tmdb_id"] = ""
+
+    keys = _provider_keys(page_rows)
+    maps = _providers_maps([k for k in keys if k])
+    page_rows["streaming"] = [_providers_for_region(maps[k], region) if k else "" for k in keys]
+
+    # pré-carregar providers da página seguinte (background)
+    if end < total:
+        nxt = _provider_keys(fdf.iloc[end:end + PER_PAGE])
+        _prefetch_providers([k for k in nxt if k])
+
+    # Apresentação (rating 1 casa decimal)
+    cols_show = ["type", "title", "year", "streaming", "role", "job", "rating"]
+    for c in cols_show:
+        if c not in page_rows.columns:
+            page_rows[c] = ""
+
+    page_rows["rating"] = pd.to_numeric(page_rows["rating"], errors="coerce").fillna(0).round(1)
+
+    st.dataframe(
+        page_rows[cols_show].style.format({"rating": "{:.1f}"}),
+        use_container_width=True,
+        hide_index=True,
+    )
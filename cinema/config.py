@@ -15,6 +15,9 @@ FILES = {
     "Soundtracks": BASE_DIR / "soundtracks.csv",
 }
 
+# Biblioteca local (SQLite); os CSVs acima servem de import/export
+DB_PATH = BASE_DIR / "cinema_library.db"
+
 # Esquema base dos CSVs
 SCHEMA = {
     "Movies": [
@@ -4,7 +4,8 @@ from __future__ import annotations
 from pathlib import Path
 import pandas as pd
 # (mantém) lê config do projeto
-from .config import BASE_DIR, FILES, SCHEMA, SEP, GENRE_FILES
+from .config import BASE_DIR, SCHEMA, SEP, GENRE_FILES
+from .library import read_table, replace_table
 
 
 # ---------- NOVO: resolver caminho real antes de criar vazio ----------
@@ -59,63 +60,20 @@ def _ensure_schema(df: pd.DataFrame, section: str) -> pd.DataFrame:
 
 
 def load_table(section: str) -> pd.DataFrame:
-    # ---------- ALTERADO: resolver caminho de forma robusta ----------
-    path = FILES[section]
-    path = Path(path) if not isinstance(path, Path) else path
-    path = _resolve_path_like(path)
-
-    ensure_csv(path, SCHEMA[section])
-    df = pd.read_csv(path, sep=SEP, encoding="utf-8")
-
-    # MIGRAÇÕES/garantias
-    if section in ("Movies", "Series"):
-        # subgenre → streaming (caso existisse)
-        if "streaming" not in df.columns and "subgenre" in df.columns:
-            df = df.rename(columns={"subgenre": "streaming"})
-        if "streaming" not in df.columns:
-            df["streaming"] = ""
-
-    if section == "Series":
-        if "season" not in df.columns:
-            df["season"] = ""
-        if "watched" not in df.columns:
-            df["watched"] = False
-        if "watched_date" not in df.columns:
-            df["watched_date"] = ""
-
-    if section == "Movies":
-        if "watched" not in df.columns:
-            df["watched"] = False
-        if "watched_date" not in df.columns:
-            df["watched_date"] = ""
-
-    df = _ensure_schema(df, section)
-
-    # ---------- ALTERADO: remover FutureWarning do pandas ----------
-    # Em vez de errors="ignore", usamos "coerce" e tratamos NaN a jusante.
-    if "watched" in df.columns:
-        df["watched"] = df["watched"].astype(bool, copy=False)
-    if "year" in df.columns:
-        df["year"] = pd.to_numeric(df["year"], errors="coerce")
-    if "year_start" in df.columns:
-        df["year_start"] = pd.to_numeric(df["year_start"], errors="coerce")
-    if "year_end" in df.columns:
-        df["year_end"] = pd.to_numeric(df["year_end"], errors="coerce")
-    if "season" in df.columns:
-        df["season"] = pd.to_numeric(df["season"], errors="coerce")
-
-    return df
+    """
+    Lê a tabela da biblioteca SQLite (cinema/library.py).
+    As migrações de esquema (subgenre→streaming, colunas em falta) são feitas
+    uma vez, no import do CSV, e não a cada leitura.
+    """
+    return read_table(section)
 
 
 def save_table(section: str, df: pd.DataFrame) -> None:
-    # ---------- ALTERADO: resolver caminho de forma robusta ----------
-    path = FILES[section]
-    path = Path(path) if not isinstance(path, Path) else path
-    path = _resolve_path_like(path)
-
-    ensure_csv(path, SCHEMA[section])
-    df = _ensure_schema(df, section)
-    df.to_csv(path, index=False, sep=SEP, encoding="utf-8")
+    """
+    Substitui a tabela inteira (compatibilidade). Para edições pontuais usar
+    library.upsert_rows / set_watched / delete_ids, que só escrevem as linhas tocadas.
+    """
+    replace_table(section, _ensure_schema(df.copy(), section))
 
 
 def load_genres() -> tuple[list[str], dict[str, list[str]], Path]:
@@ -0,0 +1,135 @@
+# cinema/enrich.py
+# -----------------------------------------------------------------------------
+# Enriquecimento offline da biblioteca local (TMDb id, poster, providers por
+# região, trailer, URI da banda sonora no Spotify)
+# - corre em paralelo (ThreadPoolExecutor) com limites de pedidos/segundo
+#   partilhados por todas as threads (TMDb e Spotify separados); os providers
+#   cobram o limite em cada pedido HTTP, incluindo o fan-out de queries da OST
+# - só refaz linhas sem registo ou com fetched_at mais antigo que max_age
+# - falhas temporárias (timeout, 429, 5xx) não são gravadas: a linha fica por
+#   enriquecer e entra na próxima passagem; "não encontrado" é gravado
+# - grava em library.enrichment; a UI lê daí sem chamadas de rede
+# Entradas: scripts/enrich_cinema_library.py e botão "Refresh metadata".
+# -----------------------------------------------------------------------------
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Callable, Iterable
+
+from services.common.ratelimit import RateLimiter
+
+from . import library
+
+TMDB_RATE = 20.0     # pedidos/s (limite público do TMDb é ~40/s)
+SPOTIFY_RATE = 5.0   # pesquisas/s (uma OST são dezenas de pesquisas)
+DEFAULT_MAX_AGE_DAYS = 30
+DEFAULT_WORKERS = 6
+
+
+def _kind(section: str) -> str:
+    return "movie" if section == "Movies" else "tv"
+
+
+def _soft(exc: Exception) -> None:
+    """Falha parcial: definitiva → campo fica vazio; temporária → a linha não é gravada."""
+    from .providers.tmdb import is_transient_error
+    if is_transient_error(exc):
+        raise exc
+
+
+def enrich_row(section: str, row: dict, tmdb: RateLimiter, spotify: RateLimiter,
+               with_ost: bool = True) -> dict:
+    """Metadados de uma linha da biblioteca. Falhas definitivas ficam vazias (a
+    linha é gravada na mesma, com fetched_at, para não repetir em loop); falhas
+    temporárias levantam exceção e a linha não é gravada."""
+    from .providers.tmdb import (
+        tmdb_best_trailer_url, tmdb_details, tmdb_find_id, tmdb_get_composers,
+        tmdb_watch_providers_all,
+    )
+    kind = _kind(section)
+    title = str(row.get("title") or "").strip()
+    year = library._year_key(row.get(library.YEAR_COL[section]))
+    rec = {"id": int(row["id"]), "tmdb_id": None, "poster_path": "", "providers": {},
+           "trailer_url": "", "ost_uri": "",
+           "fetched_at": datetime.now().isoformat(timespec="seconds")}
+
+    tid = tmdb_find_id(kind, title, year, limiter=tmdb)
+    if tid:
+        rec["tmdb_id"] = int(tid)
+        try:
+            rec["poster_path"] = tmdb_details(kind, tid, limiter=tmdb).get("poster_path") or ""
+        except Exception as e:
+            _soft(e)
+        try:
+            rec["providers"] = tmdb_watch_providers_all(kind, tid, limiter=tmdb)
+        except Exception as e:
+            _soft(e)
+        try:
+            rec["trailer_url"] = tmdb_best_trailer_url(kind, int(tid), _limiter=tmdb) or ""
+        except Exception as e:
+            _soft(e)
+
+    if with_ost and title:
+        from .providers.spotify import pick_best_soundtrack
+        hints = []
+        if tid:
+            try:
+                hints = tmdb_get_composers(kind, int(tid), limiter=tmdb) or []
+            except Exception as e:
+                _soft(e)
+                hints = []
+        try:
+            best = pick_best_soundtrack(title=title, year_txt=str(year or ""),
+                                        media_kind=kind, hint_artists=hints, strict=True,
+                                        limiter=spotify) or {}
+            rec["ost_uri"] = best.get("uri") or best.get("url") or ""
+        except Exception as e:
+            _soft(e)
+    return rec
+
+
+def refresh_metadata(section: str, *, max_age_days: int = DEFAULT_MAX_AGE_DAYS,
+                     ids: Iterable[int] | None = None, workers: int = DEFAULT_WORKERS,
+                     with_ost: bool = True, batch: int = 25,
+                     progress: Callable[[int, int], None] | None = None,
+                     errors: list | None = None) -> int:
+    """
+    Enriquece as linhas desatualizadas de uma secção (ou `ids`, se dados).
+    Grava em lotes de `batch` à medida que chegam. Devolve nº de linhas gravadas;
+    as que falharam (não gravadas, ficam para a próxima) vão para `errors` como
+    (id, erro) e são resumidas no log.
+    """
+    if ids is None:
+        cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat(timespec="seconds")
+        ids = library.stale_ids(section, cutoff)
+    wanted = set(int(i) for i in ids)
+    if not wanted:
+        return 0
+    df = library.read_table(section)
+    rows = [r for r in df.to_dict("records") if int(r["id"]) in wanted]
+
+    tmdb, spotify = RateLimiter(TMDB_RATE), RateLimiter(SPOTIFY_RATE)
+    done, pending, failed = 0, [], []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        futs = {ex.submit(enrich_row, section, r, tmdb, spotify, with_ost): int(r["id"])
+                for r in rows}
+        for fut in as_completed(futs):
+            try:
+                pending.append(fut.result())
+            except Exception as e:
+                failed.append((futs[fut], repr(e)))
+                continue
+            if len(pending) >= batch:
+                done += library.save_enrichment(section, pending)
+                pending = []
+            if progress:
+                progress(done + len(pending), len(rows))
+    if pending:
+        done += library.save_enrichment(section, pending)
+    if failed:
+        print(f"[enrich] {section}: {len(failed)} linha(s) falharam (ficam para a próxima); "
+              f"ex.: id={failed[0][0]} {failed[0][1]}")
+        if errors is not None:
+            errors.extend(failed)
+    return done
@@ -1,3 +1,8 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
 from pandas.api.types import is_bool_dtype, is_numeric_dtype  # <- novo
 
@@ -18,59 +23,171 @@ def parse_year_filter(txt: str):
     except Exception:
         return ("none", None)
 
+# ---------- Frame preparado (colunas normalizadas) + caches de máscaras ----------
+_NEGATIVES = {"", "false", "0", "no", "n", "nao", "não", "nan", "nat", "none", "null"}
+_AUTHOR_COL = {"Movies": "director", "Series": "creator", "Soundtracks": "artist"}
+_MAX_MASKS = 64
+_MAX_RESULTS = 32
+
+
+def _norm_col(col: pd.Series) -> np.ndarray:
+    return col.fillna("").astype(str).str.strip().str.casefold().to_numpy(dtype=object)
+
+
+def _has_streaming(col: pd.Series) -> np.ndarray:
+    # bool -> direto; numérico -> != 0; texto -> não-vazio e não "negativo"
+    if is_bool_dtype(col):
+        return col.fillna(False).to_numpy(dtype=bool)
+    if is_numeric_dtype(col):
+        return (pd.to_numeric(col, errors="coerce").fillna(0) != 0).to_numpy()
+    txt = col.astype(str).str.strip().str.lower()
+    return (~txt.isin(_NEGATIVES)).to_numpy()
+
+
+class _Prepared:
+    """Colunas normalizadas de uma tabela + cache de máscaras por (campo, valor)
+    e de resultados por dicionário de filtros. Partilhado entre sessões: as
+    caches (OrderedDict) só são lidas/alteradas com self.lock."""
+
+    def __init__(self, section: str, df: pd.DataFrame):
+        self.df = df
+        self.n = len(df)
+        self.text = {"title": _norm_col(df["title"]) if "title" in df.columns else None}
+        acol = _AUTHOR_COL.get(section)
+        if acol and acol in df.columns:
+            self.text[acol] = _norm_col(df[acol])
+        self.genre = _norm_col(df["genre"]) if "genre" in df.columns else None
+        self.has_streaming = _has_streaming(df["streaming"]) if "streaming" in df.columns else None
+        ycol = "year" if "year" in df.columns else "year_start"
+        self.year = pd.to_numeric(df[ycol], errors="coerce").to_numpy(dtype=float) if ycol in df.columns else None
+        self.rating = pd.to_numeric(df["rating"], errors="coerce").to_numpy(dtype=float) if "rating" in df.columns else None
+        self.gen = None
+        self.sig = None
+        self.masks: OrderedDict = OrderedDict()
+        self.results: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _lookup(self, cache: OrderedDict, key):
+        with self.lock:
+            hit = cache.get(key)
+            if hit is not None:
+                cache.move_to_end(key)
+            return hit
+
+    def _remember(self, cache: OrderedDict, key, val, cap: int):
+        with self.lock:
+            cache[key] = val
+            cache.move_to_end(key)
+            while len(cache) > cap:
+                cache.popitem(last=False)
+        return val
+
+    def contains_mask(self, col: str, q: str) -> np.ndarray:
+        key = ("contains", col, q)
+        hit = self._lookup(self.masks, key)
+        if hit is not None:
+            return hit
+        arr = self.text[col]
+        # se já há máscara para um substring de q, só se reavalia esse subconjunto
+        with self.lock:
+            subs = [m for k, m in self.masks.items()
+                    if k[0] == "contains" and k[1] == col and k[2] in q]
+        cand = min(subs, key=lambda m: m.sum()) if subs else None
+        rows = np.flatnonzero(cand) if cand is not None else np.arange(self.n)
+        out = np.zeros(self.n, dtype=bool)
+        out[rows] = np.fromiter((q in t for t in arr[rows]), dtype=bool, count=len(rows))
+        return self._remember(self.masks, key, out, _MAX_MASKS)
+
+    def mask(self, key: tuple, build) -> np.ndarray:
+        hit = self._lookup(self.masks, key)
+        if hit is not None:
+            return hit
+        return self._remember(self.masks, key, build(), _MAX_MASKS)
+
+
+_prepared: dict[tuple, _Prepared] = {}
+
+
+def _frame_sig(df: pd.DataFrame) -> tuple | None:
+    """Assinatura de colunas, índice, ordem e valores. Os attrs passam por
+    .copy()/sort_values/edições, por isso não chegam para reaproveitar o frame."""
+    try:
+        h = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    except TypeError:  # células não hasháveis (listas/dicts)
+        return None
+    return tuple(df.columns), hashlib.blake2b(h.tobytes(), digest_size=16).hexdigest()
+
+
+def _prepare(section: str, df: pd.DataFrame) -> _Prepared:
+    """Frames vindos da biblioteca (attrs com 'generation') são preparados uma vez
+    por geração e conteúdo; outros frames são preparados de novo (sem cache)."""
+    gen = df.attrs.get("generation")
+    if gen is None or df.attrs.get("section") != section:
+        return _Prepared(section, df)
+    sig = _frame_sig(df)
+    if sig is None:
+        return _Prepared(section, df)
+    key = (section, df.attrs.get("db"))
+    p = _prepared.get(key)
+    if p is None or p.gen != gen or p.sig != sig:
+        p = _Prepared(section, df)
+        p.gen, p.sig = gen, sig
+        _prepared[key] = p
+    return p
+
+
 def apply_filters(section: str, df: pd.DataFrame, filters: dict) -> pd.DataFrame:
-    m = pd.Series(True, index=df.index)
+    p = _prepare(section, df)
+    rkey = tuple(sorted((k, str(v)) for k, v in filters.items()))
+    hit = p._lookup(p.results, rkey)
+    if hit is not None:
+        return hit.copy()
+
+    m = np.ones(p.n, dtype=bool)
 
     def contains(col, val):
-        return df[col].astype(str).str.contains(str(val), case=False, na=False)
+        q = str(val).strip().casefold()
+        if not q or p.text.get(col) is None:
+            return
+        nonlocal m
+        m &= p.contains_mask(col, q)
 
     if filters.get("title"):
-        m &= contains("title", filters["title"])
+        contains("title", filters["title"])
     if section == "Movies" and filters.get("director"):
-        m &= contains("director", filters["director"])
+        contains("director", filters["director"])
     if section == "Series" and filters.get("creator"):
-        m &= contains("creator", filters["creator"])
+        contains("creator", filters["creator"])
     if section == "Soundtracks" and filters.get("artist"):
-        m &= contains("artist", filters["artist"])
+        contains("artist", filters["artist"])
 
     gen = filters.get("genre")
-    if gen and gen != "All":
-        m &= df["genre"].fillna("").astype(str).str.strip().str.casefold().eq(str(gen).strip().casefold())
+    if gen and gen != "All" and p.genre is not None:
+        g = str(gen).strip().casefold()
+        m &= p.mask(("genre", g), lambda: p.genre == g)
 
     # ---------- Streaming (robusto a texto/booleano/número) ----------
     s = filters.get("streaming")
-    if s in ("Yes", "No") and "streaming" in df.columns:
-        col = df["streaming"]
-        # Se for bool -> usa diretamente; se numérico -> != 0; caso contrário -> texto não-vazio
-        if is_bool_dtype(col):
-            has_streaming = col.fillna(False)
-        elif is_numeric_dtype(col):
-            has_streaming = pd.to_numeric(col, errors="coerce").fillna(0) != 0
-        else:
-            txt = col.astype(str).str.strip().str.lower()
-            # considera vazio/negativos comuns como "sem streaming"
-            negatives = {"", "false", "0", "no", "n", "nao", "não", "nan", "nat", "none", "null"}
-            has_streaming = ~txt.isin(negatives)
-        m &= has_streaming if s == "Yes" else ~has_streaming
+    if s in ("Yes", "No") and p.has_streaming is not None:
+        m &= p.has_streaming if s == "Yes" else ~p.has_streaming
     # ---------------------------------------------------------------
 
     mode, val = parse_year_filter(filters.get("year", ""))
-    if mode != "none":
-        col = "year" if "year" in df.columns else "year_start"
-        coln = pd.to_numeric(df[col], errors="coerce")
+    if mode != "none" and p.year is not None:
         if mode == "exact":
-            m &= (coln == val)
+            m &= p.mask(("year", val), lambda: p.year == val)
         else:
             a, b = val
-            m &= coln.between(a, b, inclusive="both")
+            m &= p.mask(("year", a, b), lambda: (p.year >= a) & (p.year <= b))
 
     mr = filters.get("min_rating")
-    if mr is not None and mr > 0:
-        m &= (pd.to_numeric(df["rating"], errors="coerce") >= mr)
+    if mr is not None and mr > 0 and p.rating is not None:
+        m &= p.mask(("rating", float(mr)), lambda: p.rating >= mr)
 
     out = df[m].copy()
     if "rating" in out.columns:
         out = out.sort_values(by=["rating","title"], ascending=[False,True], na_position="last")
     else:
         out = out.sort_values(by=["title"], ascending=True)
-    return out
+    p._remember(p.results, rkey, out, _MAX_RESULTS)
+    return out.copy()
@@ -0,0 +1,519 @@
+# cinema/library.py
+# -----------------------------------------------------------------------------
+# Biblioteca local de cinema em SQLite (Movies / Series / Soundtracks)
+# - WAL + índices em (title_norm, ano), genre, watched, rating
+# - upserts/deletes por id em transação (um toggle "watched" = uma linha)
+# - import/export CSV (';') para compatibilidade com os ficheiros antigos
+# - na primeira utilização, cada tabela vazia é importada do CSV de FILES
+# - tabela enrichment: metadados TMDb/Spotify gravados por cinema/enrich.py
+# - caches em memória (tabela, watched, enrichment) chaveadas pela versão:
+#   contador de escritas do processo + impressão digital da BD e do -wal
+#   (escritas de scripts noutros processos também invalidam)
+# -----------------------------------------------------------------------------
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import pandas as pd
+
+from .config import DB_PATH, FILES, SCHEMA, SEP
+
+TABLES = {"Movies": "movies", "Series": "series", "Soundtracks": "soundtracks"}
+
+# colunas não-texto (o resto é TEXT, com '' em vez de NULL)
+_INT_COLS = {"id", "year", "season", "year_start", "year_end",
+             "related_movie_id", "related_series_id"}
+_REAL_COLS = {"rating"}
+_BOOL_COLS = {"watched"}
+
+# coluna de ano usada no índice (title_norm, ano)
+YEAR_COL = {"Movies": "year", "Series": "year_start", "Soundtracks": "year"}
+
+_init_lock = threading.Lock()
+_initialized: set[str] = set()
+
+# geração de escrita: incrementa a cada escrita (invalida tabela/índices em memória)
+_generation = 0
+_watched_cache: dict[tuple[str, str], tuple[tuple, dict]] = {}
+_table_cache: dict[tuple[str, str], tuple[tuple, pd.DataFrame]] = {}
+
+
+def _bump() -> None:
+    global _generation
+    _generation += 1
+
+
+def _file_sig(path: str) -> tuple:
+    try:
+        st_ = os.stat(path)
+        return (st_.st_mtime_ns, st_.st_size)
+    except OSError:
+        return (None, None)
+
+
+def _version(db: str) -> tuple:
+    """(geração do processo, (mtime, tamanho) da BD e do WAL). Escritas de outros
+    processos (ex.: scripts/cinema_library.py) mudam o ficheiro -wal (ou a BD,
+    após checkpoint), por isso também invalidam."""
+    return (_generation, _file_sig(db), _file_sig(db + "-wal"))
+
+
+def title_norm(s) -> str:
+    """Chave de título: trim + casefold (o mesmo critério usado nas pesquisas)."""
+    if s is None or (isinstance(s, float) and pd.isna(s)):
+        return ""
+    return str(s).strip().casefold()
+
+
+# ======================
+# Ligação / esquema
+# ======================
+def _col_type(c: str) -> str:
+    if c == "id":
+        return "INTEGER PRIMARY KEY"
+    if c in _INT_COLS or c in _BOOL_COLS:
+        return "INTEGER"
+    if c in _REAL_COLS:
+        return "REAL"
+    return "TEXT NOT NULL DEFAULT ''"
+
+
+def _create_schema(con: sqlite3.Connection) -> None:
+    con.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    for section, table in TABLES.items():
+        cols = ", ".join(f'"{c}" {_col_type(c)}' for c in SCHEMA[section])
+        con.execute(f"CREATE TABLE IF NOT EXISTS {table} ({cols}, title_norm TEXT NOT NULL DEFAULT '')")
+        ycol = YEAR_COL[section]
+        con.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_title ON {table}(title_norm, {ycol})")
+        con.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_genre ON {table}(genre)")
+        con.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_rating ON {table}(rating)")
+        if "watched" in SCHEMA[section]:
+            con.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_watched ON {table}(watched)")
+    # metadados remotos (scripts/enrich_cinema_library.py), 1 linha por (secção, id)
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS enrichment ("
+        " section TEXT NOT NULL, id INTEGER NOT NULL,"
+        " tmdb_id INTEGER, poster_path TEXT NOT NULL DEFAULT '',"
+        " providers TEXT NOT NULL DEFAULT '{}', trailer_url TEXT NOT NULL DEFAULT '',"
+        " ost_uri TEXT NOT NULL DEFAULT '', fetched_at TEXT NOT NULL DEFAULT '',"
+        " PRIMARY KEY (section, id))"
+    )
+    con.execute("CREATE INDEX IF NOT EXISTS ix_enrichment_fetched ON enrichment(section, fetched_at)")
+
+
+def _open(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(str(path), timeout=10)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    return con
+
+
+@contextmanager
+def connect(path: Path | None = None) -> Iterator[sqlite3.Connection]:
+    """Ligação curta (uma por operação; seguro entre threads do Streamlit).
+    Commit no fim do bloco, rollback se houver exceção."""
+    path = Path(path or DB_PATH)
+    con = _open(path)
+    try:
+        key = str(path.resolve())
+        if key not in _initialized:
+            with _init_lock:
+                if key not in _initialized:
+                    _create_schema(con)
+                    con.commit()
+                    _import_legacy_csvs(con)
+                    _initialized.add(key)
+        with con:
+            yield con
+    finally:
+        con.close()
+
+
+# ======================
+# Conversão de valores
+# ======================
+def _is_missing(v) -> bool:
+    if v is None or v is pd.NA or v is pd.NaT:
+        return True
+    try:
+        return bool(pd.isna(v))
+    except (TypeError, ValueError):
+        return False
+
+
+def _to_db(c: str, v):
+    if c in _BOOL_COLS:
+        if _is_missing(v):
+            return 0
+        if isinstance(v, str):
+            return int(v.strip().lower() in ("1", "true", "yes", "sim"))
+        return int(bool(v))
+    if c in _INT_COLS:
+        if _is_missing(v) or str(v).strip() == "":
+            return None
+        try:
+            return int(float(v))
+        except (TypeError, ValueError):
+            return None
+    if c in _REAL_COLS:
+        if _is_missing(v) or str(v).strip() == "":
+            return None
+        try:
+            return float(v)
+        except (TypeError, ValueError):
+            return None
+    if _is_missing(v):
+        return ""
+    if c == "watched_date":
+        try:
+            return v.strftime("%Y-%m-%d")
+        except AttributeError:
+            s = str(v).strip()
+            return "" if s.lower() in ("nat", "none", "nan") else s[:10]
+    return str(v)
+
+
+def _row_values(section: str, row: dict) -> list:
+    cols = SCHEMA[section]
+    return [_to_db(c, row.get(c)) for c in cols] + [title_norm(row.get("title"))]
+
+
+# ======================
+# Leitura
+# ======================
+def read_table(section: str, path: Path | None = None) -> pd.DataFrame:
+    """Tabela completa com as colunas de SCHEMA e tipos como o load_table antigo.
+    Lida da BD uma vez por versão (ver _version); devolve uma cópia com
+    attrs {'section', 'generation'} (usados pela cache de filtros)."""
+    ck = (section, str(Path(path or DB_PATH)))
+    gen = _version(ck[1])
+    hit = _table_cache.get(ck)
+    if hit and hit[0] == gen:
+        return hit[1].copy()
+    cols = SCHEMA[section]
+    sel = ", ".join(f'"{c}"' for c in cols)
+    with connect(path) as con:
+        df = pd.read_sql_query(f"SELECT {sel} FROM {TABLES[section]} ORDER BY id", con)
+    if "watched" in df.columns:
+        df["watched"] = df["watched"].fillna(0).astype(bool)
+    for c in cols:
+        if c in _INT_COLS and c != "id" or c in _REAL_COLS:
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+    df.attrs.update(section=section, generation=gen, db=ck[1])
+    _table_cache[ck] = (gen, df)
+    return df.copy()
+
+
+def get_row(section: str, row_id: int, path: Path | None = None) -> dict | None:
+    with connect(path) as con:
+        con.row_factory = sqlite3.Row
+        r = con.execute(f"SELECT * FROM {TABLES[section]} WHERE id = ?", (int(row_id),)).fetchone()
+    return dict(r) if r else None
+
+
+def find_ids(section: str, title: str, year=None, season=None,
+             path: Path | None = None) -> list[int]:
+    """ids com o mesmo título normalizado (e ano/temporada, se dados) — usa o índice."""
+    sql = f"SELECT id FROM {TABLES[section]} WHERE title_norm = ?"
+    args: list = [title_norm(title)]
+    if year is not None:
+        sql += f" AND {YEAR_COL[section]} = ?"
+        args.append(int(year))
+    if season is not None and section == "Series":
+        sql += " AND season = ?"
+        args.append(int(season))
+    with connect(path) as con:
+        return [r[0] for r in con.execute(sql + " ORDER BY id", args)]
+
+
+def _year_key(v) -> int | None:
+    if _is_missing(v) or str(v).strip() == "":
+        return None
+    try:
+        return int(str(v).strip()[:4])
+    except ValueError:
+        try:
+            return int(float(v))
+        except (TypeError, ValueError):
+            return None
+
+
+def watched_index(section: str, path: Path | None = None) -> dict:
+    """{(title_norm, ano): (watched, watched_date)} + {(title_norm, None): 1.ª linha do título}.
+    Construído uma vez por versão (qualquer escrita na biblioteca invalida)."""
+    ck = (section, str(Path(path or DB_PATH)))
+    gen = _version(ck[1])
+    hit = _watched_cache.get(ck)
+    if hit and hit[0] == gen:
+        return hit[1]
+    ycol = YEAR_COL[section]
+    with connect(path) as con:
+        rows = con.execute(
+            f"SELECT title_norm, {ycol}, watched, watched_date FROM {TABLES[section]} ORDER BY id"
+        ).fetchall()
+    idx: dict = {}
+    for t, y, w, wd in rows:
+        val = (bool(w), wd or "")
+        idx.setdefault((t, None), val)
+        if y is not None:
+            idx.setdefault((t, int(y)), val)
+    _watched_cache[ck] = (gen, idx)
+    return idx
+
+
+def lookup_watched(section: str, items: Iterable[tuple], path: Path | None = None) -> list[tuple[bool, str]]:
+    """Lookup em lote: [(title, ano)] -> [(watched, watched_date)] ((False, '') se não existir)."""
+    idx = watched_index(section, path)
+    out = []
+    for title, year in items:
+        y = _year_key(year)
+        out.append(idx.get((title_norm(title), y), (False, "")))
+    return out
+
+
+# ======================
+# Escrita
+# ======================
+def upsert_rows(section: str, rows: Iterable[dict], path: Path | None = None) -> list[int]:
+    """INSERT … ON CONFLICT(id) DO UPDATE numa transação. Linhas sem id recebem
+    um id novo. Devolve os ids escritos (pela ordem de entrada)."""
+    table = TABLES[section]
+    cols = SCHEMA[section]
+    names = ", ".join(f'"{c}"' for c in cols) + ", title_norm"
+    marks = ", ".join("?" for _ in range(len(cols) + 1))
+    updates = ", ".join(f'"{c}" = excluded."{c}"' for c in cols[1:]) + ", title_norm = excluded.title_norm"
+    sql = (f"INSERT INTO {table} ({names}) VALUES ({marks}) "
+           f"ON CONFLICT(id) DO UPDATE SET {updates}")
+    out: list[int] = []
+    with connect(path) as con:
+        for row in rows:
+            vals = _row_values(section, row)
+            cur = con.execute(sql, vals)
+            out.append(vals[0] if vals[0] is not None else cur.lastrowid)
+    _bump()
+    return out
+
+
+def update_fields(section: str, row_id: int, fields: dict, path: Path | None = None) -> bool:
+    """Atualiza só as colunas indicadas de uma linha; True se algo mudou."""
+    cols = [c for c in fields if c in SCHEMA[section] and c != "id"]
+    if not cols:
+        return False
+    vals = [_to_db(c, fields[c]) for c in cols]
+    sets = ", ".join(f'"{c}" = ?' for c in cols)
+    diff = " OR ".join(f'"{c}" IS NOT ?' for c in cols)
+    if "title" in cols:
+        sets += ", title_norm = ?"
+        vals_set = vals + [title_norm(fields["title"])]
+    else:
+        vals_set = vals
+    with connect(path) as con:
+        cur = con.execute(
+            f"UPDATE {TABLES[section]} SET {sets} WHERE id = ? AND ({diff})",
+            [*vals_set, int(row_id), *vals],
+        )
+    _bump()
+    return cur.rowcount > 0
+
+
+def set_watched(section: str, changes: Iterable[tuple[int, bool, str]],
+                path: Path | None = None) -> int:
+    """Aplica (id, watched, watched_date) só às linhas que mudam; devolve nº de linhas escritas."""
+    params = [(_to_db("watched", w), _to_db("watched_date", wd), int(i),
+               _to_db("watched", w), _to_db("watched_date", wd))
+              for i, w, wd in changes]
+    if not params:
+        return 0
+    with connect(path) as con:
+        cur = con.executemany(
+            f"UPDATE {TABLES[section]} SET watched = ?, watched_date = ? "
+            f"WHERE id = ? AND (watched IS NOT ? OR watched_date IS NOT ?)",
+            params,
+        )
+    _bump()
+    return cur.rowcount
+
+
+def delete_ids(section: str, ids: Iterable[int], path: Path | None = None) -> int:
+    params = [(int(i),) for i in ids]
+    if not params:
+        return 0
+    with connect(path) as con:
+        cur = con.executemany(f"DELETE FROM {TABLES[section]} WHERE id = ?", params)
+        n = cur.rowcount
+        con.executemany("DELETE FROM enrichment WHERE section = ? AND id = ?",
+                        [(section, i) for (i,) in params])
+    _bump()
+    return n
+
+
+def replace_table(section: str, df: pd.DataFrame, path: Path | None = None) -> int:
+    """Substitui a tabela inteira (compatibilidade com save_table)."""
+    table = TABLES[section]
+    cols = SCHEMA[section]
+    names = ", ".join(f'"{c}"' for c in cols) + ", title_norm"
+    marks = ", ".join("?" for _ in range(len(cols) + 1))
+    records = df.reindex(columns=cols).to_dict("records")
+    with connect(path) as con:
+        con.execute(f"DELETE FROM {table}")
+        con.executemany(f"INSERT INTO {table} ({names}) VALUES ({marks})",
+                        (_row_values(section, r) for r in records))
+        con.execute(f"DELETE FROM enrichment WHERE section = ? AND id NOT IN (SELECT id FROM {table})",
+                    (section,))
+    _bump()
+    return len(records)
+
+
+# ======================
+# Enriquecimento (TMDb / Spotify)
+# ======================
+_ENRICH_COLS = ["tmdb_id", "poster_path", "providers", "trailer_url", "ost_uri", "fetched_at"]
+_enrich_cache: dict[tuple[str, str], tuple[tuple, dict]] = {}
+
+
+def stale_ids(section: str, older_than: str, path: Path | None = None) -> list[int]:
+    """ids sem enriquecimento ou com fetched_at < older_than (ISO)."""
+    table = TABLES[section]
+    with connect(path) as con:
+        rows = con.execute(
+            f"SELECT t.id FROM {table} t LEFT JOIN enrichment e"
+            f" ON e.section = ? AND e.id = t.id"
+            f" WHERE e.id IS NULL OR e.fetched_at < ? ORDER BY t.id",
+            (section, older_than),
+        ).fetchall()
+    return [r[0] for r in rows]
+
+
+def save_enrichment(section: str, rows: Iterable[dict], path: Path | None = None) -> int:
+    """Upsert de {'id', tmdb_id, poster_path, providers (dict região→texto), trailer_url, ost_uri, fetched_at}."""
+    params = []
+    for r in rows:
+        prov = r.get("providers") or {}
+        params.append((
+            section, int(r["id"]), _to_db("id", r.get("tmdb_id")),
+            r.get("poster_path") or "", json.dumps(prov, ensure_ascii=False, sort_keys=True),
+            r.get("trailer_url") or "", r.get("ost_uri") or "", r.get("fetched_at") or "",
+        ))
+    if not params:
+        return 0
+    cols = ", ".join(_ENRICH_COLS)
+    upd = ", ".join(f"{c} = excluded.{c}" for c in _ENRICH_COLS)
+    with connect(path) as con:
+        con.executemany(
+            f"INSERT INTO enrichment (section, id, {cols}) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            f"ON CONFLICT(section, id) DO UPDATE SET {upd}",
+            params,
+        )
+    _bump()
+    return len(params)
+
+
+def enrichment_index(section: str, path: Path | None = None) -> dict:
+    """{(title_norm, ano)|(title_norm, None)|id: registo de enriquecimento}; sem rede.
+    Cache por versão (como o watched_index)."""
+    ck = (section, str(Path(path or DB_PATH)))
+    gen = _version(ck[1])
+    hit = _enrich_cache.get(ck)
+    if hit and hit[0] == gen:
+        return hit[1]
+    table, ycol = TABLES[section], YEAR_COL[section]
+    with connect(path) as con:
+        rows = con.execute(
+            f"SELECT t.id, t.title_norm, t.{ycol}, {', '.join('e.' + c for c in _ENRICH_COLS)}"
+            f" FROM {table} t JOIN enrichment e ON e.section = ? AND e.id = t.id ORDER BY t.id",
+            (section,),
+        ).fetchall()
+    idx: dict = {}
+    for rid, t, y, *vals in rows:
+        rec = dict(zip(_ENRICH_COLS, vals))
+        try:
+            rec["providers"] = json.loads(rec["providers"] or "{}")
+        except ValueError:
+            rec["providers"] = {}
+        rec["id"] = rid
+        idx[rid] = rec
+        idx.setdefault((t, None), rec)
+        if y is not None:
+            idx.setdefault((t, int(y)), rec)
+    _enrich_cache[ck] = (gen, idx)
+    return idx
+
+
+def lookup_enrichment(section: str, title: str, year=None, path: Path | None = None) -> dict | None:
+    idx = enrichment_index(section, path)
+    y = _year_key(year)
+    return idx.get((title_norm(title), y)) if y is not None else idx.get((title_norm(title), None))
+
+
+# ======================
+# CSV (compatibilidade)
+# ======================
+def _read_csv_migrated(section: str, csv_path: Path) -> pd.DataFrame:
+    df = pd.read_csv(csv_path, sep=SEP, encoding="utf-8", dtype=str, keep_default_na=False)
+    # subgenre → streaming (CSVs antigos)
+    if section in ("Movies", "Series") and "streaming" not in df.columns and "subgenre" in df.columns:
+        df = df.rename(columns={"subgenre": "streaming"})
+    df = df.reindex(columns=SCHEMA[section])
+    # linhas sem id recebem ids a seguir ao máximo existente
+    ids = pd.to_numeric(df["id"], errors="coerce")
+    missing = ids.isna()
+    if missing.any():
+        start = int(ids.max()) + 1 if ids.notna().any() else 1
+        ids.loc[missing] = range(start, start + int(missing.sum()))
+    df["id"] = ids.astype(int)
+    return df.drop_duplicates(subset="id", keep="last")
+
+
+def import_csv(section: str, csv_path: Path | None = None, replace: bool = False,
+               path: Path | None = None) -> int:
+    """Importa um CSV (';'). replace=True substitui a tabela; senão faz upsert por id."""
+    from .data import _resolve_path_like  # evita import circular
+    csv_path = _resolve_path_like(Path(csv_path or FILES[section]))
+    if not csv_path.exists():
+        return 0
+    df = _read_csv_migrated(section, csv_path)
+    if replace:
+        return replace_table(section, df, path)
+    return len(upsert_rows(section, df.to_dict("records"), path))
+
+
+def export_csv(section: str, csv_path: Path | None = None, path: Path | None = None) -> Path:
+    """Escreve a tabela em CSV (';', mesmo esquema dos ficheiros antigos)."""
+    from .data import _resolve_path_like
+    csv_path = _resolve_path_like(Path(csv_path or FILES[section]))
+    df = read_table(section, path)
+    if "watched" in df.columns:
+        df["watched"] = df["watched"].map(lambda b: "True" if b else "False")
+    for c in df.columns:
+        if c in _INT_COLS and c != "id":
+            df[c] = df[c].astype("Int64")
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(csv_path, index=False, sep=SEP, encoding="utf-8")
+    return csv_path
+
+
+def _import_legacy_csvs(con: sqlite3.Connection) -> None:
+    """Primeira utilização: importa cada CSV de FILES se a tabela estiver vazia."""
+    from .data import _resolve_path_like
+    cols_by = {s: SCHEMA[s] for s in TABLES}
+    for section, table in TABLES.items():
+        key = f"imported:{section}"
+        if con.execute("SELECT 1 FROM meta WHERE key = ?", (key,)).fetchone():
+            continue
+        empty = con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] == 0
+        csv_path = _resolve_path_like(Path(FILES[section]))
+        if empty and csv_path.exists():
+            df = _read_csv_migrated(section, csv_path)
+            names = ", ".join(f'"{c}"' for c in cols_by[section]) + ", title_norm"
+            marks = ", ".join("?" for _ in range(len(cols_by[section]) + 1))
+            con.executemany(f"INSERT INTO {table} ({names}) VALUES ({marks})",
+                            (_row_values(section, r) for r in df.to_dict("records")))
+        con.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(csv_path)))
+        con.commit()
@@ -1,12 +1,16 @@
 import os, re, unicodedata
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import urllib.parse as _up
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import streamlit as st
 from rapidfuzz import fuzz
 import spotipy
 from spotipy.oauth2 import SpotifyClientCredentials
 
+from cinema.scoring import fuzzy_matrix, token_set_matrix
+from services.common.ratelimit import RateLimiter
+
 SPOTIFY_CLIENT_ID = os.getenv("SPOTIFY_CLIENT_ID", st.secrets.get("SPOTIFY_CLIENT_ID", ""))
 SPOTIFY_CLIENT_SECRET = os.getenv("SPOTIFY_CLIENT_SECRET", st.secrets.get("SPOTIFY_CLIENT_SECRET", ""))
 SPOTIFY_MARKET = os.getenv("SPOTIFY_MARKET", st.secrets.get("SPOTIFY_MARKET", "US")) or "US"
@@ -156,10 +160,12 @@ def _has_kw(name: str, kws: List[str]) -> bool:
 # ---------------- Scoring ----------------
 def _score_album_like(name: str, title: str, ref_year: Optional[int], media_kind: str,
                       alb: dict | None = None, must_tokens: set[str] | None = None,
-                      hint_artists: Optional[List[str]] = None) -> float:
+                      hint_artists: Optional[List[str]] = None,
+                      fuzzy: Optional[float] = None) -> float:
     name_n = _norm(name)
     title_n = _norm(title)
-    fuzzy = max(fuzz.WRatio(name_n, title_n), fuzz.token_set_ratio(name_n, title_n))
+    if fuzzy is None:  # normalmente vem pré-calculado em lote (cinema.scoring)
+        fuzzy = max(fuzz.WRatio(name_n, title_n), fuzz.token_set_ratio(name_n, title_n))
 
     # Palavras de OST: muito fortes > fortes > ausência (penalização grande)
     if _has_kw(name, _OST_STRICT_POS):
@@ -213,7 +219,8 @@ def _score_album_like(name: str, title: str, ref_year: Optional[int], media_kind
 
 # ---------------- Theme track scoring (fallback) ----------------
 def _score_theme_track(trk: dict, title: str, ref_year: Optional[int],
-                       hint_artists: Optional[List[str]] = None) -> float:
+                       hint_artists: Optional[List[str]] = None,
+                       base_fuzzy: Optional[float] = None) -> float:
     """Scoring simples para faixas que sejam 'Theme' do título indicado."""
     try:
         from rapidfuzz import fuzz
@@ -227,7 +234,9 @@ def _score_theme_track(trk: dict, title: str, ref_year: Optional[int],
     rel_year = _year_from_date(album.get("release_date") or "")
 
     base = 0.0
-    if fuzz:
+    if base_fuzzy is not None:
+        base = float(base_fuzzy)
+    elif fuzz:
         # combinar com variantes do título
         variants = _title_variants(title)
         base = max(fuzz.token_set_ratio(name, v) for v in variants) * 0.6
@@ -308,7 +317,9 @@ def search_theme_tracks(title: str, year_txt: str = "", artist: str = "", limit:
                 items.append(trk)
 
     # pontuar e ordenar
-    scored = [(_score_theme_track(trk, title, ref_year, hint_artists), trk) for trk in items]
+    base = token_set_matrix(variants, [(t.get("name") or "").strip() for t in items]).max(axis=0, initial=0) * 0.6
+    scored = [(_score_theme_track(trk, title, ref_year, hint_artists, base_fuzzy=b), trk)
+              for trk, b in zip(items, base)]
     scored.sort(key=lambda t: t[0], reverse=True)
 
     out: List[Dict[str, Any]] = [{
@@ -361,46 +372,124 @@ def _build_queries(title: str, ref_year: Optional[int], media_kind: str,
     return out
 
 # ---------------- Busca principal ----------------
-def _search_sp(sp, q: str, typestr: str, limit: int, market: Optional[str]) -> List[dict]:
-    """Faz pesquisa com/sem market. Devolve items da resposta (lista)."""
+def _search_sp(sp, q: str, typestr: str, limit: int, market: Optional[str],
+               limiter: Optional[RateLimiter] = None) -> List[dict]:
+    """Faz pesquisa com/sem market. Devolve items da resposta (lista); erros
+    (rede, 429…) propagam-se — quem chama decide se os engole.
+    `limiter`: 1 token por pedido ao Spotify."""
+    if limiter is not None:
+        limiter.wait()
+    res = sp.search(q=q, type=typestr, limit=min(20, limit), market=market) if market else sp.search(q=q, type=typestr, limit=min(20, limit))
+    items = (res or {}).get(f"{typestr}s", {}).get("items", [])
+    return items or []
+
+
+class IncompleteSearch(Exception):
+    """Alguma query falhou: `partial` tem o que chegou, `error` a 1.ª falha.
+    Levantada dentro de funções com st.cache_data para não guardar o resultado."""
+
+    def __init__(self, partial, error: Exception):
+        super().__init__(repr(error))
+        self.partial, self.error = partial, error
+
+_FANOUT_WORKERS = 8
+
+def _search_with_fallback(sp, q: str, typestr: str, limit: int,
+                          limiter: Optional[RateLimiter] = None) -> List[dict]:
+    """Com market e, se vazio, sem market (mais recall) — numa só tarefa."""
+    items = _search_sp(sp, q, typestr, limit, SPOTIFY_MARKET, limiter)
+    return items or _search_sp(sp, q, typestr, limit, None, limiter)
+
+def _scored_fanout(sp, queries: List[str], title: str, ref_year: Optional[int], media_kind: str,
+                   must_tokens: set[str], hint_artists: Optional[List[str]],
+                   limit: int = 25, limiter: Optional[RateLimiter] = None
+                   ) -> Tuple[Dict[str, List[tuple]], Optional[Exception]]:
+    """
+    Lança em paralelo todas as queries de álbum e (especulativamente) de playlist.
+    Cada item fica com a 1.ª posição em que aparece (ordem das queries, depois
+    ordem na resposta), seja qual for a ordem de chegada; scoring em lote no fim.
+    Devolve ({'album': [(score, ordem, item)], 'playlist': [...]}, 1.ª falha ou None).
+    """
+    title_n = _norm(title)
+    out: Dict[str, List[tuple]] = {"album": [], "playlist": []}
+    best: Dict[str, Dict[str, tuple]] = {"album": {}, "playlist": {}}
+    error: Optional[Exception] = None
+    with ThreadPoolExecutor(max_workers=_FANOUT_WORKERS) as ex:
+        futs = {
+            ex.submit(_search_with_fallback, sp, q, typestr, limit, limiter): (typestr, i)
+            for typestr in ("album", "playlist")
+            for i, q in enumerate(queries)
+        }
+        for fut in as_completed(futs):
+            typestr, qi = futs[fut]
+            try:
+                items = fut.result()
+            except Exception as e:
+                error = error or e
+                items = []
+            for j, it in enumerate(items or []):
+                iid = (it or {}).get("id")
+                if not iid:
+                    continue
+                prev = best[typestr].get(iid)
+                if prev is None or (qi, j) < prev[0]:
+                    best[typestr][iid] = ((qi, j), it)
+    for typestr, found in best.items():
+        if not found:
+            continue
+        ranked = sorted(found.values(), key=lambda t: t[0])
+        fz = fuzzy_matrix([title_n], [_norm(it.get("name", "")) for _, it in ranked])[0]
+        for (pos, it), f in zip(ranked, fz):
+            sc = _score_album_like(it.get("name", ""), title, ref_year, media_kind,
+                                   alb=it if typestr == "album" else None,
+                                   must_tokens=must_tokens, hint_artists=hint_artists,
+                                   fuzzy=f)
+            out[typestr].append((sc, pos, it))
+        # score desc; empates pela 1.ª posição (query, rank) — não depende da rede
+        out[typestr].sort(key=lambda t: (-t[0], t[1]))
+    return out, error
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def _soundtrack_candidates_cached(title: str, ref_year: Optional[int], media_kind: str,
+                                  hints: tuple, limit: int,
+                                  _limiter: Optional[RateLimiter] = None) -> Dict[str, List[tuple]]:
+    """Memo por (título, ano, tipo, hints, limite). Só guarda respostas completas:
+    se alguma query falhou (429, rede…) levanta IncompleteSearch e nada fica em cache.
+    _limiter: limite de pesquisas/s (fora da chave de cache)."""
+    hint_artists = list(hints) or None
+    scored, error = _scored_fanout(_sp_client(), _build_queries(title, ref_year, media_kind, hint_artists),
+                                   title, ref_year, media_kind, _distinct_tokens(title), hint_artists,
+                                   limit=limit, limiter=_limiter)
+    cands = {k: [(sc, it) for sc, _, it in v] for k, v in scored.items()}
+    if error is not None:
+        raise IncompleteSearch(cands, error)
+    return cands
+
+def _soundtrack_candidates(title: str, ref_year: Optional[int], media_kind: str,
+                           hints: tuple, limit: int = 25, strict: bool = False,
+                           limiter: Optional[RateLimiter] = None) -> Dict[str, List[tuple]]:
+    """Partilhado por search/pick_best/ost_link_cached. Com falhas: strict → levanta
+    o erro original; senão devolve o resultado parcial (sem o guardar)."""
     try:
-        res = sp.search(q=q, type=typestr, limit=min(20, limit), market=market) if market else sp.search(q=q, type=typestr, limit=min(20, limit))
-        items = res.get(f"{typestr}s", {}).get("items", [])
-        return items or []
-    except Exception:
-        return []
+        return _soundtrack_candidates_cached(title, ref_year, media_kind, hints, limit, limiter)
+    except IncompleteSearch as e:
+        if strict:
+            raise e.error
+        return e.partial
 
 def search_soundtrack_albums(title: str, year_txt: str = "", artist: str = "", limit: int = 25,
                              media_kind: str = "movie",
-                             hint_artists: Optional[List[str]] = None) -> List[Dict[str,Any]]:
-    sp = _sp_client()
+                             hint_artists: Optional[List[str]] = None,
+                             strict: bool = False,
+                             limiter: Optional[RateLimiter] = None) -> List[Dict[str,Any]]:
     if not title:
         return []
 
     ref_year = _safe_year(year_txt)
-    must_tokens = _distinct_tokens(title)
-
-    # 1) ÁLBUNS (duas fases: com market, depois sem market se vazio)
-    candidates: List[dict] = []
-    seen_ids = set()
-    for q in _build_queries(title, ref_year, media_kind, hint_artists):
-        items = _search_sp(sp, q, "album", limit, SPOTIFY_MARKET)
-        if not items:
-            items = _search_sp(sp, q, "album", limit, None)  # sem market → mais recall
-        for alb in items:
-            aid = alb.get("id")
-            if not aid or aid in seen_ids:
-                continue
-            seen_ids.add(aid)
-            candidates.append(alb)
-
-    scored = [
-        (_score_album_like(alb.get("name",""), title, ref_year, media_kind,
-                           alb=alb, must_tokens=must_tokens, hint_artists=hint_artists), alb)
-        for alb in candidates
-    ]
-    scored.sort(key=lambda t: t[0], reverse=True)
+    cands = _soundtrack_candidates(title, ref_year, media_kind, tuple(hint_artists or ()),
+                                   limit=limit, strict=strict, limiter=limiter)
 
+    # 1) ÁLBUNS
     out: List[Dict[str, Any]] = [{
         "title": alb.get("name"),
         "artist": _album_artists(alb),
@@ -408,45 +497,30 @@ def search_soundtrack_albums(title: str, year_txt: str = "", artist: str = "", l
         "url": (alb.get("external_urls") or {}).get("spotify") or "",
         "uri": alb.get("uri") or "",
         "_score": float(sc),
-    } for sc, alb in scored[:limit]]
+    } for sc, alb in cands["album"][:limit]]
 
     # 2) FALLBACK: PLAYLISTS (muitas OST de TV existem só como playlists oficiais)
     if not out:
-        plcands: List[dict] = []
-        pseen = set()
-        for q in _build_queries(title, ref_year, media_kind, hint_artists):
-            items = _search_sp(sp, q, "playlist", 20, SPOTIFY_MARKET)
-            if not items:
-                items = _search_sp(sp, q, "playlist", 20, None)
-            for pl in items:
-                pid = pl.get("id")
-                if not pid or pid in pseen:
-                    continue
-                pseen.add(pid)
-                plcands.append(pl)
-
-        pscored = [
-            (_score_album_like(pl.get("name",""), title, ref_year, media_kind,
-                               alb=None, must_tokens=must_tokens, hint_artists=hint_artists), pl)
-            for pl in plcands
-        ]
-        pscored.sort(key=lambda t: t[0], reverse=True)
-
-        out = out + [{
+        out = [{
             "title": pl.get("name"),
             "artist": (pl.get("owner",{}) or {}).get("display_name",""),
             "year": "",
             "url": (pl.get("external_urls") or {}).get("spotify") or "",
             "uri": pl.get("uri") or "",
             "_score": float(sc),
-        } for sc, pl in pscored[:limit]]
+        } for sc, pl in cands["playlist"][:limit]]
 
     return out
 
 def pick_best_soundtrack(title: str, year_txt: str = "", artist: Optional[str] = None,
-                         media_kind: str = "movie", hint_artists: Optional[List[str]] = None) -> Dict[str,Any]:
+                         media_kind: str = "movie", hint_artists: Optional[List[str]] = None,
+                         strict: bool = False,
+                         limiter: Optional[RateLimiter] = None) -> Dict[str,Any]:
+    """strict=True: falhas de pesquisa levantam exceção em vez de um pick parcial/vazio.
+    limiter: limite de pesquisas/s partilhado (cobra cada pedido ao Spotify)."""
     cands = search_soundtrack_albums(title=title, year_txt=year_txt, artist=artist or "",
-                                     limit=25, media_kind=media_kind, hint_artists=hint_artists)
+                                     limit=25, media_kind=media_kind, hint_artists=hint_artists,
+                                     strict=strict, limiter=limiter)
     if not cands:
         return {}
 
@@ -4,6 +4,7 @@ from __future__ import annotations
 import os
 import requests
 import streamlit as st
+from services.common.ratelimit import RateLimiter
 from ..filters import parse_year_filter
 # --- Trailers (YouTube/Vimeo) ----------------------------------------------
 from typing import Optional
@@ -17,10 +18,12 @@ TMDB_API_KEY = (
 
 
 @st.cache_data(ttl=86400, show_spinner=False)
-def tmdb_best_trailer_url(kind: str, tmdb_id: int, _v: int = 2) -> Optional[str]:
+def tmdb_best_trailer_url(kind: str, tmdb_id: int, _v: int = 2,
+                          _limiter: RateLimiter | None = None) -> Optional[str]:
     """
     kind: 'movie' | 'tv'  → devolve URL do melhor trailer (YouTube/Vimeo) ou None.
     _v: aumenta para invalidar a cache se mudares a lógica (3, 4, …).
+    _limiter: limite de pedidos/s (1 token por pedido; fora da chave de cache).
     """
     assert kind in ("movie", "tv")
     print(f"[TMDB] trailer: kind={kind} id={tmdb_id}")  # DEBUG
@@ -30,7 +33,7 @@ def tmdb_best_trailer_url(kind: str, tmdb_id: int, _v: int = 2) -> Optional[str]
     for lang in ("pt-PT", "pt", "en-US", "en", ""):
         try:
             params = {"language": lang} if lang else {}
-            data = _tmdb_get(path, params)
+            data = _tmdb_get(path, params, limiter=_limiter)
             results = data.get("results", []) or []
             vids = [v for v in results if v.get("site") in ("YouTube", "Vimeo")]
             print(f"[TMDB] lang={lang or 'default'} results={len(results)} vids={len(vids)}")  # DEBUG
@@ -64,21 +67,44 @@ def tmdb_best_trailer_url(kind: str, tmdb_id: int, _v: int = 2) -> Optional[str]
 # ---------- Auth & GET ----------
 
 
-@st.cache_data(ttl=86400, show_spinner=False)
-def tmdb_search_id(kind: str, title: str, year: int | None) -> int | None:
-    """Procura ID no TMDb por título (+ ano). kind: 'movie'|'tv'."""
+def tmdb_find_id(kind: str, title: str, year: int | None,
+                 limiter: RateLimiter | None = None) -> int | None:
+    """Como tmdb_search_id, mas sem cache e sem engolir erros: None = não encontrado;
+    falhas de rede/HTTP (timeout, 429, 5xx…) levantam exceção."""
     if not TMDB_API_KEY or not title:
         return None
     url = f"https://api.themoviedb.org/3/search/{'movie' if kind=='movie' else 'tv'}"
     params = {"api_key": TMDB_API_KEY, "query": title, "include_adult": "false"}
     if year:
         params["year" if kind == "movie" else "first_air_date_year"] = int(year)
+    if limiter is not None:
+        limiter.wait()
+    r = requests.get(url, params=params, timeout=8)
+    r.raise_for_status()
+    res = (r.json() or {}).get("results") or []
+    rid = res[0].get("id") if res else None
+    return int(rid) if rid else None
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """Timeout/ligação, 429 ou 5xx → vale a pena tentar de novo mais tarde
+    (requests e spotipy.SpotifyException, que traz http_status)."""
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return True
+    status = getattr(exc, "http_status", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500 or status < 0
+    if isinstance(exc, requests.HTTPError):
+        code = getattr(exc.response, "status_code", None)
+        return code is None or code == 429 or code >= 500
+    return False
+
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def tmdb_search_id(kind: str, title: str, year: int | None) -> int | None:
+    """Procura ID no TMDb por título (+ ano). kind: 'movie'|'tv'."""
     try:
-        r = requests.get(url, params=params, timeout=8)
-        r.raise_for_status()
-        res = (r.json() or {}).get("results") or []
-        rid = res[0].get("id") if res else None
-        return int(rid) if rid else None
+        return tmdb_find_id(kind, title, year)
     except Exception:
         return None
 
@@ -105,13 +131,13 @@ def tmdb_poster_url(kind: str, tmdb_id: int | None, title: str, year: int | None
     p = data.get("poster_path")
     return f"https://image.tmdb.org/t/p/w342{p}" if p else ""
 
-def tmdb_get_composers(kind: str, tmdb_id: int) -> list[str]:
+def tmdb_get_composers(kind: str, tmdb_id: int, limiter: RateLimiter | None = None) -> list[str]:
     """
     kind: 'movie' | 'tv'
     devolve até 3 compositores principais (por ex. 'Original Music Composer').
     """
     data = _tmdb_get(f"/{'tv' if kind=='tv' else 'movie'}/{int(tmdb_id)}/credits",
-                     {"language": "en-US"}) or {}
+                     {"language": "en-US"}, limiter=limiter) or {}
     names = []
     for it in data.get("crew", []):
         job = (it.get("job") or "").lower()
@@ -150,11 +176,13 @@ def _tmdb_auth():
     else:
         return ({}, {})
 
-def _tmdb_get(path: str, params: dict | None = None) -> dict:
+def _tmdb_get(path: str, params: dict | None = None, limiter: RateLimiter | None = None) -> dict:
     hdrs, base = _tmdb_auth()
     q = dict(base)
     if params:
         q.update(params)
+    if limiter is not None:
+        limiter.wait()
     r = requests.get(f"{TMDB_BASE}{path}", headers=hdrs, params=q, timeout=20)
     r.raise_for_status()
     return r.json()
@@ -173,17 +201,9 @@ def _get_country_code() -> str:
         cc = os.getenv("COUNTRY_CODE", "PT")
     return (cc or "PT").upper()
 
-@st.cache_data(ttl=86400, show_spinner=False)
-def _tmdb_watch_providers(kind: str, tmdb_id: int, country: str | None = None) -> str:
-    """Return 'MAX; Netflix; Prime Video' where available in flatrate."""
-    country = (country or _get_country_code()).upper()
-    try:
-        data = _tmdb_get(f"/{kind}/{tmdb_id}/watch/providers")
-    except Exception:
-        return ""
-    results = (data or {}).get("results", {})
-    c = results.get(country) or {}
-    flatrate = c.get("flatrate") or []
+def _providers_summary(block: dict) -> str:
+    """'MAX; Netflix; Prime Video' a partir do bloco de uma região (flatrate)."""
+    flatrate = (block or {}).get("flatrate") or []
     names = {(p.get("provider_name") or "").strip() for p in flatrate if p.get("provider_name")}
 
     out = []
@@ -195,6 +215,33 @@ def _tmdb_watch_providers(kind: str, tmdb_id: int, country: str | None = None) -
         out.append("Prime Video")
     return "; ".join(out)
 
+@st.cache_data(ttl=86400, show_spinner=False)
+def _tmdb_watch_providers(kind: str, tmdb_id: int, country: str | None = None) -> str:
+    """Return 'MAX; Netflix; Prime Video' where available in flatrate."""
+    country = (country or _get_country_code()).upper()
+    try:
+        data = _tmdb_get(f"/{kind}/{tmdb_id}/watch/providers")
+    except Exception:
+        return ""
+    results = (data or {}).get("results", {})
+    return _providers_summary(results.get(country) or {})
+
+def tmdb_watch_providers_all(kind: str, tmdb_id: int,
+                             limiter: RateLimiter | None = None) -> dict[str, str]:
+    """{região: 'MAX; Netflix; …'} para todas as regiões (um só pedido; sem cache)."""
+    data = _tmdb_get(f"/{kind}/{int(tmdb_id)}/watch/providers", limiter=limiter) or {}
+    out = {}
+    for region, block in (data.get("results") or {}).items():
+        txt = _providers_summary(block)
+        if txt:
+            out[region.upper()] = txt
+    return out
+
+def tmdb_details(kind: str, tmdb_id: int, limiter: RateLimiter | None = None) -> dict:
+    """Detalhes do título (poster_path, etc.); sem cache."""
+    return _tmdb_get(f"/{'movie' if kind == 'movie' else 'tv'}/{int(tmdb_id)}", {"language": "en-US"},
+                     limiter=limiter) or {}
+
 def _year_mode(year_txt: str | None):
     mode, val = parse_year_filter(year_txt or "")
     if mode == "exact":
@@ -0,0 +1,76 @@
+# cinema/scoring.py
+# -----------------------------------------------------------------------------
+# Scoring de títulos em lote (rapidfuzz.process.cdist / extract)
+# - normaliza os candidatos uma vez e calcula a matriz query × candidatos
+#   com `workers` (multi-core) em vez de chamar fuzz.* linha a linha
+# - title_scores/rank_titles: o mesmo score de helpers.title_match_score,
+#   vetorizado
+# -----------------------------------------------------------------------------
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Iterable, Sequence
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+WORKERS = -1  # todos os cores
+
+
+def norm(s) -> str:
+    """minúsculas, sem acentos, só letras/dígitos (o _norm da UI e do provider Spotify)."""
+    s = str(s or "").lower()
+    s = unicodedata.normalize("NFKD", s)
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    return re.sub(r"[\W_]+", " ", s).strip()
+
+
+def normalize_all(items: Iterable) -> list[str]:
+    return [norm(x) for x in items]
+
+
+def fuzzy_matrix(queries: Sequence[str], choices: Sequence[str], *,
+                 normalized: bool = True, workers: int = WORKERS) -> np.ndarray:
+    """max(WRatio, token_set_ratio) para todas as combinações (len(queries) × len(choices))."""
+    if not normalized:
+        queries, choices = normalize_all(queries), normalize_all(choices)
+    if not len(queries) or not len(choices):
+        return np.zeros((len(queries), len(choices)), dtype=np.float32)
+    w = process.cdist(queries, choices, scorer=fuzz.WRatio, dtype=np.float32, workers=workers)
+    t = process.cdist(queries, choices, scorer=fuzz.token_set_ratio, dtype=np.float32, workers=workers)
+    return np.maximum(w, t)
+
+
+def token_set_matrix(queries: Sequence[str], choices: Sequence[str], *,
+                     workers: int = WORKERS) -> np.ndarray:
+    if not len(queries) or not len(choices):
+        return np.zeros((len(queries), len(choices)), dtype=np.float32)
+    return process.cdist(queries, choices, scorer=fuzz.token_set_ratio,
+                         dtype=np.float32, workers=workers)
+
+
+def title_scores(titles: Sequence[str], query: str, *, normalized: bool = False) -> np.ndarray:
+    """Score de relevância de cada título face à query (ver helpers.title_match_score):
+    fuzzy + 25 (frase contida) + 10 (prefixo) + 15·cobertura − 20 (cobertura < 0.6)."""
+    q = norm(query)
+    ts = list(titles) if normalized else normalize_all(titles)
+    out = np.zeros(len(ts), dtype=np.float64)
+    if not q or not ts:
+        return out
+    base = fuzzy_matrix([q], ts)[0]
+    qtoks = set(q.split())
+    for i, t in enumerate(ts):
+        if not t:
+            continue
+        coverage = len(qtoks & set(t.split())) / max(1, len(qtoks))
+        out[i] = (base[i] + (25 if q in t else 0) + (10 if t.startswith(q) else 0)
+                  + coverage * 15 + (-20 if coverage < 0.6 else 0))
+    return out
+
+
+def rank_titles(titles: Sequence[str], query: str) -> np.ndarray:
+    """Índices por score decrescente (estável: empates mantêm a ordem original)."""
+    sc = title_scores(titles, query)
+    return np.argsort(-sc, kind="stable")
+
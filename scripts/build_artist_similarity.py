@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pré-constrói o índice de semelhança de artistas (artista×género, IDF, CSR).
+• Entrada: music/data/lista_artistas.csv (Artista,Genero,URL)
+• Saída:   music/data/artist_similarity.npz (lido por services/artist_similarity.py)
+• Uso:     python scripts/build_artist_similarity.py --topk 20
+"""
+
+from __future__ import annotations
+import argparse, os, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from services.artist_similarity import ARTISTS_CSV, INDEX_PATH, build_index, save_index
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Construir índice de artistas parecidos (lista_artistas.csv)")
+    ap.add_argument("--csv", default=str(ARTISTS_CSV), help="CSV Artista/Genero/URL")
+    ap.add_argument("--out", default=str(INDEX_PATH), help="Ficheiro .npz de saída")
+    ap.add_argument("--topk", type=int, default=0, help="Pré-calcular top-k vizinhos por artista (0 = não)")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    index = build_index(args.csv, topk=args.topk)
+    n_a, n_g = len(index["names"]), len(index["genres"])
+    print(f"• {n_a} artistas × {n_g} géneros, {len(index['indices'])} pares "
+          f"({time.perf_counter() - t0:.1f}s)")
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    save_index(index, args.out)
+    print(f"✅ Índice gravado em: {args.out}" + (f" (top-{args.topk})" if args.topk else ""))
+
+
+if __name__ == "__main__":
+    main()
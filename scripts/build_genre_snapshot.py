@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gera o snapshot do grafo de géneros com contagens de artistas por género.
+• Entradas: music/data/hierarquia_generos.csv + music/data/lista_artistas.csv
+• Saída:    music/data/genre_graph_snapshot.json (lido por services/genre_snapshot.py)
+• Uso:      python scripts/build_genre_snapshot.py
+"""
+
+from __future__ import annotations
+import argparse, os, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from services.genre_snapshot import ARTISTS_CSV, SNAPSHOT_PATH, build_snapshot, save_snapshot
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Construir snapshot do grafo de géneros + contagens de artistas")
+    ap.add_argument("--artists-csv", default=str(ARTISTS_CSV), help="CSV Artista/Genero/URL")
+    ap.add_argument("--out", default=str(SNAPSHOT_PATH), help="JSON de saída")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    snap = build_snapshot(artists_csv=args.artists_csv)
+    counts = snap["counts"]
+    matched = sum(1 for c in counts.values() if c["direct"])
+    print(f"• {len(counts)} géneros ({matched} com artistas diretos), "
+          f"{sum(len(v) for v in snap['adjacency'].values())} arestas "
+          f"({time.perf_counter() - t0:.1f}s)")
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    save_snapshot(snap, args.out)
+    print(f"✅ Snapshot gravado em: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,12 +8,16 @@ Gera um CSV hierárquico (L1;L2;...) drop-in para o Influence Map.
 """
 
 from __future__ import annotations
-import argparse, os, sys, re, json, time
+import argparse, csv, hashlib, os, sys, re, json, time
 from collections import defaultdict, deque
 from typing import Dict, List, Set, Tuple, Iterable
 import pandas as pd
 import requests
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from music_sources import (canon, KB_EDGES, DEFAULT_ROOTS,
+                           edges_from_row_levels, edges_from_row_path)
+
 # ======================
 # Config Wikidata
 # ======================
@@ -38,8 +42,23 @@ SELECT ?childLabel ?parentLabel WHERE {
 }
 """
 
-def _sparql(query: str, timeout_s: int = 60) -> List[Tuple[str, str]]:
-    """Executa SPARQL e devolve lista de arestas (parent, child) com labels canónicas."""
+def _sparql_raw(query: str, timeout_s: int = 60, cache_dir: str | None = None,
+                offline: bool = False, refresh: bool = False) -> dict:
+    """
+    Executa SPARQL e devolve o JSON bruto.
+    Com cache_dir, a resposta fica em <cache_dir>/sparql_<sha1>.json e é reutilizada
+    (sem rede) enquanto a query não mudar; offline=True nunca toca na rede.
+    """
+    cache_file = None
+    if cache_dir:
+        digest = hashlib.sha1(query.encode("utf-8")).hexdigest()[:16]
+        cache_file = os.path.join(cache_dir, f"sparql_{digest}.json")
+        if os.path.exists(cache_file) and (offline or not refresh):
+            with open(cache_file, "r", encoding="utf-8") as fh:
+                return json.load(fh)
+    if offline:
+        print("[Wikidata] offline e sem cache para esta query", file=sys.stderr)
+        return {}
     try:
         r = requests.get(
             WIKIDATA_ENDPOINT,
@@ -49,124 +68,40 @@ def _sparql(query: str, timeout_s: int = 60) -> List[Tuple[str, str]]:
         )
         r.raise_for_status()
         data = r.json()
-        out = []
-        for b in data.get("results", {}).get("bindings", []):
-            child = canon(b.get("childLabel", {}).get("value"))
-            parent = canon(b.get("parentLabel", {}).get("value"))
-            if child and parent and child != parent:
-                out.append((parent, child))  # parent -> child
-        return out
     except Exception as e:
         print(f"[Wikidata] ERRO: {e}", file=sys.stderr)
-        return []
+        return {}
+    if cache_file:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_file, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, ensure_ascii=False)
+    return data
+
+def sparql_edges(data: dict) -> List[Tuple[str, str]]:
+    """Arestas (parent, child) com labels canónicas a partir do JSON SPARQL."""
+    out = []
+    for b in (data or {}).get("results", {}).get("bindings", []):
+        child = canon(b.get("childLabel", {}).get("value"))
+        parent = canon(b.get("parentLabel", {}).get("value"))
+        if child and parent and child != parent:
+            out.append((parent, child))  # parent -> child
+    return out
+
+def _sparql(query: str, timeout_s: int = 60, **cache_kw) -> List[Tuple[str, str]]:
+    """Executa SPARQL e devolve lista de arestas (parent, child) com labels canónicas."""
+    return sparql_edges(_sparql_raw(query, timeout_s, **cache_kw))
 
-def fetch_wikidata_edges() -> Set[Tuple[str, str]]:
+def fetch_wikidata_edges(**cache_kw) -> Set[Tuple[str, str]]:
     """Arestas de 'influenced by' + 'subclass of' entre géneros."""
-    inf = _sparql(SPARQL_INFLUENCE)
-    time.sleep(0.5)  # cortesia ao endpoint
-    sub = _sparql(SPARQL_SUBclass)
+    inf = _sparql(SPARQL_INFLUENCE, **cache_kw)
+    if not cache_kw.get("offline"):
+        time.sleep(0.5)  # cortesia ao endpoint
+    sub = _sparql(SPARQL_SUBclass, **cache_kw)
     return set(inf) | set(sub)
 
-# ======================
-# Canon/aliases
-# ======================
-ALIASES = {
-    "r&b": "Rhythm and Blues",
-    "rock & roll": "Rock and Roll",
-    "rock n roll": "Rock and Roll",
-    "rock ’n’ roll": "Rock and Roll",
-    "prog rock": "Progressive Rock",
-    "rock progressivo": "Progressive Rock",
-    "synthpop": "Synth-pop",
-    "dance pop": "Dance-pop",
-    "doo wop": "Doo-wop",
-    "britpop": "Britpop",
-    "art pop": "Art Pop",
-    "power pop": "Power Pop",
-    "post punk": "Post-punk",
-    "hard rock": "Hard Rock",
-    "blues rock": "Blues Rock",
-    "new wave": "New Wave",
-    "country blues": "Country Blues",
-    "classico": "Classical",
-    "eletrónica": "Electronic",
-    "electronica": "Electronic",
-}
-
-def canon(x: str) -> str:
-    if x is None:
-        return ""
-    s = re.sub(r"\s+", " ", str(x)).strip()
-    s = s.replace("’", "'")
-    low = s.lower()
-    return ALIASES.get(low, s)
-
-# ======================
-# Curadoria (tapa buracos)
-# ======================
-KB_EDGES: Set[Tuple[str, str]] = {
-    # Linha Blues
-    ("Blues", "Rhythm and Blues"), ("Blues", "Jazz"), ("Blues", "Country Blues"),
-    ("Rhythm and Blues", "Rock and Roll"), ("Rhythm and Blues", "Soul"),
-    ("Soul", "Motown"), ("Soul", "Funk"), ("Funk", "Disco"),
-    ("Rock and Roll", "Rock"), ("Rock and Roll", "Pop"),
-
-    # Rock/Blues britânico, Prog, Metal
-    ("Blues", "British Blues"), ("British Blues", "Blues Rock"),
-    ("Blues Rock", "Hard Rock"), ("Hard Rock", "Heavy Metal"),
-    ("Psychedelic Rock", "Progressive Rock"),
-
-    # Pop ecossistema
-    ("Traditional Pop", "Pop"), ("Doo-wop", "Pop"), ("Motown", "Pop"),
-    ("Pop", "Pop Rock"), ("Pop", "Art Pop"), ("Pop", "Synth-pop"), ("Pop", "Dance-pop"),
-    ("Pop Rock", "Power Pop"), ("Pop Rock", "Britpop"),
-
-    # Punk/New Wave
-    ("Garage Rock", "Punk Rock"), ("Punk Rock", "Post-punk"), ("Punk Rock", "New Wave"),
-    ("New Wave", "Synth-pop"),
-
-    # Outras raízes
-    ("Classical", "Art Rock"), ("Classical", "Progressive Rock"),
-    ("Folk", "Folk Rock"), ("Folk Rock", "Singer-Songwriter"),
-    ("Gospel", "Rhythm and Blues"), ("Gospel", "Soul"),
-    ("Electronic", "Synth-pop"), ("Electronic", "Dance-pop"),
-    ("Country", "Rockabilly"), ("Rockabilly", "Rock and Roll"),
-}
-
-DEFAULT_ROOTS = ["Blues", "Classical", "Folk", "Gospel", "Electronic", "Country"]
-
 # ======================
 # CSV local (Wikipedia)
 # ======================
-def edges_from_row_levels(row: pd.Series) -> List[Tuple[str, str]]:
-    cols = [c for c in row.index if re.match(r"^(L|Nivel|Level)\d+$", str(c), flags=re.I)]
-    if not cols:
-        cols = [c for c in row.index if re.match(r"^\d+$", str(c))]
-    if not cols:
-        return []
-    cols_sorted = sorted(cols, key=lambda x: int(re.findall(r"\d+", str(x))[0]))
-    labels = [canon(row[c]) for c in cols_sorted if str(row[c]).strip()]
-    edges = []
-    for i in range(len(labels) - 1):
-        if labels[i] != labels[i + 1]:
-            edges.append((labels[i], labels[i + 1]))
-    return edges
-
-def edges_from_row_path(row: pd.Series) -> List[Tuple[str, str]]:
-    for col in row.index:
-        if str(col).lower() in {"path", "prefix", "hierarchy"}:
-            s = str(row[col])
-            if not s or s.strip().lower() in {"nan", "none"}:
-                return []
-            parts = re.split(r"\s*(?:>|→|\||/)\s*", s)
-            parts = [canon(p) for p in parts if p and p.strip()]
-            edges = []
-            for i in range(len(parts) - 1):
-                if parts[i] != parts[i + 1]:
-                    edges.append((parts[i], parts[i + 1]))
-            return edges
-    return []
-
 def edges_from_csv(input_path: str, sep: str | None = None) -> Set[Tuple[str, str]]:
     if not input_path or not os.path.exists(input_path):
         return set()
@@ -211,62 +146,176 @@ def find_roots(all_edges: Set[Tuple[str, str]], seeds: List[str]) -> Set[str]:
     seedset = {canon(r) for r in seeds}
     return (no_parent | seedset) or seedset
 
-def build_paths(all_edges: Set[Tuple[str, str]],
-                roots: Set[str],
-                max_depth: int = 6,
-                max_paths_per_leaf: int = 8) -> List[List[str]]:
-    children = defaultdict(list)
-    parents = defaultdict(list)
-    for p, c in all_edges:
-        if c not in children[p]:
+# ----------------------
+# Caminhos: DP top-k sobre DAG (ciclos neutralizados via SCC)
+# ----------------------
+def _scc_ids(nodes: List[str], children: Dict[str, List[str]]) -> Dict[str, int]:
+    """Tarjan iterativo; componentes numeradas em ordem topológica inversa."""
+    index: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    comp: Dict[str, int] = {}
+    on_stack: Set[str] = set()
+    stack: List[str] = []
+    counter = 0
+    n_comp = 0
+    for start in nodes:
+        if start in index:
+            continue
+        work = [(start, iter(children.get(start, [])))]
+        index[start] = low[start] = counter; counter += 1
+        stack.append(start); on_stack.add(start)
+        while work:
+            v, it = work[-1]
+            nxt = next(it, None)
+            if nxt is not None:
+                if nxt not in index:
+                    index[nxt] = low[nxt] = counter; counter += 1
+                    stack.append(nxt); on_stack.add(nxt)
+                    work.append((nxt, iter(children.get(nxt, []))))
+                elif nxt in on_stack:
+                    low[v] = min(low[v], index[nxt])
+                continue
+            work.pop()
+            if work:
+                u = work[-1][0]
+                low[u] = min(low[u], low[v])
+            if low[v] == index[v]:
+                while True:
+                    w = stack.pop(); on_stack.discard(w)
+                    comp[w] = n_comp
+                    if w == v:
+                        break
+                n_comp += 1
+    return comp
+
+
+def condense_to_dag(all_edges: Set[Tuple[str, str]]
+                    ) -> Tuple[List[str], Dict[str, List[str]], Dict[str, int]]:
+    """
+    Ordem topológica + filhos acíclicos.
+    Arestas entre componentes mantêm-se; dentro de cada SCC (ciclo) só ficam as
+    arestas que avançam na ordem BFS a partir do membro alfabeticamente primeiro.
+    """
+    children: Dict[str, List[str]] = defaultdict(list)
+    for p, c in sorted(all_edges, key=lambda e: (e[0].lower(), e[1].lower())):
+        if p != c:
             children[p].append(c)
-        if p not in parents[c]:
-            parents[c].append(p)
+    nodes = sorted({n for e in all_edges for n in e}, key=str.lower)
+    comp = _scc_ids(nodes, children)
+
+    members: Dict[int, List[str]] = defaultdict(list)
+    for n in nodes:
+        members[comp[n]].append(n)
 
-    paths: List[List[str]] = []
-    for root in sorted(roots, key=str.lower):
-        if root not in children and root not in parents:
+    rank: Dict[str, int] = {}
+    for cid, ms in members.items():
+        if len(ms) == 1:
+            rank[ms[0]] = 0
             continue
-        stack = [(root, [root])]
-        seen = set()
-        while stack:
-            node, path = stack.pop()
-            if len(path) >= max_depth or not children.get(node):
-                t = tuple(path)
-                if t not in seen:
-                    seen.add(t)
-                    paths.append(path)
-                continue
-            for nxt in sorted(children.get(node, []), key=str.lower):
-                if nxt in path:
+        inside = set(ms)
+        q = deque([ms[0]]); rank[ms[0]] = 0
+        while q:
+            u = q.popleft()
+            for v in children.get(u, []):
+                if v in inside and v not in rank:
+                    rank[v] = rank[u] + 1; q.append(v)
+
+    dag: Dict[str, List[str]] = {}
+    for u in nodes:
+        dag[u] = [v for v in children.get(u, [])
+                  if comp[v] != comp[u] or rank[v] > rank[u]]
+
+    # Tarjan numera componentes "sumidouro primeiro" → inverter
+    topo = sorted(nodes, key=lambda n: (-comp[n], rank[n], n.lower()))
+    n_cyclic = sum(1 for ms in members.values() if len(ms) > 1)
+    return topo, dag, {"components": len(members), "cyclic": n_cyclic}
+
+
+def build_paths(all_edges: Set[Tuple[str, str]],
+                roots: Set[str],
+                max_depth: int = 6,
+                max_paths_per_leaf: int = 8,
+                src_map: Dict[Tuple[str, str], Set[str]] | None = None,
+                report=print) -> Iterable[List[str]]:
+    """
+    Top-k caminhos raiz→folha por nó, por programação dinâmica na ordem topológica.
+    Ordem de preferência: mais curtos, depois maior consenso de fontes (nº de fontes
+    por aresta), depois ordem alfabética do pai. Cada entrada guarda só o ponteiro
+    para o prefixo (sem copiar listas), por isso a memória é O(nós × k).
+    Emite (gerador) os caminhos que terminam numa folha ou atingem max_depth.
+    """
+    t0 = time.perf_counter()
+    topo, dag, info = condense_to_dag(all_edges)
+    report(f"  · DAG: {len(topo)} nós, {info['components']} componentes "
+           f"({info['cyclic']} com ciclos) [{time.perf_counter() - t0:.2f}s]")
+
+    k = max(1, int(max_paths_per_leaf))
+    alpha = {n: i for i, n in enumerate(sorted(topo, key=str.lower))}
+    # entrada = (len, -peso, rank_pai, idx_no_pai, nó, entrada_pai)
+    best: Dict[str, List[tuple]] = defaultdict(list)
+    for r in roots:
+        if r in dag:
+            best[r].append((1, 0, -1, 0, r, None))
+
+    t1 = time.perf_counter()
+    step = max(1, len(topo) // 4)
+    for i, u in enumerate(topo, 1):
+        entries = best.get(u)
+        if entries:
+            entries.sort(key=lambda e: e[:4])
+            del entries[k:]
+            for j, e in enumerate(entries):
+                if e[0] >= max_depth:
                     continue
-                stack.append((nxt, path + [nxt]))
-    # limitar caminhos muito repetidos por folha
-    bucket: Dict[str, List[List[str]]] = defaultdict(list)
-    for p in paths:
-        bucket[p[-1]].append(p)
-    trimmed: List[List[str]] = []
-    for leaf, plist in bucket.items():
-        trimmed.extend(plist[:max_paths_per_leaf])
-    trimmed.sort(key=lambda seq: tuple(x.lower() for x in seq))
-    return trimmed
-
-def write_paths_csv(paths: List[List[str]], out_path: str, sep: str = ";") -> None:
-    maxlen = max((len(p) for p in paths), default=0)
-    cols = [f"L{i}" for i in range(1, maxlen + 1)]
-    rows = [{f"L{i+1}": p[i] for i in range(len(p))} for p in paths]
-    pd.DataFrame(rows, columns=cols).to_csv(out_path, sep=sep, index=False, encoding="utf-8")
+                for v in dag.get(u, []):
+                    w = len(src_map.get((u, v), ())) if src_map else 1
+                    best[v].append((e[0] + 1, e[1] - w, alpha[u], j, v, e))
+            # poda antecipada dos filhos (evita listas grandes em nós muito ligados)
+            for v in dag.get(u, []):
+                if len(best[v]) > 4 * k:
+                    best[v].sort(key=lambda e: e[:4]); del best[v][k:]
+        if i % step == 0:
+            report(f"  · DP {i}/{len(topo)} nós [{time.perf_counter() - t1:.2f}s]")
+
+    def _materialize(e) -> List[str]:
+        out = []
+        while e is not None:
+            out.append(e[4]); e = e[5]
+        out.reverse()
+        return out
+
+    for leaf in sorted(best, key=str.lower):
+        is_leaf = not dag.get(leaf)
+        for e in best[leaf]:
+            if is_leaf or e[0] >= max_depth:
+                yield _materialize(e)
+
+def write_paths_csv(paths: Iterable[List[str]], out_path: str, sep: str = ";",
+                    max_len: int = 0, report=print) -> int:
+    """Escrita em streaming (linha a linha); cabeçalho L1..L{max_len}."""
+    t0 = time.perf_counter()
+    cols = [f"L{i}" for i in range(1, max_len + 1)]
+    n = 0
+    with open(out_path, "w", encoding="utf-8", newline="") as fh:
+        w = csv.writer(fh, delimiter=sep)
+        w.writerow(cols)
+        for p in paths:
+            w.writerow(list(p[:max_len]) + [""] * (max_len - len(p)))
+            n += 1
+    report(f"  · {n} linhas escritas [{time.perf_counter() - t0:.2f}s]")
+    return n
 
 def write_edges_sidecar(all_edges: Set[Tuple[str, str]],
                         src_map: Dict[Tuple[str, str], Set[str]],
                         out_path: str, sep: str = ";") -> None:
-    rows = []
-    for (p, c) in sorted(all_edges, key=lambda x: (x[0].lower(), x[1].lower())):
-        srcs = sorted(src_map.get((p, c), set()))
-        weight = 2 if len(srcs) >= 2 else 1
-        conf = 0.95 if "wikidata" in srcs and ("kb" in srcs or "wikipedia" in srcs) else (0.85 if "wikidata" in srcs else 0.75)
-        rows.append({"Parent": p, "Child": c, "Source": ",".join(srcs), "Weight": weight, "Confidence": conf})
-    pd.DataFrame(rows).to_csv(out_path, sep=sep, index=False, encoding="utf-8")
+    with open(out_path, "w", encoding="utf-8", newline="") as fh:
+        w = csv.writer(fh, delimiter=sep)
+        w.writerow(["Parent", "Child", "Source", "Weight", "Confidence"])
+        for (p, c) in sorted(all_edges, key=lambda x: (x[0].lower(), x[1].lower())):
+            srcs = sorted(src_map.get((p, c), set()))
+            weight = 2 if len(srcs) >= 2 else 1
+            conf = 0.95 if "wikidata" in srcs and ("kb" in srcs or "wikipedia" in srcs) else (0.85 if "wikidata" in srcs else 0.75)
+            w.writerow([p, c, ",".join(srcs), weight, conf])
 
 # ======================
 # Execução (interativo + CLI)
@@ -297,13 +346,17 @@ def run_with_args(args):
     roots = find_roots(all_edges, getattr(args, "roots", DEFAULT_ROOTS))
     print(f"• Raízes detectadas/forçadas: {', '.join(sorted(roots))}")
 
+    max_depth = getattr(args, "max_depth", 6)
+    t0 = time.perf_counter()
+    print(f"• A gerar caminhos (profundidade ≤ {max_depth}, ≤ {getattr(args, 'max_paths_per_leaf', 8)} por folha)…")
     paths = build_paths(all_edges, roots,
-                        max_depth=getattr(args, "max_depth", 6),
-                        max_paths_per_leaf=getattr(args, "max_paths_per_leaf", 8))
-    print(f"• Caminhos gerados: {len(paths)}")
+                        max_depth=max_depth,
+                        max_paths_per_leaf=getattr(args, "max_paths_per_leaf", 8),
+                        src_map=src_map)
 
     os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
-    write_paths_csv(paths, args.out, sep=getattr(args, "sep_out", ";"))
+    n = write_paths_csv(paths, args.out, sep=getattr(args, "sep_out", ";"), max_len=max_depth)
+    print(f"• Caminhos gerados: {n} [{time.perf_counter() - t0:.2f}s]")
     print(f"✅ CSV hierárquico gravado em: {args.out}")
 
     sidecar = getattr(args, "sidecar", "")
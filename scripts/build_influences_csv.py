@@ -31,123 +31,17 @@ import pandas as pd
 
 
 # ======================
-# 1) BASE CURADA (arestas Pai->Filho)
+# 1) BASE CURADA (arestas Pai->Filho) — partilhada em music_sources.py
 #    Mantém Blues como raiz principal + outras raízes úteis
 # ======================
-ALIASES = {
-    # comuns
-    "r&b": "Rhythm and Blues", "rock & roll": "Rock and Roll", "rock n roll": "Rock and Roll",
-    "prog rock": "Progressive Rock", "rock progressivo": "Progressive Rock",
-    "synthpop": "Synth-pop", "dance pop": "Dance-pop", "doo wop": "Doo-wop",
-    "art pop": "Art Pop", "power pop": "Power Pop", "hard rock": "Hard Rock",
-    "blues rock": "Blues Rock", "new wave": "New Wave", "post punk": "Post-punk",
-    "garage": "Garage Rock", "country blues": "Country Blues", "eletronica": "Electronic",
-    "eletrónica": "Electronic", "classico": "Classical", "classical music": "Classical",
-}
-
-def canon(x: str) -> str:
-    if x is None: return ""
-    k = re.sub(r"\s+", " ", str(x).strip())
-    low = k.lower()
-    return ALIASES.get(low, k)
-
-# Arestas curadas (pais -> filhos)
-KB_EDGES = {
-    # Raiz Blues e 1ª geração
-    ("Blues", "Country Blues"),
-    ("Blues", "Rhythm and Blues"),
-    ("Blues", "Jazz"),
-    ("Blues", "British Blues"),
-    ("British Blues", "Blues Rock"),
-    ("Blues Rock", "Hard Rock"),
-    ("Rhythm and Blues", "Rock and Roll"),
-    ("Rhythm and Blues", "Soul"),
-    ("Soul", "Motown"),
-    ("Soul", "Funk"),
-    ("Funk", "Disco"),
-
-    # Rock & vizinhanças
-    ("Rock and Roll", "Rock"),
-    ("Rock and Roll", "Pop"),
-    ("Rock", "Psychedelic Rock"),
-    ("Rock", "Art Rock"),
-    ("Rock", "Progressive Rock"),
-    ("Rock", "Blues Rock"),
-    ("Rock", "Hard Rock"),
-    ("Rock", "Punk Rock"),
-    ("Rock", "Pop Rock"),
-    ("Garage Rock", "Punk Rock"),
-    ("Punk Rock", "Post-punk"),
-    ("Punk Rock", "New Wave"),
-    ("New Wave", "Synth-pop"),
-    ("Pop Rock", "Power Pop"),
-    ("Pop Rock", "Britpop"),
-    ("Psychedelic Rock", "Progressive Rock"),
-    ("Progressive Rock", "Neo-progressive Rock"),
-    ("Progressive Rock", "Progressive Metal"),
-
-    # Pop ecossistema
-    ("Traditional Pop", "Pop"),
-    ("Doo-wop", "Pop"),
-    ("Motown", "Pop"),
-    ("Pop", "Pop Rock"),
-    ("Pop", "Art Pop"),
-    ("Pop", "Synth-pop"),
-    ("Pop", "Dance-pop"),
-    ("Disco", "Dance-pop"),
-
-    # Outras raízes úteis
-    ("Classical", "Art Rock"),
-    ("Classical", "Progressive Rock"),
-    ("Folk", "Folk Rock"),
-    ("Folk Rock", "Singer-Songwriter"),
-    ("Gospel", "Rhythm and Blues"),
-    ("Gospel", "Soul"),
-    ("Electronic", "Synth-pop"),
-    ("Electronic", "Dance-pop"),
-    ("Country", "Rockabilly"),
-    ("Rockabilly", "Rock and Roll"),
-}
-
-# Conjunto de raízes canónicas (podes ajustar por CLI)
-DEFAULT_ROOTS = ["Blues", "Classical", "Folk", "Gospel", "Electronic", "Country"]
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from music_sources import (canon, KB_EDGES, DEFAULT_ROOTS,
+                           edges_from_row_levels, edges_from_row_path)
 
 
 # ======================
 # 2) EXTRAÇÃO do CSV DINÂMICO (Wikipedia)
 # ======================
-def edges_from_row_levels(row: pd.Series) -> List[Tuple[str, str]]:
-    """Extrai arestas de colunas multinível (L1..Ln / Nivel1..N)."""
-    cols = [c for c in row.index if re.match(r"^(L|Nivel|Level)\d+$", str(c), flags=re.I)]
-    if not cols:  # tentar ordinal simples
-        cols = [c for c in row.index if re.match(r"^\d+$", str(c))]
-    if not cols:
-        return []
-    cols_sorted = sorted(cols, key=lambda x: int(re.findall(r"\d+", str(x))[0]))
-    labels = [canon(row[c]) for c in cols_sorted if str(row[c]).strip()]
-    edges = []
-    for i in range(len(labels) - 1):
-        if labels[i] != labels[i+1]:
-            edges.append((labels[i], labels[i+1]))
-    return edges
-
-def edges_from_row_path(row: pd.Series) -> List[Tuple[str, str]]:
-    """Extrai arestas de uma coluna 'Path'/'Prefix' tipo 'A > B > C'."""
-    for col in row.index:
-        if str(col).lower() in {"path", "prefix", "hierarchy"}:
-            s = str(row[col])
-            if not s or s.strip().lower() in {"nan", "none"}:
-                return []
-            # aceita divisores comuns
-            parts = re.split(r"\s*[>\|/→]\s*|\s*>\s*", s)
-            parts = [canon(p) for p in parts if p and p.strip()]
-            edges = []
-            for i in range(len(parts) - 1):
-                if parts[i] != parts[i+1]:
-                    edges.append((parts[i], parts[i+1]))
-            return edges
-    return []
-
 def infer_edges_from_df(df: pd.DataFrame) -> Set[Tuple[str, str]]:
     edges: Set[Tuple[str, str]] = set()
 
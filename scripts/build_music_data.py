@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pipeline único e incremental para todos os dados derivados de música.
+
+Etapas (cada uma com chave = hash do conteúdo das entradas + parâmetros + versão):
+  fetch      → respostas SPARQL da Wikidata (cache em music/data/build/cache/)
+  normalize  → arestas canónicas por fonte (wikidata / wikipedia=hierarquia / kb)
+  fuse       → arestas deduplicadas + proveniência
+  graph      → grafo compilado (nós, arestas com bits de fonte, peso, confiança, raízes)
+  paths      → music/data/influences_origins.csv (L1..Ln)
+  sidecar    → music/data/influences_edges.csv
+  snapshot   → music/data/genre_graph_snapshot.json (contagens de artistas)
+  similarity → music/data/artist_similarity.npz
+  search     → índice de pesquisa de caminhos da hierarquia
+  compile    → music/data/music_compiled.json (artefacto versionado lido pela app)
+
+Só re-executa as etapas cujas entradas mudaram (manifest em music/data/build/).
+Corre 100% offline a partir da cache (--offline); --refresh força nova consulta SPARQL.
+Sem cache SPARQL e sem rede, as arestas 'wikidata' do sidecar atual servem de arranque.
+
+Uso:
+  python scripts/build_music_data.py                  # incremental
+  python scripts/build_music_data.py --offline        # só cache, sem rede
+  python scripts/build_music_data.py --force paths    # refaz 'paths'
+"""
+
+from __future__ import annotations
+import argparse, hashlib, json, os, sys, time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from services.common.paths import MUSIC_DATA
+from services.genre_csv import CSV_PATHS, load_hierarchy_csv, build_indices, norm
+from music_sources import canon, KB_EDGES, DEFAULT_ROOTS
+import build_influence_paths as BIP
+
+BUILD_DIR = MUSIC_DATA / "build"
+CACHE_DIR = BUILD_DIR / "cache"
+MANIFEST_PATH = BUILD_DIR / "manifest.json"
+
+HIERARCHY_CSV = Path(CSV_PATHS[0])
+ARTISTS_CSV = MUSIC_DATA / "lista_artistas.csv"
+PATHS_CSV = MUSIC_DATA / "influences_origins.csv"
+SIDECAR_CSV = MUSIC_DATA / "influences_edges.csv"
+SNAPSHOT_JSON = MUSIC_DATA / "genre_graph_snapshot.json"
+SIMILARITY_NPZ = MUSIC_DATA / "artist_similarity.npz"
+COMPILED_JSON = MUSIC_DATA / "music_compiled.json"
+
+COMPILED_FORMAT = 1
+SOURCES = ["wikidata", "wikipedia", "kb"]   # bit i ↔ SOURCES[i]
+
+# versão por etapa: incrementar quando a lógica muda (invalida a cache dessa etapa)
+STAGE_VERSIONS = {
+    "fetch": 1, "normalize": 1, "fuse": 1, "graph": 1, "paths": 1,
+    "sidecar": 1, "snapshot": 1, "similarity": 1, "search": 1, "compile": 1,
+}
+
+
+# ======================
+# Hash / manifest
+# ======================
+def _sha(obj) -> str:
+    if isinstance(obj, (bytes, bytearray)):
+        data = bytes(obj)
+    else:
+        data = json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path) -> str:
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                h.update(chunk)
+    except FileNotFoundError:
+        return "missing"
+    return h.hexdigest()
+
+
+class Pipeline:
+    """Executor de etapas com chave de conteúdo; resultados intermédios em BUILD_DIR/<etapa>.json."""
+
+    def __init__(self, force: List[str] | None = None, report: Callable = print):
+        BUILD_DIR.mkdir(parents=True, exist_ok=True)
+        self.force = set(force or [])
+        self.report = report
+        try:
+            self.manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+        except Exception:
+            self.manifest = {}
+        self.out_hash: Dict[str, str] = {}
+        self.ran: List[str] = []
+
+    def stage(self, name: str, deps: dict, fn: Callable[[], object], outputs: List[Path] = ()):
+        key = _sha({"v": STAGE_VERSIONS[name], "deps": deps})
+        rec = self.manifest.get(name, {})
+        cache_file = BUILD_DIR / f"{name}.json"
+        fresh = (name not in self.force and "all" not in self.force
+                 and rec.get("key") == key and cache_file.exists()
+                 and all(Path(o).exists() for o in outputs))
+        t0 = time.perf_counter()
+        if fresh:
+            result = json.loads(cache_file.read_text(encoding="utf-8"))
+            self.report(f"  = {name:<10} (sem alterações)")
+        else:
+            result = fn()
+            cache_file.write_text(json.dumps(result, ensure_ascii=False), encoding="utf-8")
+            self.ran.append(name)
+            self.manifest[name] = {"key": key, "out": _sha(result),
+                                   "outputs": [str(Path(o).name) for o in outputs],
+                                   "at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+            MANIFEST_PATH.write_text(json.dumps(self.manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+            self.report(f"  ✓ {name:<10} [{time.perf_counter() - t0:.2f}s]")
+        self.out_hash[name] = self.manifest[name]["out"]
+        return result
+
+
+# ======================
+# Etapas
+# ======================
+def _sidecar_wikidata_edges() -> List[List[str]]:
+    """Arestas 'wikidata' do sidecar atual (arranque offline quando ainda não há cache SPARQL)."""
+    import csv
+    out = []
+    if SIDECAR_CSV.exists():
+        with open(SIDECAR_CSV, "r", encoding="utf-8-sig", newline="") as fh:
+            for r in csv.DictReader(fh, delimiter=";"):
+                if "wikidata" in (r.get("Source") or "") and r.get("Parent") and r.get("Child"):
+                    out.append([r["Parent"], r["Child"]])
+    return out
+
+
+def stage_fetch(offline: bool, refresh: bool) -> dict:
+    kw = dict(cache_dir=str(CACHE_DIR), offline=offline, refresh=refresh)
+    fetched = {
+        "influence": BIP._sparql_raw(BIP.SPARQL_INFLUENCE, **kw),
+        "subclass": BIP._sparql_raw(BIP.SPARQL_SUBclass, **kw),
+    }
+    if not fetched["influence"] and not fetched["subclass"]:
+        fetched["sidecar_wikidata"] = _sidecar_wikidata_edges()
+    return fetched
+
+
+def stage_normalize(fetched: dict) -> dict:
+    wd = set(BIP.sparql_edges(fetched.get("influence"))) | set(BIP.sparql_edges(fetched.get("subclass")))
+    wd |= {(canon(p), canon(c)) for p, c in fetched.get("sidecar_wikidata", []) if canon(p) != canon(c)}
+
+    wp = set()
+    if HIERARCHY_CSV.exists():
+        df, _ = load_hierarchy_csv()
+        children, _, _, _ = build_indices(df)
+        for pref, kids in children.items():
+            if not pref:
+                continue
+            p = canon(pref[-1])
+            for k in kids:
+                c = canon(k)
+                if p and c and p != c:
+                    wp.add((p, c))
+
+    kb = {(canon(a), canon(b)) for (a, b) in KB_EDGES}
+    key = lambda e: (e[0].lower(), e[1].lower())
+    return {"wikidata": sorted(wd, key=key), "wikipedia": sorted(wp, key=key), "kb": sorted(kb, key=key)}
+
+
+def stage_fuse(normalized: dict) -> dict:
+    all_edges, src = BIP.fuse_edges(*[(name, {tuple(e) for e in normalized.get(name, [])})
+                                      for name in SOURCES])
+    return {"edges": [[p, c, sorted(src[(p, c)])]
+                      for p, c in sorted(all_edges, key=lambda e: (e[0].lower(), e[1].lower()))]}
+
+
+def stage_graph(fused: dict, roots: List[str]) -> dict:
+    edges = fused["edges"]
+    nodes = sorted({n for p, c, _ in edges for n in (p, c)}, key=str.lower)
+    pos = {n: i for i, n in enumerate(nodes)}
+    out = []
+    for p, c, srcs in edges:
+        bits = sum(1 << SOURCES.index(s) for s in srcs if s in SOURCES)
+        weight = 2 if len(srcs) >= 2 else 1
+        conf = 0.95 if "wikidata" in srcs and ("kb" in srcs or "wikipedia" in srcs) else (0.85 if "wikidata" in srcs else 0.75)
+        out.append([pos[p], pos[c], bits, weight, conf])
+    root_set = BIP.find_roots({(p, c) for p, c, _ in edges}, roots)
+    return {"sources": SOURCES, "nodes": nodes, "edges": out,
+            "roots": sorted(root_set & set(pos), key=str.lower)}
+
+
+def _edge_sets(fused: dict):
+    all_edges = {(p, c) for p, c, _ in fused["edges"]}
+    src_map = {(p, c): set(s) for p, c, s in fused["edges"]}
+    return all_edges, src_map
+
+
+def stage_paths(fused: dict, graph: dict, max_depth: int, max_ppl: int, report) -> dict:
+    all_edges, src_map = _edge_sets(fused)
+    paths = BIP.build_paths(all_edges, set(graph["roots"]), max_depth=max_depth,
+                            max_paths_per_leaf=max_ppl, src_map=src_map, report=report)
+    n = BIP.write_paths_csv(paths, str(PATHS_CSV), max_len=max_depth, report=report)
+    return {"rows": n, "file": file_hash(PATHS_CSV)}
+
+
+def stage_sidecar(fused: dict) -> dict:
+    all_edges, src_map = _edge_sets(fused)
+    BIP.write_edges_sidecar(all_edges, src_map, str(SIDECAR_CSV))
+    return {"rows": len(all_edges), "file": file_hash(SIDECAR_CSV)}
+
+
+def stage_snapshot() -> dict:
+    from services.genre_snapshot import build_snapshot, save_snapshot
+    snap = build_snapshot(artists_csv=ARTISTS_CSV)
+    save_snapshot(snap, SNAPSHOT_JSON)
+    return {"adjacency": snap["adjacency"], "counts": snap["counts"]}
+
+
+def stage_similarity(topk: int) -> dict:
+    from services.artist_similarity import build_index, save_index
+    index = build_index(ARTISTS_CSV, topk=topk)
+    save_index(index, SIMILARITY_NPZ)
+    return {"artists": int(len(index["names"])), "genres": int(len(index["genres"])),
+            "file": file_hash(SIMILARITY_NPZ)}
+
+
+def stage_search() -> dict:
+    """Todos os prefixos da hierarquia (H1..Hn), com chave normalizada para substring."""
+    df, _ = load_hierarchy_csv()
+    level_cols = sorted([c for c in df.columns if c.startswith("H") and c[1:].isdigit()],
+                        key=lambda c: int(c[1:]))
+    paths, url_by_path = set(), {}
+    for row in df[level_cols + ["URL"]].itertuples(index=False):
+        cur = []
+        for val in row[:-1]:
+            val = norm(val)
+            if not val:
+                break
+            cur.append(val)
+            paths.add(tuple(cur))
+        if cur and norm(row[-1]):
+            url_by_path[" / ".join(cur)] = norm(row[-1])
+    ordered = sorted(paths)
+    return {
+        "paths": [list(p) for p in ordered],
+        "keys": [" / ".join(p).casefold() for p in ordered],
+        "urls": url_by_path,
+    }
+
+
+def stage_compile(build_id: str, graph: dict, snapshot: dict, search: dict) -> dict:
+    compiled = {
+        "format": COMPILED_FORMAT,
+        "build": build_id,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "graph": graph,
+        "snapshot": snapshot,
+        "search": search,
+    }
+    tmp = COMPILED_JSON.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(compiled, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, COMPILED_JSON)
+    return {"build": build_id, "file": file_hash(COMPILED_JSON)}
+
+
+# ======================
+# Execução
+# ======================
+def run(args) -> Pipeline:
+    pl = Pipeline(force=args.force, report=print)
+    t0 = time.perf_counter()
+    print(f"• Pipeline de dados de música ({'offline' if args.offline else 'online c/ cache'})")
+
+    h_hier, h_art = file_hash(HIERARCHY_CSV), file_hash(ARTISTS_CSV)
+    queries = {"influence": BIP.SPARQL_INFLUENCE, "subclass": BIP.SPARQL_SUBclass}
+    cached = {name: file_hash(CACHE_DIR / f"sparql_{hashlib.sha1(q.encode('utf-8')).hexdigest()[:16]}.json")
+              for name, q in queries.items()}
+
+    # fetch: sem rede se a cache existir (ou --offline); --refresh força novo pedido
+    if args.refresh:
+        pl.force.add("fetch")
+    fetched = pl.stage("fetch", {"queries": _sha(queries), "cache": cached},
+                       lambda: stage_fetch(args.offline, args.refresh))
+    normalized = pl.stage("normalize", {"fetch": pl.out_hash["fetch"], "hierarchy": h_hier,
+                                        "kb": _sha(sorted(KB_EDGES))},
+                          lambda: stage_normalize(fetched))
+    fused = pl.stage("fuse", {"normalize": pl.out_hash["normalize"]}, lambda: stage_fuse(normalized))
+    graph = pl.stage("graph", {"fuse": pl.out_hash["fuse"], "roots": args.roots},
+                     lambda: stage_graph(fused, args.roots))
+    pl.stage("paths", {"fuse": pl.out_hash["fuse"], "graph": pl.out_hash["graph"],
+                       "max_depth": args.max_depth, "max_ppl": args.max_paths_per_leaf},
+             lambda: stage_paths(fused, graph, args.max_depth, args.max_paths_per_leaf,
+                                 report=lambda *a: None),
+             outputs=[PATHS_CSV])
+    pl.stage("sidecar", {"fuse": pl.out_hash["fuse"]}, lambda: stage_sidecar(fused), outputs=[SIDECAR_CSV])
+    snapshot = pl.stage("snapshot", {"hierarchy": h_hier, "artists": h_art},
+                        stage_snapshot, outputs=[SNAPSHOT_JSON])
+    pl.stage("similarity", {"artists": h_art, "topk": args.topk},
+             lambda: stage_similarity(args.topk), outputs=[SIMILARITY_NPZ])
+    search = pl.stage("search", {"hierarchy": h_hier}, stage_search)
+
+    build_id = _sha({s: pl.out_hash[s] for s in ("graph", "paths", "sidecar", "snapshot", "similarity", "search")})[:16]
+    pl.stage("compile", {"build": build_id, "format": COMPILED_FORMAT},
+             lambda: stage_compile(build_id, graph, snapshot, search), outputs=[COMPILED_JSON])
+
+    ran = ", ".join(pl.ran) if pl.ran else "nenhuma"
+    print(f"✅ build {build_id} em {time.perf_counter() - t0:.2f}s (etapas executadas: {ran})")
+    return pl
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Pipeline incremental dos dados derivados de música")
+    ap.add_argument("--offline", action="store_true", help="Não usar rede (só respostas SPARQL em cache)")
+    ap.add_argument("--refresh", action="store_true", help="Voltar a consultar a Wikidata (atualiza a cache)")
+    ap.add_argument("--force", nargs="*", default=[], help="Etapas a refazer ('all' = todas)")
+    ap.add_argument("--roots", nargs="*", default=DEFAULT_ROOTS, help="Raízes a considerar")
+    ap.add_argument("--max-depth", type=int, default=8, help="Profundidade máxima dos caminhos (default: 8)")
+    ap.add_argument("--max-paths-per-leaf", type=int, default=20, help="Limite por folha (default: 20)")
+    ap.add_argument("--topk", type=int, default=20, help="Top-k pré-calculado de artistas parecidos (0 = não)")
+    args = ap.parse_args()
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
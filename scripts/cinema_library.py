@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Import/export entre a biblioteca SQLite de cinema e os CSVs (';').
+• Uso:
+    python scripts/cinema_library.py export                 # todas as secções → FILES
+    python scripts/cinema_library.py export Movies --csv out.csv
+    python scripts/cinema_library.py import Series --csv series.csv [--replace]
+"""
+
+from __future__ import annotations
+import argparse, sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from cinema.library import TABLES, export_csv, import_csv
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Import/export CSV da biblioteca de cinema (SQLite)")
+    ap.add_argument("action", choices=["import", "export"])
+    ap.add_argument("section", nargs="?", choices=list(TABLES), help="Movies/Series/Soundtracks (omissão: todas)")
+    ap.add_argument("--csv", help="CSV de entrada/saída (omissão: caminho de cinema/config.py)")
+    ap.add_argument("--replace", action="store_true", help="import: substituir a tabela em vez de upsert por id")
+    args = ap.parse_args()
+
+    sections = [args.section] if args.section else list(TABLES)
+    if args.csv and len(sections) > 1:
+        ap.error("--csv requer uma secção")
+    for sec in sections:
+        if args.action == "export":
+            out = export_csv(sec, args.csv)
+            print(f"✅ {sec} → {out}")
+        else:
+            n = import_csv(sec, args.csv, replace=args.replace)
+            print(f"✅ {sec}: {n} linha(s) importada(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Enriquece a biblioteca local de cinema (TMDb id, poster, providers por região,
+trailer, URI da banda sonora) e grava na BD SQLite (tabela enrichment).
+• Só refaz linhas sem metadados ou com mais de --max-age-days.
+• Requer TMDB_API_KEY (e SPOTIFY_CLIENT_ID/SECRET para as OST) no ambiente ou secrets.
+• Uso: python scripts/enrich_cinema_library.py [Movies|Series] [--max-age-days 30] [--force] [--no-ost]
+"""
+
+from __future__ import annotations
+import argparse, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from cinema import library
+from cinema.enrich import DEFAULT_MAX_AGE_DAYS, DEFAULT_WORKERS, refresh_metadata
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Enriquecer a biblioteca de cinema (TMDb/Spotify)")
+    ap.add_argument("section", nargs="?", choices=["Movies", "Series"], help="omissão: ambas")
+    ap.add_argument("--max-age-days", type=int, default=DEFAULT_MAX_AGE_DAYS)
+    ap.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    ap.add_argument("--force", action="store_true", help="refazer todas as linhas")
+    ap.add_argument("--no-ost", action="store_true", help="não procurar bandas sonoras no Spotify")
+    args = ap.parse_args()
+
+    for sec in ([args.section] if args.section else ["Movies", "Series"]):
+        ids = library.read_table(sec)["id"].tolist() if args.force else None
+        t0 = time.perf_counter()
+
+        def _progress(i, n):
+            print(f"\r  · {sec}: {i}/{n}", end="", flush=True)
+
+        errors: list = []
+        n = refresh_metadata(sec, max_age_days=args.max_age_days, ids=ids,
+                             workers=args.workers, with_ost=not args.no_ost, progress=_progress,
+                             errors=errors)
+        print(f"\n✅ {sec}: {n} linha(s) atualizada(s) [{time.perf_counter() - t0:.1f}s]")
+        if errors:
+            print(f"⚠️  {sec}: {len(errors)} linha(s) falharam (rede/limite de pedidos); "
+                  "volte a correr para as repetir")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Definições partilhadas pelos scripts de dados de música
+(build_influences_csv.py, build_influence_paths.py, build_music_data.py):
+aliases/canon, arestas curadas (KB_EDGES), raízes por omissão e extração de
+arestas de CSVs multinível/path.
+"""
+
+from __future__ import annotations
+import os
+import re
+import sys
+from typing import List, Set, Tuple
+import pandas as pd
+
+# ======================
+# Canon/aliases (tabela única partilhada com a app: services/genre_names.py)
+# ======================
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.genre_names import canonical_name  # noqa: E402
+
+
+def canon(x: str) -> str:
+    if x is None:
+        return ""
+    return canonical_name(str(x).replace("’", "'"))
+
+# ======================
+# Curadoria (tapa buracos) — arestas Pai -> Filho
+# ======================
+KB_EDGES: Set[Tuple[str, str]] = {
+    # Linha Blues
+    ("Blues", "Rhythm and Blues"), ("Blues", "Jazz"), ("Blues", "Country Blues"),
+    ("Rhythm and Blues", "Rock and Roll"), ("Rhythm and Blues", "Soul"),
+    ("Soul", "Motown"), ("Soul", "Funk"), ("Funk", "Disco"),
+    ("Rock and Roll", "Rock"), ("Rock and Roll", "Pop"),
+
+    # Rock/Blues britânico, Prog, Metal
+    ("Blues", "British Blues"), ("British Blues", "Blues Rock"),
+    ("Blues Rock", "Hard Rock"), ("Hard Rock", "Heavy Metal"),
+    ("Psychedelic Rock", "Progressive Rock"),
+    ("Progressive Rock", "Neo-progressive Rock"), ("Progressive Rock", "Progressive Metal"),
+
+    # Rock & vizinhanças
+    ("Rock", "Psychedelic Rock"), ("Rock", "Art Rock"), ("Rock", "Progressive Rock"),
+    ("Rock", "Blues Rock"), ("Rock", "Hard Rock"), ("Rock", "Punk Rock"), ("Rock", "Pop Rock"),
+
+    # Pop ecossistema
+    ("Traditional Pop", "Pop"), ("Doo-wop", "Pop"), ("Motown", "Pop"),
+    ("Pop", "Pop Rock"), ("Pop", "Art Pop"), ("Pop", "Synth-pop"), ("Pop", "Dance-pop"),
+    ("Pop Rock", "Power Pop"), ("Pop Rock", "Britpop"), ("Disco", "Dance-pop"),
+
+    # Punk/New Wave
+    ("Garage Rock", "Punk Rock"), ("Punk Rock", "Post-punk"), ("Punk Rock", "New Wave"),
+    ("New Wave", "Synth-pop"),
+
+    # Outras raízes
+    ("Classical", "Art Rock"), ("Classical", "Progressive Rock"),
+    ("Folk", "Folk Rock"), ("Folk Rock", "Singer-Songwriter"),
+    ("Gospel", "Rhythm and Blues"), ("Gospel", "Soul"),
+    ("Electronic", "Synth-pop"), ("Electronic", "Dance-pop"),
+    ("Country", "Rockabilly"), ("Rockabilly", "Rock and Roll"),
+}
+
+DEFAULT_ROOTS = ["Blues", "Classical", "Folk", "Gospel", "Electronic", "Country"]
+
+# ======================
+# Extração de arestas de CSVs (Wikipedia)
+# ======================
+def edges_from_row_levels(row: pd.Series) -> List[Tuple[str, str]]:
+    """Extrai arestas de colunas multinível (L1..Ln / Nivel1..N / H1..Hn)."""
+    cols = [c for c in row.index if re.match(r"^(L|H|Nivel|Level)\d+$", str(c), flags=re.I)]
+    if not cols:  # tentar ordinal simples
+        cols = [c for c in row.index if re.match(r"^\d+$", str(c))]
+    if not cols:
+        return []
+    cols_sorted = sorted(cols, key=lambda x: int(re.findall(r"\d+", str(x))[0]))
+    labels = [canon(row[c]) for c in cols_sorted
+              if str(row[c]).strip() and str(row[c]).strip().lower() != "nan"]
+    edges = []
+    for i in range(len(labels) - 1):
+        if labels[i] != labels[i + 1]:
+            edges.append((labels[i], labels[i + 1]))
+    return edges
+
+def edges_from_row_path(row: pd.Series) -> List[Tuple[str, str]]:
+    """Extrai arestas de uma coluna 'Path'/'Prefix' tipo 'A > B > C'."""
+    for col in row.index:
+        if str(col).lower() in {"path", "prefix", "hierarchy"}:
+            s = str(row[col])
+            if not s or s.strip().lower() in {"nan", "none"}:
+                return []
+            parts = re.split(r"\s*(?:>|→|\||/)\s*", s)
+            parts = [canon(p) for p in parts if p and p.strip()]
+            edges = []
+            for i in range(len(parts) - 1):
+                if parts[i] != parts[i + 1]:
+                    edges.append((parts[i], parts[i + 1]))
+            return edges
+    return []
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sincroniza o catálogo local de estações do Radio Browser (radio/data/stations.db).
+• Incremental por omissão (lastchangetime); --full refaz tudo e remove estações apagadas.
+• Mirrors: RADIO_BROWSER_MIRRORS="http://127.0.0.1:8080,..." para usar outro servidor.
+• Uso: python scripts/sync_radio_catalog.py [--full] [--page-size 5000]
+"""
+
+from __future__ import annotations
+import argparse, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from services.radio import catalog
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Sincronizar o catálogo local do Radio Browser")
+    ap.add_argument("--full", action="store_true", help="sync completo (remove estações desaparecidas)")
+    ap.add_argument("--page-size", type=int, default=catalog.PAGE_SIZE)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    n = catalog.sync(full=args.full, page_size=args.page_size,
+                     progress=lambda k: print(f"\r  · {k} estações", end="", flush=True))
+    st = catalog.status()
+    print(f"\n✅ {n} estação(ões) gravada(s); catálogo com {st.get('stations', 0)} "
+          f"[{time.perf_counter() - t0:.1f}s]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+# services/artist_similarity.py
+# -----------------------------------------------------------------------------
+# Music4all · "Artistas parecidos" a partir de lista_artistas.csv
+# - Matriz esparsa artista×género (CSR em arrays NumPy), pesos IDF,
+#   linhas normalizadas (L2) → produto interno = semelhança do cosseno.
+# - Índice transposto (género→artistas) para o produto esparso de uma query.
+# - Tabela top-k opcional, pré-calculada offline (scripts/build_artist_similarity.py).
+# -----------------------------------------------------------------------------
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from services.common.paths import MUSIC_DATA
+
+ARTISTS_CSV = MUSIC_DATA / "lista_artistas.csv"
+INDEX_PATH = MUSIC_DATA / "artist_similarity.npz"
+FORMAT_VERSION = 1
+
+
+def _key(s) -> str:
+    return " ".join(str(s or "").replace("\xa0", " ").split()).casefold()
+
+
+def csv_sep(csv_path: str | os.PathLike) -> str:
+    """Separador de lista_artistas.csv (';' ou ','), pelo cabeçalho."""
+    with open(csv_path, "r", encoding="utf-8-sig") as fh:
+        header = fh.readline()
+    return ";" if header.count(";") > header.count(",") else ","
+
+
+def _read_pairs(csv_path: str | os.PathLike) -> pd.DataFrame:
+    """Lê Artista/Genero/URL (sep ',' ou ';') e devolve colunas name/genre/url."""
+    df = pd.read_csv(csv_path, sep=csv_sep(csv_path), encoding="utf-8-sig", dtype=str,
+                     keep_default_na=False)
+    cols = {c.lower().strip(): c for c in df.columns}
+    name_col = cols.get("artista") or cols.get("artist") or df.columns[0]
+    genre_col = cols.get("genero") or cols.get("género") or cols.get("genre") or df.columns[1]
+    url_col = cols.get("url")
+    out = pd.DataFrame({
+        "name": df[name_col].str.strip(),
+        "genre": df[genre_col].str.strip(),
+        "url": df[url_col].str.strip() if url_col else "",
+    })
+    return out[(out["name"] != "") & (out["genre"] != "")]
+
+
+# ======================
+# Construção
+# ======================
+def build_index(csv_path: str | os.PathLike = ARTISTS_CSV, topk: int = 0) -> Dict[str, np.ndarray]:
+    """
+    Constrói o índice a partir do CSV.
+    Devolve um dict de arrays (pronto para np.savez):
+      names/keys/urls  → um por artista (nome de apresentação = 1.ª ocorrência)
+      genres, idf      → um por género
+      indptr/indices/data    → CSR artista×género (float32, linhas normalizadas)
+      t_indptr/t_indices/t_data → CSR transposto (género×artista)
+      topk_idx/topk_score    → opcional, vizinhos pré-calculados por artista
+    """
+    df = _read_pairs(csv_path)
+    a_codes, a_keys = pd.factorize(df["name"].map(_key))
+    g_codes, g_keys = pd.factorize(df["genre"].map(_key))
+    n_a, n_g = len(a_keys), len(g_keys)
+
+    first = pd.Series(np.arange(len(df))).groupby(a_codes).first().to_numpy()
+    names = df["name"].to_numpy()[first]
+    urls = df["url"].to_numpy()[first]
+
+    # pares únicos (artista, género), ordenados por linha e coluna
+    pairs = np.unique(a_codes.astype(np.int64) * n_g + g_codes, return_index=False)
+    rows = (pairs // n_g).astype(np.int32)
+    cols = (pairs % n_g).astype(np.int32)
+
+    doc_freq = np.bincount(cols, minlength=n_g).astype(np.float64)
+    idf = np.log((1.0 + n_a) / (1.0 + doc_freq)) + 1.0
+
+    data = idf[cols]
+    norms = np.sqrt(np.bincount(rows, weights=data * data, minlength=n_a))
+    data = (data / norms[rows]).astype(np.float32)
+
+    indptr = np.zeros(n_a + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_a), out=indptr[1:])
+
+    order = np.argsort(cols, kind="stable")
+    t_indptr = np.zeros(n_g + 1, dtype=np.int64)
+    np.cumsum(np.bincount(cols, minlength=n_g), out=t_indptr[1:])
+
+    index = {
+        "version": np.array([FORMAT_VERSION]),
+        "names": names.astype(str),
+        "keys": np.asarray(a_keys, dtype=str),
+        "urls": urls.astype(str),
+        "genres": np.asarray(g_keys, dtype=str),
+        "idf": idf.astype(np.float32),
+        "indptr": indptr,
+        "indices": cols,
+        "data": data,
+        "t_indptr": t_indptr,
+        "t_indices": rows[order],
+        "t_data": data[order],
+    }
+    if topk and topk > 0:
+        index["topk_idx"], index["topk_score"] = _topk_table(index, int(topk))
+    return index
+
+
+def _scores_for_row(index: Dict[str, np.ndarray], i: int) -> np.ndarray:
+    """Produto esparso linha i · Aᵀ, via índice transposto (só géneros do artista)."""
+    indptr, indices, data = index["indptr"], index["indices"], index["data"]
+    t_indptr, t_indices, t_data = index["t_indptr"], index["t_indices"], index["t_data"]
+    n_a = len(indptr) - 1
+
+    g = indices[indptr[i]:indptr[i + 1]]
+    w = data[indptr[i]:indptr[i + 1]]
+    if not len(g):
+        return np.zeros(n_a, dtype=np.float64)
+    starts, ends = t_indptr[g], t_indptr[g + 1]
+    lens = ends - starts
+    # posições concatenadas de todos os segmentos (sem loop Python)
+    pos = np.repeat(ends - lens.cumsum(), lens) + np.arange(lens.sum())
+    weights = t_data[pos] * np.repeat(w, lens)
+    return np.bincount(t_indices[pos], weights=weights, minlength=n_a)
+
+
+def _top_from_scores(scores: np.ndarray, i: int, k: int):
+    scores[i] = 0.0
+    k = min(k, int((scores > 0).sum()))
+    if k <= 0:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+    part = np.argpartition(-scores, k - 1)[:k]
+    part = part[np.argsort(-scores[part], kind="stable")]
+    return part.astype(np.int32), scores[part].astype(np.float32)
+
+
+def _topk_table(index: Dict[str, np.ndarray], k: int):
+    n_a = len(index["indptr"]) - 1
+    idx = np.full((n_a, k), -1, dtype=np.int32)
+    score = np.zeros((n_a, k), dtype=np.float32)
+    for i in range(n_a):
+        top, sc = _top_from_scores(_scores_for_row(index, i), i, k)
+        idx[i, :len(top)] = top
+        score[i, :len(sc)] = sc
+    return idx, score
+
+
+def save_index(index: Dict[str, np.ndarray], path: str | os.PathLike = INDEX_PATH) -> None:
+    np.savez_compressed(path, **index)
+
+
+def load_index(path: str | os.PathLike = INDEX_PATH) -> Dict[str, np.ndarray] | None:
+    try:
+        with np.load(path, allow_pickle=False) as z:
+            index = {k: z[k] for k in z.files}
+    except Exception:
+        return None
+    if int(index.get("version", [0])[0]) != FORMAT_VERSION:
+        return None
+    return index
+
+
+# ======================
+# Runtime
+# ======================
+@st.cache_resource(show_spinner=False)
+def get_artist_index() -> Dict[str, np.ndarray] | None:
+    """
+    Usa o .npz pré-construído se existir e estiver atualizado face ao CSV;
+    caso contrário constrói em memória (sem top-k).
+    """
+    csv_ok = Path(ARTISTS_CSV).exists()
+    if Path(INDEX_PATH).exists():
+        fresh = (not csv_ok) or os.path.getmtime(INDEX_PATH) >= os.path.getmtime(ARTISTS_CSV)
+        if fresh:
+            index = load_index(INDEX_PATH)
+            if index is not None:
+                index["_pos"] = {k: i for i, k in enumerate(index["keys"].tolist())}
+                return index
+    if not csv_ok:
+        return None
+    index = build_index(ARTISTS_CSV)
+    index["_pos"] = {k: i for i, k in enumerate(index["keys"].tolist())}
+    return index
+
+
+def similar_artists(name: str, k: int = 10, index: Dict[str, np.ndarray] | None = None) -> List[dict]:
+    """
+    Artistas mais parecidos (cosseno sobre géneros partilhados, IDF).
+    Devolve [{'name','url','score'}], ordenado por score desc.
+    """
+    index = index if index is not None else get_artist_index()
+    if not index or not name or k <= 0:
+        return []
+    pos = index.get("_pos")
+    i = pos.get(_key(name)) if pos is not None else None
+    if i is None:
+        hits = np.flatnonzero(index["keys"] == _key(name))
+        i = int(hits[0]) if len(hits) else None
+    if i is None:
+        return []
+
+    if "topk_idx" in index and k <= index["topk_idx"].shape[1]:
+        top = index["topk_idx"][i, :k]
+        sc = index["topk_score"][i, :k]
+        keep = top >= 0
+        top, sc = top[keep], sc[keep]
+    else:
+        top, sc = _top_from_scores(_scores_for_row(index, i), i, k)
+
+    names, urls = index["names"], index["urls"]
+    return [
+        {"name": str(names[j]), "url": str(urls[j]), "score": round(float(s), 4)}
+        for j, s in zip(top.tolist(), sc.tolist())
+    ]
@@ -0,0 +1,198 @@
+# services/common/device_prefs.py
+# -----------------------------------------------------------------------------
+# Preferências por dispositivo (rádio, podcasts) num único blob JSON versionado
+# no localStorage ("m4a.device"):
+#   {"v": 1, "radio": {...}, "podcasts": {...}}
+# - load() no topo da página lê-o 1× por sessão para st.session_state;
+#   get()/set() só mexem na cópia em memória
+# - o componente de localStorage devolve None enquanto não respondeu, o que não
+#   se distingue de "não existe": sem blob ao fim de READ_TRIES runs gravamos uma
+#   chave-sonda (PROBE_KEY); só quando a sonda é lida de volta a ausência do blob
+#   fica confirmada. Até lá nada é gravado (um blob que chegue tarde nunca é
+#   pisado por um quase vazio)
+# - sem blob (confirmado): migra as chaves antigas (radio.defaults, …) 1×
+# - flush() no fim da página grava tudo num só setItem, só depois de uma leitura
+#   confirmada e só se o JSON mudou desde a última escrita
+# - uma instância de LocalStorage por run (criada no load())
+# - sem a lib (ou fora do browser) fica tudo em st.session_state
+# -----------------------------------------------------------------------------
+from __future__ import annotations
+
+import copy
+import json
+from typing import Any, Dict, Optional
+
+import streamlit as st
+
+try:
+    from streamlit_local_storage import LocalStorage  # type: ignore
+except Exception:  # lib opcional (cloud / testes)
+    LocalStorage = None  # type: ignore
+
+BLOB_KEY = "m4a.device"
+VERSION = 1
+READ_TRIES = 2
+PROBE_KEY, PROBE_VALUE = "m4a.device.probe", "1"
+_SS = "_device_prefs"
+
+# chave antiga → (secção, campo)
+LEGACY_KEYS = {
+    "radio.defaults": ("radio", "defaults"),
+    "radio.favorites": ("radio", "favorites"),
+    "radio.showFavs": ("radio", "showFavs"),
+    "podcasts.defaults": ("podcasts", "defaults"),
+    "podcasts.favorites": ("podcasts", "favorites"),
+    "podcasts.showFavs": ("podcasts", "showFavs"),
+}
+
+
+# ======================
+# localStorage (round trips)
+# ======================
+def _storage():
+    """Instância de LocalStorage do run atual (criada no load(); None sem a lib)."""
+    if LocalStorage is None:
+        return None
+    stt = _state()
+    if stt.get("ls") is None:
+        try:
+            stt["ls"] = LocalStorage()
+        except Exception:
+            return None
+    return stt["ls"]
+
+
+def _read(key: str) -> Optional[str]:
+    ls = _storage()
+    try:
+        v = ls.getItem(key) if ls is not None else None
+    except Exception:
+        v = None
+    if v is None:  # fallback antigo das páginas (sem localStorage)
+        v = st.session_state.get(key) or st.session_state.get(f"_ls:{key}")
+    return v if isinstance(v, str) else (json.dumps(v) if isinstance(v, (dict, list)) else None)
+
+
+def _write(key: str, value: str) -> None:
+    ls = _storage()
+    if ls is None:
+        st.session_state[key] = value
+        return
+    try:
+        ls.setItem(key, value, key=f"{key}__set")
+    except TypeError:  # versões da lib sem o parâmetro key
+        ls.setItem(key, value)
+    except Exception:
+        st.session_state[key] = value
+
+
+def _parse_legacy(field: str, raw: Optional[str]) -> Any:
+    if raw is None:
+        return None
+    if field == "showFavs":
+        s = raw.strip().lower()
+        return True if s in ("true", "1", "yes", "on") else False if s in ("false", "0", "no", "off") else None
+    try:
+        return json.loads(raw)
+    except Exception:
+        return None
+
+
+# ======================
+# Estado da sessão
+# ======================
+def _state() -> Dict[str, Any]:
+    stt = st.session_state.get(_SS)
+    if stt is None:
+        stt = st.session_state[_SS] = {"data": {"v": VERSION}, "loaded": False, "tries": 0,
+                                       "probed": False, "dirty": False, "written": None,
+                                       "touched": {}, "ls": None}
+    return stt
+
+
+def load() -> bool:
+    """Chamar 1× no topo da página (cria a instância de LocalStorage do run): lê o
+    blob enquanto não estiver carregado, um round trip por run. Devolve se já carregou."""
+    stt = _state()
+    stt["ls"] = None
+    if not stt["loaded"]:
+        _load(stt)
+    return stt["loaded"]
+
+
+def _absent_confirmed(stt: Dict[str, Any]) -> bool:
+    """Blob em falta: confirma que o componente responde (sonda gravada e relida)."""
+    if _storage() is None:
+        return True  # sem componente: o fallback em session_state é a verdade
+    if stt["tries"] < READ_TRIES:
+        return False  # o componente pode ainda não ter respondido
+    if _read(PROBE_KEY) == PROBE_VALUE:
+        return True
+    if not stt["probed"]:
+        _write(PROBE_KEY, PROBE_VALUE)
+        stt["probed"] = True
+    return False
+
+
+def _load(stt: Dict[str, Any]) -> None:
+    stt["tries"] += 1
+    base: Dict[str, Any] = {}
+    raw = _read(BLOB_KEY)
+    if raw:
+        try:
+            base = json.loads(raw)
+        except Exception:
+            base = {}
+        if isinstance(base, dict) and int(base.get("v") or 0) > VERSION:
+            stt["frozen"] = True  # blob de uma versão mais nova: lê-se, nunca se grava
+        if not isinstance(base, dict) or int(base.get("v") or 0) > VERSION:
+            base = {}
+        else:
+            stt["written"] = raw
+    if raw is None:
+        if not _absent_confirmed(stt):
+            return
+        for lk, (sec, field) in LEGACY_KEYS.items():
+            val = _parse_legacy(field, _read(lk))
+            if val is not None:
+                base.setdefault(sec, {})[field] = val
+        stt["dirty"] = bool(base)
+    base["v"] = VERSION
+    # alterações feitas antes de o blob chegar ganham (só as chaves mexidas)
+    for (sec, field), val in stt["touched"].items():
+        if (base.get(sec) or {}).get(field) != val:
+            base.setdefault(sec, {})[field] = val
+            stt["dirty"] = True
+    stt["data"], stt["loaded"], stt["touched"] = base, True, {}
+
+
+def get(section: str, field: str, default: Any = None) -> Any:
+    """Cópia do valor (mutar o resultado não altera as preferências; use set())."""
+    val = (_state()["data"].get(section) or {}).get(field)
+    return copy.deepcopy(val) if val is not None else default
+
+
+def set(section: str, field: str, value: Any) -> None:
+    stt = _state()
+    value = copy.deepcopy(value)
+    if (stt["data"].get(section) or {}).get(field) == value:
+        return
+    stt["data"].setdefault(section, {})[field] = value
+    if not stt["loaded"]:
+        stt["touched"][(section, field)] = value
+    stt["dirty"] = True
+
+
+def flush() -> bool:
+    """Grava o blob (1 setItem) se houver alterações e a leitura já foi confirmada.
+    Chamar no fim da página."""
+    stt = _state()
+    if not stt["loaded"] or not stt["dirty"] or stt.get("frozen"):
+        return False
+    raw = json.dumps(stt["data"], ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    stt["dirty"] = False
+    if raw == stt["written"]:
+        return False
+    _write(BLOB_KEY, raw)
+    stt["written"] = raw
+    return True
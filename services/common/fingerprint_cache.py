@@ -0,0 +1,126 @@
+# services/common/fingerprint_cache.py
+# -----------------------------------------------------------------------------
+# Cache de objetos derivados de ficheiros (CSV → DataFrame → índices → grafos),
+# chaveada pela "impressão digital" da origem em vez do conteúdo:
+#   (caminho, mtime_ns, tamanho) dos ficheiros-fonte + versão do builder
+# - registo único por processo (partilhado entre sessões, como st.cache_resource)
+# - um resultado não-hashable (DataFrame, dict…) fica associado à sua origem;
+#   passado a outra função @source_cached, a chave usa essa origem em vez de
+#   hashear o objeto todo → um lookup é um os.stat + um acesso a dict
+# - ficheiro alterado (ou version= diferente) → a entrada antiga é substituída
+# - os valores devolvidos são partilhados: tratar como só-leitura
+# -----------------------------------------------------------------------------
+from __future__ import annotations
+
+import functools
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+STAT_TTL_S = 2.0   # os.stat da mesma fonte no máximo 1× por este intervalo
+
+_lock = threading.RLock()
+_entries: Dict[Tuple, Tuple[Tuple, Any]] = {}   # (função, args) → (origem, valor)
+_origin: Dict[int, Tuple[Tuple, Tuple, Any]] = {}  # id(valor) → (chave, origem, valor)
+_stats: Dict[str, Tuple[float, Tuple]] = {}     # caminho → (quando, impressão digital)
+
+
+def file_fingerprint(path: str | Path) -> Tuple:
+    """(caminho absoluto, mtime_ns, tamanho); ficheiro inexistente → (caminho, None, None)."""
+    p = os.path.abspath(os.fspath(path))
+    now = time.monotonic()
+    hit = _stats.get(p)
+    if hit and now - hit[0] < STAT_TTL_S:
+        return hit[1]
+    try:
+        st_ = os.stat(p)
+        fp = (p, st_.st_mtime_ns, st_.st_size)
+    except OSError:
+        fp = (p, None, None)
+    _stats[p] = (now, fp)
+    return fp
+
+
+def _hashable(x: Any) -> bool:
+    try:
+        hash(x)
+        return True
+    except TypeError:
+        return False
+
+
+def _token(x: Any) -> Tuple[Hashable, Hashable]:
+    """(chave estável, origem) de um argumento: objeto registado → a entrada que o
+    produziu e a origem dela; senão o próprio valor, se hashable."""
+    hit = _origin.get(id(x))
+    if hit is not None and hit[2] is x:
+        return ("src", hit[0]), hit[1]
+    if _hashable(x):
+        return x, None
+    raise TypeError(f"argumento sem origem conhecida nem hashable: {type(x).__name__}")
+
+
+def _parts(value: Any) -> list:
+    return [value] + (list(value) if isinstance(value, tuple) else [])
+
+
+def _register(key: Tuple, origin: Tuple, value: Any) -> None:
+    for o in _parts(value):
+        if not _hashable(o):
+            _origin[id(o)] = (key, origin, o)
+
+
+def _forget(value: Any) -> None:
+    for o in _parts(value):
+        hit = _origin.get(id(o))
+        if hit is not None and hit[2] is o:
+            del _origin[id(o)]
+
+
+def source_cached(*sources: str | Path, version: int = 1) -> Callable:
+    """
+    Decorador: guarda o resultado por (ficheiros-fonte, versão, argumentos).
+    `sources` são os ficheiros lidos pela função (podem não existir);
+    argumentos não-hashable têm de vir de outra função @source_cached.
+    Argumentos que não dá para chavear → chama a função sem cache.
+    """
+    def deco(fn: Callable) -> Callable:
+        fname = f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                targs = [_token(a) for a in args]
+                tkw = sorted((k, _token(v)) for k, v in kwargs.items())
+            except TypeError:
+                return fn(*args, **kwargs)
+            key = (fname, tuple(t[0] for t in targs), tuple((k, t[0]) for k, t in tkw))
+            origin = (version, tuple(file_fingerprint(s) for s in sources),
+                      tuple(t[1] for t in targs), tuple(t[1] for _, t in tkw))
+            with _lock:
+                hit = _entries.get(key)
+                if hit is not None and hit[0] == origin:
+                    return hit[1]
+            value = fn(*args, **kwargs)
+            with _lock:
+                old = _entries.get(key)
+                if old is not None:
+                    _forget(old[1])
+                _entries[key] = (origin, value)
+                _register(key, origin, value)
+            return value
+
+        wrapper.clear = lambda: clear(fname)  # type: ignore[attr-defined]
+        return wrapper
+    return deco
+
+
+def clear(fname: Optional[str] = None) -> None:
+    """Esvazia o registo (todo, ou só as entradas de uma função 'módulo.nome')."""
+    with _lock:
+        for key in [k for k in _entries if fname is None or k[0] == fname]:
+            _forget(_entries.pop(key)[1])
+        if fname is None:
+            _stats.clear()
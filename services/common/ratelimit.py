@@ -0,0 +1,29 @@
+# services/common/ratelimit.py
+# Limite de pedidos/segundo partilhado entre threads (token bucket).
+from __future__ import annotations
+
+import threading
+import time
+
+
+class RateLimiter:
+    """Token bucket simples, partilhado entre threads."""
+
+    def __init__(self, rate: float, burst: int | None = None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, int(rate)))
+        self.tokens = self.capacity
+        self.t = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self, n: float = 1.0) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.t) * self.rate)
+                self.t = now
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                delay = (n - self.tokens) / self.rate
+            time.sleep(delay)
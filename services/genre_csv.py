@@ -1,4 +1,5 @@
 ﻿from services.common.paths import MUSIC_DATA
+from services.common.fingerprint_cache import source_cached
 
 # services/genre_csv.py
 import os, re, unicodedata
@@ -54,7 +55,10 @@ def read_csv_fixed(path: str) -> pd.DataFrame:
             last_err = e
     raise last_err or FileNotFoundError(path)
 
+@source_cached(*CSV_PATHS)
 def load_hierarchy_csv() -> tuple[pd.DataFrame, str]:
+    """(DataFrame, caminho); cache por processo até o CSV mudar (mtime/tamanho).
+    O DataFrame é partilhado: não alterar no sítio."""
     for p in CSV_PATHS:
         if os.path.exists(p):
             df = read_csv_fixed(p)
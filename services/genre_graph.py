@@ -0,0 +1,241 @@
+# services/genre_graph.py
+# -----------------------------------------------------------------------------
+# Music4all · Grafo de géneros multi-fonte (um só objeto em memória)
+# Camadas (bits por aresta PAI → FILHO):
+#   kb          relações curadas (services.genres_kb)
+#   hierarchy   hierarquia H1..H7 (hierarquia_generos.csv)
+#   influences  L1..Ln de influences_origins.csv (ou o grafo compilado)
+# - nós identificados por label_key(canonical_name(x)); o nome mostrado vem da
+#   primeira camada que o tem (kb > hierarchy > influences)
+# - adjacências em arrays CSR partilhados (descendente e ascendente), linhas
+#   ordenadas por nome → vizinhos/BFS já saem ordenados, filtrados por camada
+# - confiança por aresta = máximo das camadas onde aparece (LAYER_CONF)
+# - cache por origem (services.common.fingerprint_cache): reconstrói só quando
+#   um dos ficheiros muda
+# -----------------------------------------------------------------------------
+from __future__ import annotations
+
+import os
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.common.fingerprint_cache import source_cached
+from services.common.paths import MUSIC_DATA
+from services.genre_csv import CSV_PATHS, build_indices, load_hierarchy_csv
+from services.genre_names import canonical_name, label_key
+from services.music_data import COMPILED_PATH, compiled_edges
+
+INFLUENCES_CSV = MUSIC_DATA / "influences_origins.csv"
+
+LAYER_KB, LAYER_HIER, LAYER_INFL = 1, 2, 4
+LAYERS: Dict[str, int] = {"kb": LAYER_KB, "hierarchy": LAYER_HIER, "influences": LAYER_INFL}
+ALL_LAYERS = LAYER_KB | LAYER_HIER | LAYER_INFL
+LAYER_CONF: Dict[int, float] = {LAYER_KB: 1.0, LAYER_HIER: 0.9, LAYER_INFL: 0.6}
+
+Edge = Tuple[str, str]
+
+
+def layer_mask(names: Iterable[str]) -> int:
+    """['kb', 'hierarchy'] → bits; nomes desconhecidos são ignorados."""
+    return sum(LAYERS[n] for n in set(names) if n in LAYERS)
+
+
+def layer_names(bits: int) -> List[str]:
+    return [n for n, b in LAYERS.items() if bits & b]
+
+
+class GenreGraph:
+    """Multigrafo PAI → FILHO com bits de camada e confiança por aresta."""
+
+    def __init__(self, edges: Dict[Tuple[str, str], int], display: Dict[str, str]):
+        keys = sorted({k for e in edges for k in e}, key=lambda k: (display[k].lower(), k))
+        self.names: List[str] = [display[k] for k in keys]
+        self._id: Dict[str, int] = {k: i for i, k in enumerate(keys)}
+        n = len(keys)
+
+        m = len(edges)
+        src = np.empty(m, dtype=np.int32)
+        dst = np.empty(m, dtype=np.int32)
+        bits = np.empty(m, dtype=np.uint8)
+        for j, ((p, c), b) in enumerate(edges.items()):
+            src[j], dst[j], bits[j] = self._id[p], self._id[c], b
+        conf = np.zeros(m, dtype=np.float32)
+        for b, cf in LAYER_CONF.items():
+            conf = np.where(bits & b, np.maximum(conf, cf), conf)
+
+        self._down = self._csr(n, src, dst, bits, conf)
+        self._up = self._csr(n, dst, src, bits, conf)
+        self._adj: Dict[Tuple[int, bool], Dict[str, Set[str]]] = {}
+
+    @staticmethod
+    def _csr(n: int, a: np.ndarray, b: np.ndarray, bits: np.ndarray, conf: np.ndarray):
+        order = np.lexsort((b, a))            # por nó, vizinhos por ordem de id (= nome)
+        ptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(a, minlength=n), out=ptr[1:])
+        return ptr, b[order], bits[order], conf[order]
+
+    # ---------- nós ----------
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self._down[1])
+
+    def node_id(self, name: str) -> Optional[int]:
+        return self._id.get(label_key(canonical_name(name)))
+
+    def name_of(self, name: str) -> Optional[str]:
+        """Nome mostrado do nó (resolve aliases/maiúsculas)."""
+        i = self.node_id(name)
+        return None if i is None else self.names[i]
+
+    def labels(self, layers: int = ALL_LAYERS) -> List[str]:
+        """Nós com pelo menos uma aresta nas camadas dadas (ordenados)."""
+        ptr, idx, bits, _ = self._down
+        sel = (bits & layers) != 0
+        has = np.zeros(len(self.names), dtype=bool)
+        has[idx[sel]] = True
+        has[np.repeat(np.arange(len(self.names)), np.diff(ptr))[sel]] = True
+        return [self.names[i] for i in np.flatnonzero(has)]
+
+    # ---------- vizinhos ----------
+    def _row(self, csr, i: int, layers: int) -> np.ndarray:
+        ptr, idx, bits, _ = csr
+        a, b = ptr[i], ptr[i + 1]
+        return idx[a:b][(bits[a:b] & layers) != 0]
+
+    def children(self, name: str, layers: int = ALL_LAYERS) -> List[str]:
+        i = self.node_id(name)
+        return [] if i is None else [self.names[j] for j in self._row(self._down, i, layers) if j != i]
+
+    def parents(self, name: str, layers: int = ALL_LAYERS) -> List[str]:
+        i = self.node_id(name)
+        return [] if i is None else [self.names[j] for j in self._row(self._up, i, layers) if j != i]
+
+    def neighbors(self, name: str, layers: int = ALL_LAYERS) -> Tuple[List[str], List[str]]:
+        return self.parents(name, layers), self.children(name, layers)
+
+    def edge(self, parent: str, child: str) -> Tuple[int, float]:
+        """(bits de camada, confiança) da aresta parent → child; (0, 0.0) se não existir."""
+        i, j = self.node_id(parent), self.node_id(child)
+        if i is None or j is None:
+            return 0, 0.0
+        ptr, idx, bits, conf = self._down
+        a, b = ptr[i], ptr[i + 1]
+        k = a + int(np.searchsorted(idx[a:b], j))
+        if k < b and idx[k] == j:
+            return int(bits[k]), float(conf[k])
+        return 0, 0.0
+
+    def adjacency(self, layers: int = ALL_LAYERS, up: bool = False) -> Dict[str, Set[str]]:
+        """{nó: {vizinhos}} (filhos; pais com up=True) — vista em dict, cache por camadas.
+        Partilhada entre sessões: só leitura."""
+        key = (layers, up)
+        adj = self._adj.get(key)
+        if adj is None:
+            csr = self._up if up else self._down
+            adj = {}
+            for i, nm in enumerate(self.names):
+                row = self._row(csr, i, layers)
+                if len(row):
+                    adj[nm] = {self.names[j] for j in row if j != i}
+            self._adj[key] = adj
+        return adj
+
+    # ---------- travessias ----------
+    def bfs(self, root: str, depth: int, layers: int = ALL_LAYERS, up: bool = False):
+        """
+        BFS a partir de root até 'depth' níveis, numa só passagem por todas as
+        camadas pedidas. Devolve (nós ordenados por nível, arestas PAI → FILHO, nível);
+        com up=True os níveis são negativos (pais = -1, avós = -2, …).
+        """
+        r = self.node_id(root)
+        if r is None:
+            rn = canonical_name(root)
+            return [rn], [], {rn: 0}
+        csr, sign = (self._up, -1) if up else (self._down, 1)
+        level = {r: 0}
+        edges: List[Tuple[int, int]] = []
+        q = deque([r])
+        while q:
+            u = q.popleft()
+            if abs(level[u]) >= depth:
+                continue
+            for v in self._row(csr, u, layers):
+                v = int(v)
+                if v == u:
+                    continue
+                edges.append((v, u) if up else (u, v))
+                if v not in level:
+                    level[v] = level[u] + sign
+                    q.append(v)
+        nm = self.names
+        ordered = sorted(level, key=lambda i: (level[i], nm[i].lower()))
+        return ([nm[i] for i in ordered], [(nm[a], nm[b]) for a, b in edges],
+                {nm[i]: lv for i, lv in level.items()})
+
+
+# ======================
+# Construção (camadas)
+# ======================
+def _kb_edges() -> Set[Edge]:
+    from services.genres_kb import kb_edges
+    return kb_edges()
+
+
+def _hierarchy_edges() -> Set[Edge]:
+    try:
+        df, _ = load_hierarchy_csv()
+    except FileNotFoundError:
+        return set()
+    children, _, _, _ = build_indices(df)
+    return {(pref[-1], k) for pref, kids in children.items() if pref for k in kids if k}
+
+
+def _influence_edges(path=INFLUENCES_CSV, sep: str = ";") -> Set[Edge]:
+    # artefacto compilado (scripts/build_music_data.py) → sem re-parse do CSV
+    edges = compiled_edges()
+    if edges or not os.path.exists(path):
+        return edges
+    try:
+        df = pd.read_csv(path, sep=sep, dtype=str)
+    except Exception:
+        return set()
+    cols = sorted((c for c in df.columns if re.match(r"^L\d+$", str(c), flags=re.I)),
+                  key=lambda c: int(str(c)[1:]))
+    out: Set[Edge] = set()
+    for row in df[cols].itertuples(index=False):
+        seq = [str(x).strip() for x in row if isinstance(x, str) and x.strip()]
+        out.update((a, b) for a, b in zip(seq, seq[1:]) if a != b)
+    return out
+
+
+def build_genre_graph(layers: Iterable[Tuple[int, Iterable[Edge]]]) -> GenreGraph:
+    """[(bit, arestas)] por ordem de preferência do nome mostrado → GenreGraph."""
+    bits: Dict[Tuple[str, str], int] = {}
+    display: Dict[str, str] = {}
+    for bit, edges in layers:
+        for p, c in edges:
+            p, c = canonical_name(p), canonical_name(c)
+            kp, kc = label_key(p), label_key(c)
+            if not kp or not kc or kp == kc:
+                continue
+            display.setdefault(kp, p)
+            display.setdefault(kc, c)
+            bits[(kp, kc)] = bits.get((kp, kc), 0) | bit
+    return GenreGraph(bits, display)
+
+
+@source_cached(*CSV_PATHS, COMPILED_PATH, INFLUENCES_CSV)
+def load_genre_graph() -> GenreGraph:
+    """Grafo com as três camadas (cache por processo até um ficheiro-fonte mudar)."""
+    return build_genre_graph([
+        (LAYER_KB, _kb_edges()),
+        (LAYER_HIER, _hierarchy_edges()),
+        (LAYER_INFL, _influence_edges()),
+    ])
@@ -0,0 +1,178 @@
+# services/genre_names.py
+# -----------------------------------------------------------------------------
+# Normalização de nomes de géneros (uma só implementação para app e scripts)
+# - ALIASES: tabela única de variações PT/EN → nome canónico
+# - regexes e tabelas de tradução compiladas 1× (hífens/dashes, NBSP, aspas)
+# - cada função de normalização tem cache por rótulo (strings internadas);
+#   warm() pré-carrega todos os rótulos conhecidos dos datasets
+# - *_many(): normalização em bloco (listas ou pandas.Series), 1× por valor único
+# Formas:
+#   canonical_name("rock n roll") → "Rock and Roll"   (nome para mostrar/grafo)
+#   label_key("Synth–pop ")       → "synth-pop"       (matching de rótulos)
+#   norm_label("Fado (Spotify seeds)") → "fado"       (sem acentos, sem sufixos)
+#   fold("Música")                → "musica"          (casefold sem acentos)
+# -----------------------------------------------------------------------------
+from __future__ import annotations
+
+import re
+import sys
+import unicodedata
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Tuple
+
+CACHE_SIZE = 1 << 16   # rótulos distintos por função (os datasets têm ~2k)
+
+# ======================
+# Aliases / nomes canónicos (chaves em forma label_key)
+# ======================
+ALIASES: Dict[str, str] = {
+    "r&b": "Rhythm and Blues",
+    "rock & roll": "Rock and Roll",
+    "rock n roll": "Rock and Roll",
+    "rock 'n' roll": "Rock and Roll",
+    "prog rock": "Progressive Rock",
+    "rock progressivo": "Progressive Rock",
+    "synthpop": "Synth-pop",
+    "dance pop": "Dance-pop",
+    "doo wop": "Doo-wop",
+    "britpop": "Britpop",
+    "art pop": "Art Pop",
+    "power pop": "Power Pop",
+    "post punk": "Post-punk",
+    "hard rock": "Hard Rock",
+    "blues rock": "Blues Rock",
+    "new wave": "New Wave",
+    "garage": "Garage Rock",
+    "country blues": "Country Blues",
+    "classico": "Classical",
+    "classical music": "Classical",
+    "eletronica": "Electronic",
+    "eletrónica": "Electronic",
+    "electronica": "Electronic",
+    "hip hop": "Hip Hop",
+    "hip-hop": "Hip Hop",
+    "latino": "Latin",
+    "latina": "Latin",
+    "reggae": "Reggae",
+}
+
+# hífens/dashes → "-", NBSP → " ", aspas curvas → retas
+_PUNCT = str.maketrans({
+    "\u2010": "-", "\u2011": "-", "\u2012": "-", "\u2013": "-", "\u2014": "-", "\u2212": "-",
+    "\xa0": " ", "\u2009": " ", "\u202f": " ",
+    "\u2018": "'", "\u2019": "'", "\u00b4": "'", "`": "'",
+})
+_WS = re.compile(r"\s+")
+_TRAIL_PAREN = re.compile(r"\s*\(.*?\)\s*$")   # “ (Spotify seeds)”
+_TRAIL_GENRE = re.compile(r"\s+genre\s*$")     # “… genre”
+
+
+def _s(x) -> str:
+    return "" if x is None else str(x)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def strip_accents(s: str) -> str:
+    return sys.intern(unicodedata.normalize("NFKD", _s(s)).encode("ascii", "ignore").decode("ascii"))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def label_key(s: str) -> str:
+    """Chave de matching: pontuação uniformizada, espaços colapsados, casefold."""
+    return sys.intern(_WS.sub(" ", _s(s).translate(_PUNCT)).strip().casefold())
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def fold(s: str) -> str:
+    """casefold sobre texto sem acentos."""
+    return sys.intern(strip_accents(_s(s)).casefold())
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def norm_label(s: str) -> str:
+    """Sem acentos, lower, sem sufixos “ (…)”/“ genre”, espaços colapsados."""
+    s1 = strip_accents(_s(s).strip()).lower()
+    s1 = _TRAIL_GENRE.sub("", _TRAIL_PAREN.sub("", s1))
+    return sys.intern(_WS.sub(" ", s1).strip())
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def canonical_name(name: str) -> str:
+    """Nome canónico via ALIASES; sem alias devolve o nome com espaços normalizados."""
+    key = _WS.sub(" ", _s(name)).strip()
+    return sys.intern(ALIASES.get(label_key(key), key))
+
+
+def _reverse_aliases() -> Dict[str, Tuple[str, ...]]:
+    rev: Dict[str, List[str]] = {}
+    for alias, canon in ALIASES.items():
+        rev.setdefault(label_key(canon), []).append(alias)
+    return {k: tuple(v) for k, v in rev.items()}
+
+
+_BY_CANON = _reverse_aliases()
+
+
+def aliases_for(name: str) -> List[str]:
+    """Variações conhecidas (chaves de ALIASES) que resolvem para o mesmo canónico."""
+    return list(_BY_CANON.get(label_key(canonical_name(name)), ()))
+
+
+def resolve(label: str) -> Tuple[str, List[str]]:
+    """(canónico, [canónico + aliases]) em forma norm_label, sem duplicados."""
+    canon = norm_label(canonical_name(label))
+    out = [canon] + [norm_label(a) for a in aliases_for(label)]
+    return canon, list(dict.fromkeys(x for x in out if x))
+
+
+# ======================
+# Em bloco
+# ======================
+def _many(fn: Callable[[str], str], labels):
+    """Aplica fn 1× por valor único; pandas.Series → Series, resto → lista."""
+    if hasattr(labels, "map") and hasattr(labels, "unique"):   # pandas.Series/Index
+        uniq = {v: fn(v) for v in labels.unique()}
+        return labels.map(uniq)
+    memo: Dict[str, str] = {}
+    out = []
+    for v in labels:
+        r = memo.get(v)
+        if r is None:
+            r = memo[v] = fn(v)
+        out.append(r)
+    return out
+
+
+def canonical_many(labels: Iterable[str]):
+    return _many(canonical_name, labels)
+
+
+def label_key_many(labels: Iterable[str]):
+    return _many(label_key, labels)
+
+
+def norm_label_many(labels: Iterable[str]):
+    return _many(norm_label, labels)
+
+
+def fold_many(labels: Iterable[str]):
+    return _many(fold, labels)
+
+
+def warm(labels: Iterable[str] | None = None) -> int:
+    """Pré-carrega as caches com os rótulos dados ou, sem argumento, com todos os
+    rótulos da hierarquia de géneros. Devolve quantos rótulos processou."""
+    if labels is None:
+        try:
+            from services.genre_csv import load_hierarchy_csv, build_indices
+            df, _ = load_hierarchy_csv()
+            children, _, _, _ = build_indices(df)
+        except Exception:
+            return 0
+        labels = {p[-1] for p in children if p} | {k for kids in children.values() for k in kids}
+    n = 0
+    for lab in labels:
+        if lab:
+            canonical_name(lab); label_key(lab); norm_label(lab)
+            n += 1
+    return n
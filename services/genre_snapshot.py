@@ -0,0 +1,179 @@
+# services/genre_snapshot.py
+# -----------------------------------------------------------------------------
+# Music4all · Snapshot do grafo de géneros (hierarquia) + contagens de artistas
+# - Construído offline (scripts/build_genre_snapshot.py) a partir de
+#   hierarquia_generos.csv + lista_artistas.csv.
+# - Por género (nós juntos por count_key): artistas diretos, total da
+#   subárvore (artistas distintos) e quota face ao pai principal.
+# - Em runtime só se lê o JSON (sem agrupar as ~46k linhas de artistas).
+# -----------------------------------------------------------------------------
+from __future__ import annotations
+
+import json
+import os
+import re
+import time
+from collections import defaultdict, deque
+from typing import Dict, Set
+
+import pandas as pd
+import streamlit as st
+
+from services.artist_similarity import csv_sep
+from services.common.paths import MUSIC_DATA
+from services.genre_csv import load_hierarchy_csv, build_indices
+from services.genres_kb import canonical_name
+from services.music_data import compiled_snapshot
+
+ARTISTS_CSV = MUSIC_DATA / "lista_artistas.csv"
+SNAPSHOT_PATH = MUSIC_DATA / "genre_graph_snapshot.json"
+SNAPSHOT_VERSION = 1
+
+# géneros de lista_artistas.csv que não batem com nenhum rótulo da hierarquia
+COUNT_ALIASES: Dict[str, str] = {
+    "heavy metal": "metal",
+    "female heavy metal": "metal",
+    "r&b": "r&b & soul",
+    "experimental": "avant garde & experimental",
+}
+
+
+def count_key(label: str) -> str:
+    """Chave de matching entre rótulos (hífens/underscores = espaço, sem ' music')."""
+    s = re.sub(r"[-‐‑–—_]", " ", str(label or "").replace("\xa0", " "))
+    s = re.sub(r"\s+", " ", s).strip().casefold()
+    s = re.sub(r"\s+music$", "", s)
+    return COUNT_ALIASES.get(s, s)
+
+
+def _fingerprint(path) -> dict:
+    try:
+        st_ = os.stat(path)
+        return {"path": os.path.basename(str(path)), "mtime": int(st_.st_mtime), "size": st_.st_size}
+    except OSError:
+        return {"path": os.path.basename(str(path))}
+
+
+# ======================
+# Construção (offline)
+# ======================
+def build_snapshot(hierarchy_df: pd.DataFrame | None = None, artists_csv=ARTISTS_CSV) -> dict:
+    """Adjacência Parent→Child (rótulos canónicos) + contagens por género."""
+    if hierarchy_df is None:
+        hierarchy_df, hier_path = load_hierarchy_csv()
+    else:
+        hier_path = ""
+    children_idx, _, _, _ = build_indices(hierarchy_df)
+
+    adj: Dict[str, Set[str]] = defaultdict(set)
+    # nós de contagem = count_key: "Noise"/"Noise music" ou "Synth punk"/"Synth-punk"
+    # são o mesmo género (mesma chave) e juntam filhos e artistas
+    kadj: Dict[str, Set[str]] = defaultdict(set)
+    names: Dict[str, Set[str]] = defaultdict(set)
+    primary_parent: Dict[str, str] = {}
+    for pref in sorted((p for p in children_idx if p), key=len):
+        parent = canonical_name(pref[-1])
+        kp = count_key(parent)
+        for k in children_idx[pref]:
+            if not k:
+                continue
+            child = canonical_name(k)
+            if child == parent:
+                continue
+            adj[parent].add(child)
+            kc = count_key(child)
+            names[kp].add(parent)
+            names[kc].add(child)
+            if kc != kp:
+                kadj[kp].add(kc)
+                primary_parent.setdefault(kc, kp)
+    keys = {k for k in names if k}
+    label = {k: min(names[k], key=lambda x: (x.lower(), x)) for k in keys}
+
+    # artistas por chave de género
+    a = pd.read_csv(artists_csv, sep=csv_sep(artists_csv), dtype=str, keep_default_na=False,
+                    encoding="utf-8-sig")
+    cols = {c.lower().strip(): c for c in a.columns}
+    name_col = cols.get("artista") or cols.get("artist") or a.columns[0]
+    genre_col = cols.get("genero") or cols.get("género") or cols.get("genre") or a.columns[1]
+    a_ids, _ = pd.factorize(a[name_col].str.strip().str.casefold())
+    g_keys = a[genre_col].map(count_key)
+    by_key: Dict[str, Set[int]] = defaultdict(set)
+    for k, aid in zip(g_keys.tolist(), a_ids.tolist()):
+        if k:
+            by_key[k].add(aid)
+
+    direct = {k: by_key.get(k, set()) for k in keys}
+
+    # subárvore = união dos artistas de todos os descendentes alcançáveis (tolera ciclos)
+    subtree: Dict[str, int] = {}
+    for k in keys:
+        seen = {k}
+        acc = set(direct[k])
+        q = deque([k])
+        while q:
+            u = q.popleft()
+            for v in kadj.get(u, ()):
+                if v not in seen:
+                    seen.add(v)
+                    acc |= direct.get(v, set())
+                    q.append(v)
+        subtree[k] = len(acc)
+
+    counts = {}
+    for k in sorted(keys):
+        par = primary_parent.get(k)
+        denom = subtree.get(par, 0) if par else 0
+        counts[k] = {
+            "label": label[k],
+            "direct": len(direct[k]),
+            "subtree": subtree[k],
+            "parent": label[par] if par else "",
+            # quota no pai principal; None = sem pai (topo), 0.0 = pai sem artistas
+            "share": (round(subtree[k] / denom, 4) if denom else 0.0) if par else None,
+        }
+
+    return {
+        "version": SNAPSHOT_VERSION,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "sources": {
+            "hierarchy": _fingerprint(hier_path) if hier_path else {},
+            "artists": _fingerprint(artists_csv),
+        },
+        "adjacency": {p: sorted(cs, key=str.lower) for p, cs in sorted(adj.items())},
+        "counts": counts,
+    }
+
+
+def save_snapshot(snap: dict, path=SNAPSHOT_PATH) -> None:
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(snap, fh, ensure_ascii=False, separators=(",", ":"))
+
+
+# ======================
+# Runtime
+# ======================
+@st.cache_data(ttl=86400, show_spinner=False)
+def load_snapshot(path=SNAPSHOT_PATH) -> dict:
+    """Lê o snapshot; {} se não existir ou a versão não bater."""
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            snap = json.load(fh)
+    except Exception:
+        return {}
+    return snap if snap.get("version") == SNAPSHOT_VERSION else {}
+
+
+def genre_artist_counts() -> Dict[str, dict]:
+    """count_key(label) -> {'label','direct','subtree','parent','share'}."""
+    counts = compiled_snapshot().get("counts")
+    if counts:
+        return counts
+    return load_snapshot().get("counts", {})
+
+
+def subtree_count(counts: Dict[str, dict] | None, label: str, default: int = 0) -> int:
+    if not counts:
+        return default
+    rec = counts.get(count_key(label))
+    return int(rec["subtree"]) if rec else default
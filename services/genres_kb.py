@@ -6,42 +6,9 @@ from typing import List, Dict, Set, Tuple
 from collections import deque
 
 # ======================
-# Aliases / nomes canónicos (inclui variações PT/EN)
+# Aliases / nomes canónicos (tabela única em services.genre_names)
 # ======================
-ALIASES: Dict[str, str] = {
-    # variações comuns
-    "r&b": "Rhythm and Blues",
-    "rock & roll": "Rock and Roll",
-    "rock n roll": "Rock and Roll",
-    "rock ’n’ roll": "Rock and Roll",
-    "prog rock": "Progressive Rock",
-    "rock progressivo": "Progressive Rock",
-    "synthpop": "Synth-pop",
-    "dance pop": "Dance-pop",
-    "doo wop": "Doo-wop",
-    "britpop": "Britpop",
-    "art pop": "Art Pop",
-    "power pop": "Power Pop",
-    "post punk": "Post-punk",
-    "hard rock": "Hard Rock",
-    "blues rock": "Blues Rock",
-    "new wave": "New Wave",
-    "country blues": "Country Blues",
-    "classico": "Classical",
-    "eletrónica": "Electronic",
-    "electronica": "Electronic",
-    "hip hop": "Hip Hop",
-    "hip-hop": "Hip Hop",
-    "latino": "Latin",
-    "latina": "Latin",
-    "reggae": "Reggae",
-}
-
-def canonical_name(name: str) -> str:
-    """Converte um nome para a forma canónica usando ALIASES."""
-    key = (name or "").strip()
-    low = key.lower()
-    return ALIASES.get(low, key)
+from services.genre_names import ALIASES, canonical_name  # noqa: F401  (re-export)
 
 def _mk_list(items: List[str]) -> str:
     return ", ".join(items) if items else "—"
@@ -523,20 +490,26 @@ _KB_DOWN: Dict[str, Set[str]] = {
     "Electronic": {"Synth-pop", "Dance-pop"},
 }
 
+def kb_edges() -> Set[Tuple[str, str]]:
+    """Todas as arestas curadas PAI → FILHO (_KB_DOWN ∪ _KB_UP invertido)."""
+    edges = {(p, c) for p, cs in _KB_DOWN.items() for c in cs}
+    edges |= {(p, c) for c, ps in _KB_UP.items() for p in ps}
+    return {(p, c) for p, c in edges if p != c}
+
+
+# índices fundidos (1× no import) → vizinhos sem percorrer os dois dicts por chamada
+_KB_PARENTS: Dict[str, Set[str]] = {}
+_KB_CHILDREN: Dict[str, Set[str]] = {}
+for _p, _c in kb_edges():
+    _KB_CHILDREN.setdefault(_p, set()).add(_c)
+    _KB_PARENTS.setdefault(_c, set()).add(_p)
+
+
 def kb_neighbors(genre: str) -> Tuple[List[str], List[str]]:
     """Pais/filhos curados para o género (se existir)."""
     g = canonical_name(genre)
-    parents = set(_KB_UP.get(g, set()))
-    for p, childs in _KB_DOWN.items():
-        if g in childs:
-            parents.add(p)
-
-    children = set(_KB_DOWN.get(g, set()))
-    for c, ups in _KB_UP.items():
-        if g in ups:
-            children.add(c)
-
-    parents.discard(g); children.discard(g)
+    parents = _KB_PARENTS.get(g, set())
+    children = _KB_CHILDREN.get(g, set())
     return sorted(parents, key=str.lower), sorted(children, key=str.lower)
 
 def build_kb_graph(focus: str, down_depth: int = 2, up_levels: int = 1):
@@ -553,7 +526,7 @@ def build_kb_graph(focus: str, down_depth: int = 2, up_levels: int = 1):
         u, d = dq.popleft()
         if d >= down_depth:
             continue
-        for v in sorted(_KB_DOWN.get(u, set())):
+        for v in sorted(_KB_CHILDREN.get(u, set())):
             nodes.update([u, v])
             links.append((u, v, 1))
             if v not in seen_down:
@@ -565,12 +538,7 @@ def build_kb_graph(focus: str, down_depth: int = 2, up_levels: int = 1):
     seen_up = set([f])
 
     def parents_of(x: str) -> Set[str]:
-        ups = set(_KB_UP.get(x, set()))
-        for p, childs in _KB_DOWN.items():
-            if x in childs:
-                ups.add(p)
-        ups.discard(x)
-        return ups
+        return _KB_PARENTS.get(x, set())
 
     while aq:
         u, d = aq.popleft()
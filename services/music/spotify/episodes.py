@@ -87,3 +87,73 @@ def list_episodes(show_id: str, market: str, *, limit: int = 10, offset: int = 0
         })
     items_sorted = sorted(items, key=_episode_date_key, reverse=True)
     return {"items": items_sorted}
+
+SHOWS_BATCH = 50  # máximo de ids por pedido em /v1/shows
+
+
+class IncompleteFeed(Exception):
+    """Algum lote falhou (ou não há token): `partial` tem o que chegou.
+    Levantada dentro de _shows_batch para o st.cache_data não guardar o resultado."""
+
+    def __init__(self, partial: dict):
+        super().__init__(f"{len(partial)} show(s) only")
+        self.partial = partial
+
+
+@st.cache_data(ttl=900, show_spinner=False)
+def _shows_batch(show_ids: tuple[str, ...], market: str) -> dict:
+    ids = [s for s in dict.fromkeys(show_ids or ()) if s]
+    if not ids:
+        return {}
+    tok = get_spotify_token_cached()
+    if not tok:
+        raise IncompleteFeed({})
+    headers = {"Authorization": f"Bearer {tok}"}
+    mk = norm_market(market, default=None)
+
+    out: dict = {}
+    failed = False
+    for i in range(0, len(ids), SHOWS_BATCH):
+        params = {"ids": ",".join(ids[i:i + SHOWS_BATCH])}
+        if mk:
+            params["market"] = mk
+        try:
+            r = requests.get("https://api.spotify.com/v1/shows", headers=headers, params=params, timeout=15)
+        except Exception:
+            failed = True
+            continue
+        if r.status_code != 200:
+            failed = True
+            continue
+        for sh in (r.json() or {}).get("shows") or []:
+            if not isinstance(sh, dict) or not sh.get("id"):
+                continue  # ids inválidos/indisponíveis no market vêm como null
+            imgs = sh.get("images") or []
+            out[sh["id"]] = {
+                "id": sh["id"],
+                "name": sh.get("name") or "",
+                "publisher": sh.get("publisher") or "",
+                "languages": sh.get("languages") or [],
+                "image": imgs[0]["url"] if imgs else "",
+                "url": (sh.get("external_urls") or {}).get("spotify") or "",
+                "total_episodes": int(sh.get("total_episodes") or 0),
+            }
+    if failed:
+        raise IncompleteFeed(out)
+    return out
+
+
+def shows_batch(show_ids: tuple[str, ...], market: str) -> dict:
+    """
+    Metadados de vários podcasts de uma vez (/v1/shows?ids=, lotes de 50, cache 15 min).
+    Retorna {show_id: {"id","name","publisher","languages","image","url","total_episodes"}}.
+    `total_episodes` chega para saber se há episódios novos desde a última visita.
+    Só respostas completas ficam em cache; com lotes falhados devolve o parcial.
+    """
+    try:
+        return _shows_batch(tuple(show_ids or ()), market)
+    except IncompleteFeed as e:
+        return e.partial
+
+
+shows_batch.clear = _shows_batch.clear  # "Refresh all" limpa a cache dos lotes
@@ -2,11 +2,10 @@
 from __future__ import annotations
 
 from typing import List, Dict, Tuple
-import re
-import unicodedata
 import requests
 import streamlit as st
 from services.music.spotify.auth import get_auth_header
+from services.genre_names import norm_label
 
 # ----------------------------
 # Seeds baseline (fallback)
@@ -43,23 +42,8 @@ EXTRA_GENRES_SYNONYMS: Dict[str, List[str]] = {
 }
 
 # -------- Normalização de rótulos --------
-def _strip_accents(s: str) -> str:
-    return unicodedata.normalize("NFKD", s).encode("ascii","ignore").decode("ascii")
-
-def normalize_label(s: str) -> str:
-    """
-    pt-PT friendly:
-    - remove acentos, põe em lower
-    - corta sufixos tipo " (Spotify seeds)"
-    - remove ' genre' no fim
-    - colapsa espaços
-    """
-    s0 = (s or "").strip()
-    s1 = _strip_accents(s0).lower()
-    s1 = re.sub(r"\s*\(.*?\)\s*$","", s1)
-    s1 = re.sub(r"\s+genre\s*$","", s1)
-    s1 = re.sub(r"\s+"," ", s1).strip()
-    return s1
+# pt-PT friendly: sem acentos, lower, sem " (Spotify seeds)"/" genre", espaços colapsados
+normalize_label = norm_label
 
 # -------- Spotify API: seeds dinâmicas --------
 @st.cache_data(ttl=86400, show_spinner=False)
@@ -1,84 +1,102 @@
 from __future__ import annotations
-from typing import List, Dict, Tuple
+from typing import Any, List, Dict, Tuple
+import threading
 import time
 import spotipy
 
-def find_or_create_playlist(sp: spotipy.Spotify, user_id: str, name: str, public: bool=True, description: str="") -> Dict:
-    """Procura playlist por nome exato; se não existir, cria."""
+from .resolver import key_of, resolve_many
+
+ADD_BATCH = 100            # máximo do endpoint playlist_add_items
+INDEX_TTL_S = 600          # índice nome → playlist do utilizador
+
+_index_lock = threading.Lock()
+_index: Dict[str, Tuple[float, Dict[str, Dict]]] = {}  # user_id → (ts, {nome casefold: playlist})
+
+
+def _name_key(name: str) -> str:
+    return (name or "").strip().casefold()
+
+
+def playlist_index(sp: spotipy.Spotify, user_id: str, refresh: bool = False) -> Dict[str, Dict]:
+    """{nome casefold: playlist} das playlists do utilizador; percorre as páginas
+    uma vez e reutiliza durante INDEX_TTL_S."""
+    with _index_lock:
+        hit = _index.get(user_id)
+        if hit and not refresh and time.monotonic() - hit[0] < INDEX_TTL_S:
+            return hit[1]
+    idx: Dict[str, Dict] = {}
     results = sp.current_user_playlists(limit=50)
     while results:
-        for pl in results.get("items", []):
-            if (pl.get("name") or "").strip().casefold() == (name or "").strip().casefold():
-                return pl
-        next_url = results.get("next")
-        if not next_url:
+        for pl in results.get("items", []) or []:
+            if pl:
+                idx.setdefault(_name_key(pl.get("name")), pl)
+        if not results.get("next"):
             break
         results = sp.next(results)
-    return sp.user_playlist_create(user=user_id, name=name, public=public, description=description)
-
-def _mk_queries(title: str, artist: str):
-    """Gera algumas queries para melhorar o matching de faixas."""
-    t = (title or "").strip()
-    a = (artist or "").strip()
-    return [
-        f'track:"{t}" artist:"{a}"',
-        f'{t} {a}',
-        f'"{t}" {a}',
-    ]
-
-def _best_track_from_search(sp: spotipy.Spotify, q: str):
-    res = sp.search(q=q, type="track", limit=3)
-    items = (res.get("tracks") or {}).get("items") or []
-    if not items:
-        return None
-    return items[0]
+    with _index_lock:
+        _index[user_id] = (time.monotonic(), idx)
+    return idx
+
+
+def find_or_create_playlist(sp: spotipy.Spotify, user_id: str, name: str, public: bool=True, description: str="") -> Dict:
+    """Procura playlist por nome exato (índice em cache); se não existir, cria."""
+    pl = playlist_index(sp, user_id).get(_name_key(name))
+    if pl:
+        return pl
+    # pode ter sido criada noutro lado desde a última leitura
+    pl = playlist_index(sp, user_id, refresh=True).get(_name_key(name))
+    if pl:
+        return pl
+    pl = sp.user_playlist_create(user=user_id, name=name, public=public, description=description)
+    with _index_lock:
+        if user_id in _index:
+            _index[user_id][1][_name_key(name)] = pl
+    return pl
+
 
 def resolve_track_uri(sp: spotipy.Spotify, title: str, artist: str) -> str | None:
-    for q in _mk_queries(title, artist):
-        tr = _best_track_from_search(sp, q)
-        if not tr:
-            continue
-        name = (tr.get("name") or "").strip().casefold()
-        arts = ", ".join([a.get("name","") for a in (tr.get("artists") or [])]).strip().casefold()
-        if (title or "").strip().casefold() in name and (artist or "").strip().casefold() in arts:
-            return tr.get("uri")
-        # fallback (melhor esforço)
-        return tr.get("uri")
-    return None
+    return resolve_many(sp, [(title, artist)]).get(key_of(title, artist))
+
 
 def _chunked(seq: List[str], n: int) -> List[List[str]]:
     return [seq[i:i+n] for i in range(0, len(seq), n)]
 
-def push_playlist_from_rows(sp: spotipy.Spotify, rows: List[Dict], playlist_name: str, public: bool=True) -> Tuple[str, int, int]:
+
+def _row_fields(r: Dict[str, Any]) -> Tuple[str, str, str]:
+    """(uri, título, artista) de uma linha CSV (Title/Artist/TrackURI…) ou da sessão (name/artists/uri…)."""
+    keys = {str(k).lower(): v for k, v in r.items()}
+    uri = keys.get("trackuri") or keys.get("uri") or ""
+    tid = keys.get("trackid") or keys.get("id") or ""
+    if not uri and tid:
+        uri = f"spotify:track:{tid}"
+    title = keys.get("title") or keys.get("track") or keys.get("song") or keys.get("name") or ""
+    artist = keys.get("artist") or keys.get("artists") or ""
+    return str(uri).strip(), str(title).strip(), str(artist).strip()
+
+
+def push_playlist_from_rows(sp: spotipy.Spotify, rows: List[Dict], playlist_name: str, public: bool=True,
+                            description: str="") -> Tuple[str, int, int]:
     """
-    rows: lista de dicts com pelo menos 'Title' e 'Artist'
+    rows: lista de dicts com 'TrackURI'/'TrackID' ou pelo menos 'Title' e 'Artist'
     Retorna: (playlist_id, matched, missing)
     """
     user_id = sp.me()["id"]
-    pl = find_or_create_playlist(sp, user_id, playlist_name, public=public)
+    pl = find_or_create_playlist(sp, user_id, playlist_name, public=public, description=description)
     pl_id = pl["id"]
 
-    # normalizar
-    norm_rows = []
-    for r in rows:
-        keys = {str(k).lower(): v for k, v in r.items()}
-        title = keys.get("title") or keys.get("track") or keys.get("song") or r.get("Title") or r.get("Track")
-        artist = keys.get("artist") or keys.get("artists") or r.get("Artist") or r.get("Artists")
-        if title and artist:
-            norm_rows.append({"Title": str(title), "Artist": str(artist)})
+    fields = [_row_fields(r) for r in rows or []]
+    resolved = resolve_many(sp, [(t, a) for uri, t, a in fields if not uri and t])
 
     uris = []
     misses = 0
-    for it in norm_rows:
-        uri = resolve_track_uri(sp, it["Title"], it["Artist"])
+    for uri, title, artist in fields:
+        uri = uri or (resolved.get(key_of(title, artist)) if title else None)
         if uri:
             uris.append(uri)
         else:
             misses += 1
-        if (len(uris) % 20) == 0:
-            time.sleep(0.2)  # respeitar API rate-limits
 
-    for batch in _chunked(uris, 100):
+    for batch in _chunked(uris, ADD_BATCH):
         sp.playlist_add_items(pl_id, batch)
 
     return pl_id, len(uris), misses
@@ -8,11 +8,12 @@
 
 from __future__ import annotations
 from typing import Optional, Dict, List, Tuple
-import unicodedata
 import re
 import time
 import requests
 
+from services.genre_names import fold, strip_accents
+
 # ================== Cache simples (só acertos) ==================
 _cache: Dict[str, Tuple[float, dict | None]] = {}
 _CACHE_TTL = 6 * 3600  # 6 horas
@@ -34,15 +35,9 @@ def clear_spotify_radio_cache():
     _cache.clear()
 
 # ================== Utils ==================
-def _norm(s: str) -> str:
-    """Remove acentos (útil para equivalências PT/EN)."""
-    if s is None:
-        return ""
-    return unicodedata.normalize("NFKD", str(s)).encode("ascii", "ignore").decode("ascii")
-
-def _cf(s: str) -> str:
-    """casefold sobre texto sem acentos."""
-    return _norm(s).casefold()
+# remover acentos / casefold sem acentos (equivalências PT/EN), com cache por texto
+_norm = strip_accents
+_cf = fold
 
 def _word_in_text(word: str, text: str) -> bool:
     """Match por palavra inteira (casefold + sem acentos)."""
@@ -0,0 +1,174 @@
+# services/music/spotify/resolver.py
+# -----------------------------------------------------------------------------
+# (título, artista) → URI de faixa no Spotify
+# - pesquisas em paralelo (ThreadPoolExecutor) sob um limite de pedidos/s
+#   partilhado por todas as threads
+# - resultados persistidos em SQLite (music/data/track_uris.db), chave =
+#   (título normalizado, artista normalizado); falhas também ficam gravadas
+#   (uri = '') e só voltam a ser pesquisadas ao fim de MISS_TTL_DAYS
+# - entradas repetidas no mesmo pedido fazem uma única pesquisa
+# -----------------------------------------------------------------------------
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import spotipy
+
+from services.common.paths import MUSIC_DATA
+from services.common.ratelimit import RateLimiter
+
+DB_PATH = MUSIC_DATA / "track_uris.db"
+SEARCH_RATE = 10.0    # pesquisas/s (todas as threads)
+WORKERS = 8
+MISS_TTL_DAYS = 30
+
+_limiter = RateLimiter(SEARCH_RATE, burst=WORKERS)
+_init_lock = threading.Lock()
+_initialized: set[str] = set()
+
+Key = Tuple[str, str]
+
+
+def norm(s) -> str:
+    """minúsculas, sem acentos, só letras/dígitos."""
+    s = unicodedata.normalize("NFKD", str(s or "").lower())
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    return re.sub(r"[\W_]+", " ", s).strip()
+
+
+def key_of(title: str, artist: str) -> Key:
+    return norm(title), norm(artist)
+
+
+# ======================
+# Cache persistente
+# ======================
+@contextmanager
+def connect(path: Path | None = None) -> Iterator[sqlite3.Connection]:
+    path = Path(path or DB_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(str(path), timeout=10)
+    try:
+        key = str(path.resolve())
+        if key not in _initialized:
+            with _init_lock:
+                if key not in _initialized:
+                    con.execute(
+                        "CREATE TABLE IF NOT EXISTS resolved ("
+                        " title TEXT NOT NULL, artist TEXT NOT NULL,"
+                        " uri TEXT NOT NULL DEFAULT '', resolved_at REAL NOT NULL,"
+                        " PRIMARY KEY (title, artist))"
+                    )
+                    con.execute("PRAGMA journal_mode=WAL")
+                    con.commit()
+                    _initialized.add(key)
+        con.execute("PRAGMA synchronous=NORMAL")
+        with con:
+            yield con
+    finally:
+        con.close()
+
+
+def cached(keys: Iterable[Key], path: Path | None = None) -> Dict[Key, str]:
+    """{key: uri} do que já foi resolvido ('' = falha recente). Falhas antigas são omitidas."""
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return {}
+    miss_cutoff = time.time() - MISS_TTL_DAYS * 86400
+    out: Dict[Key, str] = {}
+    with connect(path) as con:
+        for i in range(0, len(keys), 400):  # 2 parâmetros/chave, limite SQLite 999
+            chunk = keys[i:i + 400]
+            where = " OR ".join(["(title = ? AND artist = ?)"] * len(chunk))
+            params = [v for k in chunk for v in k]
+            for t, a, uri, ts in con.execute(
+                f"SELECT title, artist, uri, resolved_at FROM resolved WHERE {where}", params
+            ):
+                if uri or ts >= miss_cutoff:
+                    out[(t, a)] = uri
+    return out
+
+
+def remember(results: Dict[Key, str | None], path: Path | None = None) -> None:
+    if not results:
+        return
+    now = time.time()
+    with connect(path) as con:
+        con.executemany(
+            "INSERT OR REPLACE INTO resolved (title, artist, uri, resolved_at) VALUES (?, ?, ?, ?)",
+            [(t, a, uri or "", now) for (t, a), uri in results.items()],
+        )
+
+
+# ======================
+# Pesquisa
+# ======================
+def _mk_queries(title: str, artist: str) -> List[str]:
+    """Gera algumas queries para melhorar o matching de faixas."""
+    t = (title or "").strip()
+    a = (artist or "").strip()
+    if not a:
+        return [f'track:"{t}"', t]
+    return [
+        f'track:"{t}" artist:"{a}"',
+        f'{t} {a}',
+        f'"{t}" {a}',
+    ]
+
+
+def search_track_uri(sp: spotipy.Spotify, title: str, artist: str) -> str | None:
+    """Primeira query com resultados; entre os 3 primeiros prefere o que bate
+    título e artista, senão fica o primeiro (melhor esforço)."""
+    nt, na = key_of(title, artist)
+    for q in _mk_queries(title, artist):
+        _limiter.wait()
+        res = sp.search(q=q, type="track", limit=3)
+        items = [it for it in ((res or {}).get("tracks") or {}).get("items") or [] if it]
+        if not items:
+            continue
+        for tr in items:
+            name = norm(tr.get("name"))
+            arts = norm(" ".join(a.get("name", "") for a in (tr.get("artists") or [])))
+            if nt in name and na in arts:
+                return tr.get("uri")
+        return items[0].get("uri")
+    return None
+
+
+def resolve_many(sp: spotipy.Spotify, pairs: Iterable[Tuple[str, str]], *,
+                 workers: int = WORKERS, path: Path | None = None) -> Dict[Key, str | None]:
+    """
+    {key_of(título, artista): uri | None} para todos os pares.
+    Cache primeiro; o resto é pesquisado em paralelo e gravado (falhas incluídas).
+    Erros de rede não ficam gravados (voltam a ser tentados no próximo envio).
+    """
+    todo: Dict[Key, Tuple[str, str]] = {}
+    for title, artist in pairs:
+        k = key_of(title, artist)
+        if k[0]:
+            todo.setdefault(k, (title, artist))
+    out: Dict[Key, str | None] = {k: (u or None) for k, u in cached(todo, path).items()}
+    pending = [k for k in todo if k not in out]
+    if not pending:
+        return out
+
+    found: Dict[Key, str | None] = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(pending)))) as ex:
+        futs = {ex.submit(search_track_uri, sp, *todo[k]): k for k in pending}
+        for fut in as_completed(futs):
+            k = futs[fut]
+            try:
+                found[k] = fut.result()
+            except Exception:
+                out[k] = None
+    remember(found, path)
+    out.update(found)
+    return out
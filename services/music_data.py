@@ -0,0 +1,61 @@
+# services/music_data.py
+# -----------------------------------------------------------------------------
+# Music4all · Artefacto compilado (music/data/music_compiled.json)
+# Gerado por scripts/build_music_data.py; a app lê-o diretamente em vez de
+# re-derivar índices a partir dos CSV. Se não existir, devolve {} e as páginas
+# usam os caminhos antigos (CSV).
+# -----------------------------------------------------------------------------
+from __future__ import annotations
+
+import json
+import os
+from typing import Dict, List, Set, Tuple
+
+import streamlit as st
+
+from services.common.paths import MUSIC_DATA
+
+COMPILED_PATH = MUSIC_DATA / "music_compiled.json"
+COMPILED_FORMAT = 1
+
+
+@st.cache_resource(show_spinner=False)
+def _load_compiled(path: str, mtime: float) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except Exception:
+        return {}
+    return data if data.get("format") == COMPILED_FORMAT else {}
+
+
+def load_compiled() -> dict:
+    """Artefacto completo (recarrega quando o ficheiro muda de mtime)."""
+    try:
+        mtime = os.path.getmtime(COMPILED_PATH)
+    except OSError:
+        return {}
+    return _load_compiled(str(COMPILED_PATH), mtime)
+
+
+def compiled_edges(sources: List[str] | None = None) -> Set[Tuple[str, str]]:
+    """Arestas (parent, child) do grafo fundido; filtra por fonte se indicado."""
+    g = load_compiled().get("graph") or {}
+    nodes = g.get("nodes") or []
+    if not nodes:
+        return set()
+    mask = 0
+    if sources:
+        names = g.get("sources") or []
+        mask = sum(1 << names.index(s) for s in sources if s in names)
+    return {(nodes[p], nodes[c]) for p, c, bits, *_ in g.get("edges", [])
+            if not mask or bits & mask}
+
+
+def compiled_snapshot() -> Dict[str, dict]:
+    return load_compiled().get("snapshot") or {}
+
+
+def compiled_search() -> dict:
+    """{'paths': [[...]], 'keys': ['a / b', ...], 'urls': {'A / B': url}}"""
+    return load_compiled().get("search") or {}
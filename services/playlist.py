@@ -1,21 +1,96 @@
 
 from __future__ import annotations
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List
+
 import streamlit as st
 from .ui_helpers import ms_to_mmss
 
+# Modelo por sessão: cada playlist guarda só a lista de IDs ('ids') e um set
+# persistente ('seen') para dedupe; os metadados das faixas vivem numa LRU
+# partilhada pelo processo (a mesma faixa em várias sessões ocupa 1 entrada).
+# Faixas sem ID (ex.: CSV sem TrackID) usam playlist_store.track_key como ID.
+# 'changed' marca playlists mexidas nesta sessão: só essas (ou as não vazias)
+# são gravadas — uma playlist esvaziada também tem de chegar à store.
+
+TRACK_FIELDS = ("id", "uri", "name", "artists", "album", "duration_ms", "external_url", "preview_url")
+TRACK_CACHE_SIZE = 50_000
+
+
+class _TrackLRU:
+    """ID → metadados (só TRACK_FIELDS), partilhado entre sessões/threads."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._d: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, tid: str, meta: Dict[str, Any]) -> None:
+        """Junta com o que já existe (uma fonte mais pobre não apaga campos)."""
+        with self._lock:
+            old = self._d.get(tid)
+            self._d[tid] = {**old, **meta} if old else meta
+            self._d.move_to_end(tid)
+            while len(self._d) > self.maxsize:
+                self._d.popitem(last=False)
+
+    def get_many(self, ids: Iterable[str]) -> List[Dict[str, Any]]:
+        out = []
+        with self._lock:
+            for tid in ids:
+                meta = self._d.get(tid)
+                if meta is not None:
+                    self._d.move_to_end(tid)
+                out.append(meta)
+        return out
+
+
+_tracks = _TrackLRU(TRACK_CACHE_SIZE)
+
+
+def _track_id(t: Dict[str, Any]) -> str:
+    tid = str((t or {}).get('id') or '').strip()
+    if tid:
+        return tid
+    if not (t or {}).get('name'):
+        return ''
+    from .playlist_store import track_key
+    return track_key(t)
+
+
+def _slim(tid: str, t: Dict[str, Any]) -> Dict[str, Any]:
+    """Só campos preenchidos (sem 'id' vazio): no put() uma fonte sem ID não
+    apaga o ID vindo de outra."""
+    return {k: t.get(k) for k in TRACK_FIELDS if t.get(k) not in (None, '')}
+
+
+def _stub(tid: str) -> Dict[str, Any]:
+    """Metadados mínimos quando a LRU já despejou a faixa ('_stub': ao gravar,
+    playlist_store.replace_playlist mantém os campos já gravados dessa faixa)."""
+    if tid.startswith('spotify:'):
+        return {'id': tid.rsplit(':', 1)[-1], 'uri': tid, '_stub': True}
+    if tid.startswith('t:'):
+        name, _, rest = tid[2:].partition('|')
+        artists, _, album = rest.partition('|')
+        return {'name': name, 'artists': artists, 'album': album, '_stub': True}
+    return {'id': tid, 'uri': f'spotify:track:{tid}',
+            'external_url': f'https://open.spotify.com/track/{tid}', '_stub': True}
+
+
+def _new_playlist() -> Dict[str, Any]:
+    return {'public': True, 'description': '', 'ids': [], 'seen': set(), 'changed': False}
+
 def _ensure_bootstrap():
     if 'playlists' not in st.session_state:
-        st.session_state['playlists'] = {
-            'My Playlist': {'public': True, 'description': '', 'tracks': []}
-        }
+        st.session_state['playlists'] = {'My Playlist': _new_playlist()}
         st.session_state['current_playlist'] = 'My Playlist'
 
 def ensure_playlist(name: str):
     _ensure_bootstrap()
     pls = st.session_state['playlists']
     if name not in pls:
-        pls[name] = {'public': True, 'description': '', 'tracks': []}
-    st.session_state['playlists'] = pls
+        pls[name] = _new_playlist()
 
 def list_playlists() -> list[str]:
     _ensure_bootstrap()
@@ -32,58 +107,80 @@ def set_current_playlist(name: str):
     ensure_playlist(name)
     st.session_state['current_playlist'] = name
 
+def playlist_tracks(name: str | None = None) -> list[dict]:
+    """Faixas (cópias dos metadados) de uma playlist; omissão = a atual."""
+    _ensure_bootstrap()
+    pls = st.session_state['playlists']
+    pl = pls.get(name) if name is not None else get_current_playlist()[1]
+    if not pl:
+        return []
+    ids = pl['ids']
+    return [dict(m) if m is not None else _stub(tid) for tid, m in zip(ids, _tracks.get_many(ids))]
+
+def session_playlists(changed_only: bool = False) -> dict[str, list[dict]]:
+    """Playlists da sessão como {nome: faixas} (não mexe na seleção atual).
+    changed_only: só as mexidas nesta sessão ou não vazias (o que há para gravar;
+    a 'My Playlist' vazia do arranque não apaga uma gravada com o mesmo nome)."""
+    _ensure_bootstrap()
+    pls = st.session_state['playlists']
+    return {nm: playlist_tracks(nm) for nm, pl in pls.items()
+            if not changed_only or pl.get('changed') or pl['ids']}
+
 def add_tracks_to_playlist(name: str, tracks: list[dict]):
+    """O(len(tracks)): o set 'seen' da playlist trata do dedupe."""
     _ensure_bootstrap()
     ensure_playlist(name)
-    pls = st.session_state['playlists']
-    cur = pls[name]['tracks']
-    seen = {t.get('id') for t in cur if t.get('id')}
+    pl = st.session_state['playlists'][name]
+    ids, seen = pl['ids'], pl['seen']
     for t in tracks or []:
-        tid = (t or {}).get('id')
-        if tid and tid not in seen:
-            cur.append(t)
+        tid = _track_id(t)
+        if not tid:
+            continue
+        _tracks.put(tid, _slim(tid, t))
+        if tid not in seen:
+            ids.append(tid)
             seen.add(tid)
-    pls[name]['tracks'] = cur
-    st.session_state['playlists'] = pls
+            pl['changed'] = True
 
 def remove_track_at(idx: int):
     _ensure_bootstrap()
     pname, pl = get_current_playlist()
-    if 0 <= idx < len(pl['tracks']):
-        del pl['tracks'][idx]
+    if 0 <= idx < len(pl['ids']):
+        pl['seen'].discard(pl['ids'].pop(idx))
+        pl['changed'] = True
 
 def move_track(idx: int, delta: int):
     _ensure_bootstrap()
     pname, pl = get_current_playlist()
+    ids = pl['ids']
     j = idx + delta
-    if 0 <= idx < len(pl['tracks']) and 0 <= j < len(pl['tracks']):
-        pl['tracks'][idx], pl['tracks'][j] = pl['tracks'][j], pl['tracks'][idx]
+    if 0 <= idx < len(ids) and 0 <= j < len(ids):
+        ids[idx], ids[j] = ids[j], ids[idx]
+        pl['changed'] = True
 
 def clear_playlist():
     _ensure_bootstrap()
     pname, pl = get_current_playlist()
-    pl['tracks'].clear()
+    pl['ids'].clear()
+    pl['seen'].clear()
+    pl['changed'] = True
 
 def dedupe_playlist():
+    """As inserções já garantem IDs únicos; só reconstrói se o invariante falhar."""
     _ensure_bootstrap()
     pname, pl = get_current_playlist()
-    seen, out = set(), []
-    for t in pl['tracks']:
-        tid = t.get('id')
-        if not tid or tid in seen:
-            continue
-        seen.add(tid)
-        out.append(t)
-    pl['tracks'] = out
+    if len(pl['ids']) == len(pl['seen']):
+        return
+    pl['ids'] = list(dict.fromkeys(pl['ids']))
+    pl['seen'] = set(pl['ids'])
 
 def export_playlist_csv() -> str:
     import io, csv
     _ensure_bootstrap()
-    pname, pl = get_current_playlist()
     buf = io.StringIO()
     w = csv.writer(buf, delimiter=';')
     w.writerow(["Title","Artists","Album","Duration","TrackID","TrackURI","TrackURL"])
-    for t in pl['tracks']:
+    for t in playlist_tracks():
         w.writerow([t.get('name',''), t.get('artists',''), t.get('album',''),
                     ms_to_mmss(t.get('duration_ms',0)), t.get('id',''),
                     t.get('uri',''), t.get('external_url','')])
@@ -91,5 +188,5 @@ def export_playlist_csv() -> str:
 
 def export_playlist_m3u() -> str:
     _ensure_bootstrap()
-    urls = [t.get('external_url','') for t in get_current_playlist()[1]['tracks'] if t.get('external_url')]
+    urls = [t.get('external_url','') for t in playlist_tracks() if t.get('external_url')]
     return "#EXTM3U\n" + "\n".join(urls)
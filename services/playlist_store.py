@@ -0,0 +1,333 @@
+# services/playlist_store.py
+# -----------------------------------------------------------------------------
+# Music4all · Persistência das playlists (SQLite, music/data/playlists.db)
+# - índice único (playlist, key) com key = TrackURI (ou título|artistas|álbum
+#   quando não há URI) → append = INSERT OR IGNORE, custo O(linhas novas)
+# - cada playlist lê-se sozinha (índice por playlist/pos), sem parsear as outras
+# - compactação (checkpoint do WAL + incremental_vacuum + optimize) corre numa
+#   thread de background, no máximo uma vez a cada COMPACT_EVERY_S
+# - na primeira utilização importa os CSVs antigos (PLAYLISTS_CSV_PATH dos
+#   secrets, como o autosave antigo, e playlist.csv / playlists.csv)
+# -----------------------------------------------------------------------------
+from __future__ import annotations
+
+import csv
+import io
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List
+
+import pandas as pd
+
+from services.common.paths import MUSIC_DATA, ROOT
+
+DB_PATH = MUSIC_DATA / "playlists.db"
+LEGACY_CSVS = [ROOT / "playlist.csv", ROOT / "playlists.csv", Path("playlist.csv"), Path("playlists.csv")]
+CSV_COLS = ["PlaylistName", "Title", "Artists", "Album", "Duration", "TrackID", "TrackURI", "TrackURL"]
+COMPACT_EVERY_S = 300
+
+_init_lock = threading.Lock()
+_initialized: set[str] = set()
+_compact_lock = threading.Lock()
+_last_compact = 0.0
+
+
+# ======================
+# Ligação / esquema
+# ======================
+def _create_schema(con: sqlite3.Connection) -> None:
+    con.execute("PRAGMA auto_vacuum=INCREMENTAL")  # só tem efeito numa BD nova
+    con.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS playlists ("
+        " name TEXT PRIMARY KEY, updated_at REAL NOT NULL DEFAULT 0)"
+    )
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS tracks ("
+        " playlist TEXT NOT NULL, pos INTEGER NOT NULL, key TEXT NOT NULL,"
+        " track_id TEXT NOT NULL DEFAULT '', uri TEXT NOT NULL DEFAULT '',"
+        " name TEXT NOT NULL DEFAULT '', artists TEXT NOT NULL DEFAULT '',"
+        " album TEXT NOT NULL DEFAULT '', duration_ms INTEGER NOT NULL DEFAULT 0,"
+        " url TEXT NOT NULL DEFAULT '')"
+    )
+    con.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_tracks_key ON tracks(playlist, key)")
+    con.execute("CREATE INDEX IF NOT EXISTS ix_tracks_pos ON tracks(playlist, pos)")
+
+
+@contextmanager
+def connect(path: Path | None = None) -> Iterator[sqlite3.Connection]:
+    path = Path(path or DB_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(str(path), timeout=10)
+    try:
+        key = str(path.resolve())
+        if key not in _initialized:
+            with _init_lock:
+                if key not in _initialized:
+                    _create_schema(con)
+                    con.execute("PRAGMA journal_mode=WAL")
+                    con.commit()
+                    _import_legacy(con)
+                    _initialized.add(key)
+        con.execute("PRAGMA synchronous=NORMAL")
+        with con:
+            yield con
+    finally:
+        con.close()
+
+
+# ======================
+# Conversões
+# ======================
+def _s(v) -> str:
+    if v is None:
+        return ""
+    try:
+        if pd.isna(v):
+            return ""
+    except (TypeError, ValueError):
+        pass
+    return str(v).strip()
+
+
+def _mmss_to_ms(v) -> int:
+    s = _s(v)
+    if not s:
+        return 0
+    try:
+        if ":" in s:
+            m, sec = s.split(":", 1)
+            return (int(m) * 60 + int(float(sec))) * 1000
+        return int(float(s))
+    except ValueError:
+        return 0
+
+
+def track_key(t: Dict[str, Any]) -> str:
+    """URI quando existe; senão título|artistas|álbum (mesmo critério do autosave antigo)."""
+    uri = _s(t.get("uri"))
+    if uri:
+        return uri
+    return "t:" + "|".join(_s(t.get(k)).casefold() for k in ("name", "artists", "album"))
+
+
+def from_csv_row(r: Dict[str, Any]) -> Dict[str, Any]:
+    """Linha CSV (Title/Artists/…/TrackURI) → formato interno da sessão."""
+    dur = r.get("duration_ms")
+    return {
+        "id": _s(r.get("TrackID") or r.get("id")),
+        "uri": _s(r.get("TrackURI") or r.get("uri")),
+        "name": _s(r.get("Title") or r.get("name")),
+        "artists": _s(r.get("Artists") or r.get("artists")),
+        "album": _s(r.get("Album") or r.get("album")),
+        "duration_ms": int(dur) if _s(dur).isdigit() else _mmss_to_ms(r.get("Duration")),
+        "external_url": _s(r.get("TrackURL") or r.get("external_url")),
+    }
+
+
+def _row_params(name: str, pos: int, t: Dict[str, Any]) -> tuple:
+    return (name, pos, track_key(t), _s(t.get("id")), _s(t.get("uri")), _s(t.get("name")),
+            _s(t.get("artists")), _s(t.get("album")), int(t.get("duration_ms") or 0),
+            _s(t.get("external_url")))
+
+
+_INSERT = ("INSERT OR IGNORE INTO tracks (playlist, pos, key, track_id, uri, name, artists,"
+           " album, duration_ms, url) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+def _touch(con: sqlite3.Connection, name: str) -> None:
+    con.execute("INSERT INTO playlists (name, updated_at) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET updated_at = excluded.updated_at",
+                (name, time.time()))
+
+
+# ======================
+# API
+# ======================
+def list_names(path: Path | None = None) -> List[str]:
+    with connect(path) as con:
+        return [r[0] for r in con.execute("SELECT name FROM playlists ORDER BY name")]
+
+
+def load_playlist(name: str, path: Path | None = None) -> List[Dict[str, Any]]:
+    """Faixas de UMA playlist, pela ordem gravada."""
+    with connect(path) as con:
+        rows = con.execute(
+            "SELECT track_id, uri, name, artists, album, duration_ms, url"
+            " FROM tracks WHERE playlist = ? ORDER BY pos", (name,)
+        ).fetchall()
+    return [{"id": a, "uri": b, "name": c, "artists": d, "album": e,
+             "duration_ms": f, "external_url": g} for a, b, c, d, e, f, g in rows]
+
+
+def append_tracks(name: str, tracks: Iterable[Dict[str, Any]], path: Path | None = None) -> int:
+    """Acrescenta no fim; duplicados (mesma key) são ignorados. Devolve nº inserido."""
+    tracks = list(tracks or [])
+    if not tracks:
+        return 0
+    with connect(path) as con:
+        pos = con.execute("SELECT COALESCE(MAX(pos), 0) FROM tracks WHERE playlist = ?",
+                          (name,)).fetchone()[0]
+        before = con.total_changes
+        con.executemany(_INSERT, (_row_params(name, pos + i + 1, t) for i, t in enumerate(tracks)))
+        added = con.total_changes - before
+        _touch(con, name)
+    _maybe_compact(path)
+    return added
+
+
+_META_COLS = (("id", "track_id"), ("uri", "uri"), ("name", "name"), ("artists", "artists"),
+              ("album", "album"), ("duration_ms", "duration_ms"), ("external_url", "url"))
+
+
+def _keep_stored(con: sqlite3.Connection, name: str, tracks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Faixas com campos em falta (ex.: stubs da sessão depois de a LRU despejar os
+    metadados) herdam o que já está gravado para a mesma key — nunca se grava um
+    registo mais pobre por cima de um completo."""
+    if all(_s(t.get("name")) and not t.get("_stub") for t in tracks):
+        return tracks
+    cols = ", ".join(c for _, c in _META_COLS)
+    stored = {r[0]: r[1:] for r in con.execute(
+        f"SELECT key, {cols} FROM tracks WHERE playlist = ?", (name,))}
+    out = []
+    for t in tracks:
+        row = stored.get(track_key(t))
+        if row is not None:
+            have = {f: v for (f, _), v in zip(_META_COLS, row) if v not in (None, "", 0)}
+            mine = {k: v for k, v in t.items() if v not in (None, "", 0)}
+            # stub: o gravado ganha (o stub só tem texto derivado da key)
+            t = {**mine, **have} if t.get("_stub") else {**have, **mine}
+        out.append(t)
+    return out
+
+
+def replace_playlist(name: str, tracks: Iterable[Dict[str, Any]], path: Path | None = None) -> int:
+    """Substitui o conteúdo de UMA playlist (as outras não são tocadas); uma lista
+    vazia esvazia-a. Campos em falta mantêm o valor já gravado (ver _keep_stored)."""
+    tracks = list(tracks or [])
+    with connect(path) as con:
+        tracks = _keep_stored(con, name, tracks)
+        con.execute("DELETE FROM tracks WHERE playlist = ?", (name,))
+        before = con.total_changes
+        con.executemany(_INSERT, (_row_params(name, i + 1, t) for i, t in enumerate(tracks)))
+        n = con.total_changes - before
+        _touch(con, name)
+    _maybe_compact(path)
+    return n
+
+
+def delete_playlist(name: str, path: Path | None = None) -> None:
+    with connect(path) as con:
+        con.execute("DELETE FROM tracks WHERE playlist = ?", (name,))
+        con.execute("DELETE FROM playlists WHERE name = ?", (name,))
+    _maybe_compact(path)
+
+
+# ======================
+# Compactação (background)
+# ======================
+def compact(path: Path | None = None) -> None:
+    with connect(path) as con:
+        con.execute("PRAGMA incremental_vacuum")
+        con.execute("PRAGMA optimize")
+    con = sqlite3.connect(str(path or DB_PATH), timeout=10)
+    try:
+        con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        con.close()
+
+
+def _maybe_compact(path: Path | None = None) -> None:
+    global _last_compact
+    now = time.monotonic()
+    if now - _last_compact < COMPACT_EVERY_S or not _compact_lock.acquire(blocking=False):
+        return
+    _last_compact = now
+
+    def _run():
+        try:
+            compact(path)
+        except sqlite3.Error:
+            pass
+        finally:
+            _compact_lock.release()
+
+    threading.Thread(target=_run, name="playlist-compact", daemon=True).start()
+
+
+# ======================
+# CSV (import/export)
+# ======================
+def read_csv_text(text: str) -> pd.DataFrame:
+    """Aceita ';' ou ',' (exportamos com ';')."""
+    try:
+        df = pd.read_csv(io.StringIO(text), sep=";", dtype=str, keep_default_na=False)
+        if df.shape[1] == 1:
+            raise ValueError
+    except Exception:
+        df = pd.read_csv(io.StringIO(text), sep=",", dtype=str, keep_default_na=False)
+    return df
+
+
+def csv_to_playlists(df: pd.DataFrame, default_name: str = "My Playlist") -> Dict[str, List[Dict[str, Any]]]:
+    """DataFrame CSV → {nome: [faixas]} (colunas case-insensitive)."""
+    cols = {c.lower(): c for c in df.columns}
+    want = {"playlistname": "PlaylistName", "title": "Title", "artists": "Artists", "album": "Album",
+            "duration": "Duration", "trackid": "TrackID", "trackuri": "TrackURI", "trackurl": "TrackURL"}
+    df = df.rename(columns={cols[k]: v for k, v in want.items() if k in cols})
+    if "Title" not in df.columns:
+        return {}
+    names = (df["PlaylistName"].astype(str).str.strip().replace("", default_name)
+             if "PlaylistName" in df.columns else pd.Series(default_name, index=df.index))
+    out: Dict[str, List[Dict[str, Any]]] = {}
+    for nm, rec in zip(names.tolist(), df.to_dict("records")):
+        out.setdefault(nm, []).append(from_csv_row(rec))
+    return out
+
+
+def export_csv(names: Iterable[str] | None = None, path: Path | None = None) -> str:
+    from services.ui_helpers import ms_to_mmss
+    buf = io.StringIO()
+    w = csv.writer(buf, delimiter=";")
+    w.writerow(CSV_COLS)
+    for nm in (names if names is not None else list_names(path)):
+        for t in load_playlist(nm, path):
+            w.writerow([nm, t["name"], t["artists"], t["album"], ms_to_mmss(t["duration_ms"]),
+                        t["id"], t["uri"], t["external_url"]])
+    return buf.getvalue()
+
+
+def _legacy_csvs() -> List[Path]:
+    """CSV antigos: o de st.secrets['PLAYLISTS_CSV_PATH'] (se houver) + LEGACY_CSVS."""
+    try:
+        import streamlit as st
+        custom = st.secrets.get("PLAYLISTS_CSV_PATH", "")
+    except Exception:
+        custom = ""
+    return ([Path(custom)] if custom else []) + LEGACY_CSVS
+
+
+def _import_legacy(con: sqlite3.Connection) -> None:
+    if con.execute("SELECT 1 FROM meta WHERE key = 'imported_csv'").fetchone():
+        return
+    seen = set()
+    for p in _legacy_csvs():
+        try:
+            rp = p.resolve()
+            if rp in seen or not rp.exists():
+                continue
+            seen.add(rp)
+            pls = csv_to_playlists(read_csv_text(rp.read_text(encoding="utf-8", errors="ignore")))
+        except Exception:
+            continue
+        for nm, tracks in pls.items():
+            pos = con.execute("SELECT COALESCE(MAX(pos), 0) FROM tracks WHERE playlist = ?",
+                              (nm,)).fetchone()[0]
+            con.executemany(_INSERT, (_row_params(nm, pos + i + 1, t) for i, t in enumerate(tracks)))
+            _touch(con, nm)
+    con.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('imported_csv', ?)",
+                (";".join(str(p) for p in sorted(seen)),))
+    con.commit()
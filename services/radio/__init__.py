@@ -0,0 +1 @@
+# package marker — sem re-exports
@@ -0,0 +1,93 @@
+# services/radio/browser.py
+# -----------------------------------------------------------------------------
+# Cliente Radio Browser com failover entre mirrors
+# - lista de mirrors: RADIO_BROWSER_MIRRORS (URLs base separados por vírgula,
+#   ex.: servidor local de testes) → all.api.radio-browser.info/json/servers
+#   → lista fixa
+# - cada pedido começa no último mirror que respondeu; erros de rede/5xx
+#   passam ao seguinte
+# -----------------------------------------------------------------------------
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import requests
+
+SERVERS_URL = "https://all.api.radio-browser.info/json/servers"
+FALLBACK_MIRRORS = [
+    "https://de1.api.radio-browser.info",
+    "https://de2.api.radio-browser.info",
+    "https://fi1.api.radio-browser.info",
+]
+REQ_TIMEOUT = 12        # seg
+MIRRORS_TTL_S = 3600
+USER_AGENT = "Music4all/1.0 (+radio)"
+
+_lock = threading.Lock()
+_mirrors: List[str] = []
+_mirrors_ts = 0.0
+_preferred = 0
+
+
+class RadioBrowserError(RuntimeError):
+    """Nenhum mirror respondeu."""
+
+
+def _discover() -> List[str]:
+    try:
+        r = requests.get(SERVERS_URL, timeout=5, headers={"User-Agent": USER_AGENT})
+        r.raise_for_status()
+        names = sorted({(s.get("name") or "").strip() for s in r.json() or [] if isinstance(s, dict)})
+        return [f"https://{n}" for n in names if n] or list(FALLBACK_MIRRORS)
+    except Exception:
+        return list(FALLBACK_MIRRORS)
+
+
+def mirrors() -> List[str]:
+    global _mirrors, _mirrors_ts
+    env = [m.strip().rstrip("/") for m in (os.getenv("RADIO_BROWSER_MIRRORS") or "").split(",") if m.strip()]
+    if env:
+        return env
+    with _lock:
+        if _mirrors and time.monotonic() - _mirrors_ts < MIRRORS_TTL_S:
+            return list(_mirrors)
+    found = _discover()
+    with _lock:
+        _mirrors, _mirrors_ts = found, time.monotonic()
+        return list(_mirrors)
+
+
+def get_json(path: str, params: Optional[Dict[str, Any]] = None, timeout: float = REQ_TIMEOUT) -> Any:
+    """GET {mirror}{path} com failover; 4xx não passa ao mirror seguinte."""
+    global _preferred
+    ms = mirrors()
+    start = _preferred % len(ms)
+    last_err: Exception | None = None
+    for i in range(len(ms)):
+        idx = (start + i) % len(ms)
+        try:
+            r = requests.get(ms[idx] + path, params=params, timeout=timeout,
+                             headers={"User-Agent": USER_AGENT})
+            if r.status_code >= 500:
+                raise requests.HTTPError(f"{r.status_code} from {ms[idx]}")
+            r.raise_for_status()
+            data = r.json()
+        except requests.HTTPError as e:
+            if e.response is not None and 400 <= e.response.status_code < 500:
+                raise
+            last_err = e
+            continue
+        except (requests.RequestException, ValueError) as e:
+            last_err = e
+            continue
+        _preferred = idx
+        return data
+    raise RadioBrowserError(f"no Radio Browser mirror answered ({last_err})")
+
+
+def search_online(params: Dict[str, Any]) -> List[Dict]:
+    data = get_json("/json/stations/search", params=params)
+    return [x for x in (data or []) if isinstance(x, dict)]
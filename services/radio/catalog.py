@@ -0,0 +1,300 @@
+# services/radio/catalog.py
+# -----------------------------------------------------------------------------
+# Catálogo local (opcional) das estações do Radio Browser — radio/data/stations.db
+# - só os campos que a UI usa; índices por countrycode, codec, bitrate e tag
+#   (tabela station_tags) e índice trigram (FTS5) sobre o nome normalizado
+# - pesquisas respondidas localmente, ordenadas por clickcount
+# - sync incremental: percorre /stations/search por changetimestamp (mais
+#   recentes primeiro) até passar o último lastchangetime gravado; um sync
+#   completo remove também as estações que desapareceram
+# - enquanto não houver sync completo o catálogo não é usado (UI vai online)
+# Entradas: scripts/sync_radio_catalog.py e refresh em background (SYNC_EVERY_H).
+# -----------------------------------------------------------------------------
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from services.common.paths import RADIO_DATA
+
+from .browser import get_json
+
+DB_PATH = RADIO_DATA / "stations.db"
+PAGE_SIZE = 5000
+SYNC_EVERY_H = 24
+
+_init_lock = threading.Lock()
+_initialized: Dict[str, bool] = {}   # path → FTS5 trigram disponível
+_sync_lock = threading.Lock()
+
+_COLS = ["uuid", "name", "url", "homepage", "favicon", "countrycode", "codec",
+         "bitrate", "tags", "clickcount", "lastcheckok", "changed", "synced"]
+
+
+def fold(s) -> str:
+    """minúsculas e sem acentos (pesquisa 'contém' do Radio Browser, mas tolerante a acentos)."""
+    s = unicodedata.normalize("NFKD", str(s or "").lower())
+    return "".join(ch for ch in s if not unicodedata.combining(ch)).strip()
+
+
+def split_tags(s) -> List[str]:
+    return sorted({t for t in (fold(x) for x in re.split(r"[;,]+", str(s or ""))) if t})
+
+
+# ======================
+# Ligação / esquema
+# ======================
+def _create_schema(con: sqlite3.Connection) -> bool:
+    con.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS stations ("
+        " id INTEGER PRIMARY KEY, uuid TEXT NOT NULL UNIQUE, name TEXT NOT NULL DEFAULT '',"
+        " url TEXT NOT NULL DEFAULT '', homepage TEXT NOT NULL DEFAULT '',"
+        " favicon TEXT NOT NULL DEFAULT '', countrycode TEXT NOT NULL DEFAULT '',"
+        " codec TEXT NOT NULL DEFAULT '', bitrate INTEGER NOT NULL DEFAULT 0,"
+        " tags TEXT NOT NULL DEFAULT '', clickcount INTEGER NOT NULL DEFAULT 0,"
+        " lastcheckok INTEGER NOT NULL DEFAULT 1, changed TEXT NOT NULL DEFAULT '',"
+        " synced REAL NOT NULL DEFAULT 0)"
+    )
+    con.execute("CREATE INDEX IF NOT EXISTS ix_st_country ON stations(countrycode, clickcount DESC)")
+    con.execute("CREATE INDEX IF NOT EXISTS ix_st_codec ON stations(codec)")
+    con.execute("CREATE INDEX IF NOT EXISTS ix_st_bitrate ON stations(bitrate)")
+    con.execute("CREATE INDEX IF NOT EXISTS ix_st_click ON stations(clickcount DESC)")
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS station_tags ("
+        " tag TEXT NOT NULL, station INTEGER NOT NULL, PRIMARY KEY (tag, station)) WITHOUT ROWID"
+    )
+    con.execute("CREATE INDEX IF NOT EXISTS ix_tags_station ON station_tags(station)")
+    try:
+        con.execute("CREATE VIRTUAL TABLE IF NOT EXISTS station_names"
+                    " USING fts5(name, tokenize='trigram')")
+        return True
+    except sqlite3.OperationalError:
+        # SQLite < 3.34 sem trigram: tabela simples, pesquisa por LIKE
+        con.execute("CREATE TABLE IF NOT EXISTS station_names (rowid INTEGER PRIMARY KEY, name TEXT)")
+        return False
+
+
+@contextmanager
+def connect(path: Path | None = None) -> Iterator[sqlite3.Connection]:
+    path = Path(path or DB_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(str(path), timeout=10)
+    con.row_factory = sqlite3.Row
+    try:
+        key = str(path.resolve())
+        if key not in _initialized:
+            with _init_lock:
+                if key not in _initialized:
+                    _initialized[key] = _create_schema(con)
+                    con.execute("PRAGMA journal_mode=WAL")
+                    con.commit()
+        con.execute("PRAGMA synchronous=NORMAL")
+        with con:
+            yield con
+    finally:
+        con.close()
+
+
+def _has_trigram(path: Path | None = None) -> bool:
+    return _initialized.get(str(Path(path or DB_PATH).resolve()), False)
+
+
+def _meta(con: sqlite3.Connection, key: str) -> Optional[str]:
+    row = con.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def _set_meta(con: sqlite3.Connection, key: str, value: Any) -> None:
+    con.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+
+def status(path: Path | None = None) -> Dict[str, Any]:
+    """{'stations', 'synced_at', 'full_sync_at', 'lastchangetime'} — vazio se não existir."""
+    p = Path(path or DB_PATH)
+    if not p.exists():
+        return {}
+    with connect(p) as con:
+        n = con.execute("SELECT COUNT(*) FROM stations").fetchone()[0]
+        return {"stations": n,
+                "synced_at": float(_meta(con, "synced_at") or 0),
+                "full_sync_at": float(_meta(con, "full_sync_at") or 0),
+                "lastchangetime": _meta(con, "lastchangetime") or ""}
+
+
+def ready(path: Path | None = None) -> bool:
+    """Há catálogo utilizável (pelo menos um sync completo)."""
+    st_ = status(path)
+    return bool(st_.get("full_sync_at")) and st_.get("stations", 0) > 0
+
+
+# ======================
+# Escrita (sync)
+# ======================
+def _changed(s: Dict) -> str:
+    """lastchangetime normalizado 'YYYY-MM-DD HH:MM:SS' (compara como string)."""
+    v = s.get("lastchangetime_iso8601") or s.get("lastchangetime") or ""
+    return str(v).replace("T", " ").rstrip("Z")[:19]
+
+
+def _station_params(s: Dict, now: float) -> tuple:
+    return (
+        str(s.get("stationuuid") or "").strip(),
+        str(s.get("name") or "").strip(),
+        str(s.get("url_resolved") or s.get("url") or "").strip(),
+        str(s.get("homepage") or "").strip(),
+        str(s.get("favicon") or "").strip(),
+        str(s.get("countrycode") or "").strip().upper(),
+        str(s.get("codec") or "").strip().lower(),
+        int(s.get("bitrate") or 0),
+        ",".join(split_tags(s.get("tags"))),
+        int(s.get("clickcount") or 0),
+        1 if int(s.get("lastcheckok") if s.get("lastcheckok") is not None else 1) else 0,
+        _changed(s),
+        now,
+    )
+
+
+def upsert_stations(con: sqlite3.Connection, stations: Iterable[Dict], now: float | None = None) -> int:
+    now = time.time() if now is None else now
+    params = [p for p in (_station_params(s, now) for s in stations if isinstance(s, dict)) if p[0]]
+    if not params:
+        return 0
+    cols = ", ".join(_COLS)
+    upd = ", ".join(f"{c} = excluded.{c}" for c in _COLS[1:])
+    con.executemany(
+        f"INSERT INTO stations ({cols}) VALUES ({', '.join('?' * len(_COLS))}) "
+        f"ON CONFLICT(uuid) DO UPDATE SET {upd}", params,
+    )
+    ids: Dict[str, int] = {}
+    uuids = [p[0] for p in params]
+    for i in range(0, len(uuids), 500):
+        chunk = uuids[i:i + 500]
+        q = f"SELECT id, uuid FROM stations WHERE uuid IN ({','.join('?' * len(chunk))})"
+        ids.update({u: sid for sid, u in con.execute(q, chunk)})
+    sids = [(ids[p[0]],) for p in params]
+    con.executemany("DELETE FROM station_names WHERE rowid = ?", sids)
+    con.executemany("DELETE FROM station_tags WHERE station = ?", sids)
+    con.executemany("INSERT INTO station_names (rowid, name) VALUES (?, ?)",
+                    [(ids[p[0]], fold(p[1])) for p in params])
+    con.executemany("INSERT OR IGNORE INTO station_tags (tag, station) VALUES (?, ?)",
+                    [(t, ids[p[0]]) for p in params for t in p[8].split(",") if t])
+    return len(params)
+
+
+def _delete_older_than(con: sqlite3.Connection, ts: float) -> int:
+    old = [(r[0],) for r in con.execute("SELECT id FROM stations WHERE synced < ?", (ts,))]
+    con.executemany("DELETE FROM station_names WHERE rowid = ?", old)
+    con.executemany("DELETE FROM station_tags WHERE station = ?", old)
+    con.executemany("DELETE FROM stations WHERE id = ?", old)
+    return len(old)
+
+
+def sync(full: bool = False, page_size: int = PAGE_SIZE, path: Path | None = None,
+         progress: Callable[[int], None] | None = None) -> int:
+    """
+    Sincroniza com o Radio Browser (failover entre mirrors).
+    Incremental por omissão (pára ao passar o último lastchangetime gravado);
+    full=True (ou catálogo vazio) percorre tudo e remove estações desaparecidas.
+    Devolve nº de estações gravadas.
+    """
+    with connect(path) as con:
+        mark = "" if full else (_meta(con, "lastchangetime") or "")
+    full = full or not mark
+    run_ts = time.time()
+    newest, total, offset = mark, 0, 0
+    while True:
+        data = get_json("/json/stations/search", params={
+            "order": "changetimestamp", "reverse": "true", "hidebroken": "false",
+            "limit": page_size, "offset": offset,
+        }, timeout=60)
+        rows = [s for s in (data or []) if isinstance(s, dict)]
+        if not rows:
+            break
+        fresh = [s for s in rows if _changed(s) >= mark] if mark else rows
+        with connect(path) as con:
+            total += upsert_stations(con, fresh, now=run_ts)
+        newest = max([newest] + [_changed(s) for s in fresh])
+        if progress:
+            progress(total)
+        if len(fresh) < len(rows) or len(rows) < page_size:
+            break
+        offset += page_size
+    with connect(path) as con:
+        if full:
+            _delete_older_than(con, run_ts)
+            _set_meta(con, "full_sync_at", run_ts)
+        _set_meta(con, "lastchangetime", newest)
+        _set_meta(con, "synced_at", time.time())
+    return total
+
+
+def maybe_sync_async(path: Path | None = None) -> bool:
+    """Sync incremental numa thread de background se o catálogo tiver mais de SYNC_EVERY_H."""
+    st_ = status(path)
+    if not st_.get("full_sync_at") or time.time() - st_.get("synced_at", 0) < SYNC_EVERY_H * 3600:
+        return False
+    if not _sync_lock.acquire(blocking=False):
+        return False
+
+    def _run():
+        try:
+            sync(path=path)
+        except Exception:
+            pass
+        finally:
+            _sync_lock.release()
+
+    threading.Thread(target=_run, name="radio-catalog-sync", daemon=True).start()
+    return True
+
+
+# ======================
+# Pesquisa
+# ======================
+def search(name: str = "", country: str = "", tags: Iterable[str] = (), codec: str = "",
+           bitrate_min: int = 0, limit: int = 20, https_only: bool = True,
+           hidebroken: bool = True, path: Path | None = None) -> List[Dict]:
+    """Mesmos filtros do /stations/search (tagList = todas as tags), por clickcount desc."""
+    where, params = [], []
+    if hidebroken:
+        where.append("s.lastcheckok = 1")
+    if https_only:
+        where.append("s.url LIKE 'https:%'")
+    if country.strip():
+        where.append("s.countrycode = ?")
+        params.append(country.strip().upper())
+    if codec.strip():
+        where.append("s.codec = ?")
+        params.append(codec.strip().lower())
+    if int(bitrate_min or 0) > 0:
+        where.append("s.bitrate >= ?")
+        params.append(int(bitrate_min))
+    for t in {fold(t) for t in tags if fold(t)}:
+        where.append("s.id IN (SELECT station FROM station_tags WHERE tag = ?)")
+        params.append(t)
+    q = fold(name)
+    if q:
+        if len(q) >= 3 and _has_trigram(path):
+            where.append("s.id IN (SELECT rowid FROM station_names WHERE station_names MATCH ?)")
+            params.append('"' + q.replace('"', '""') + '"')
+        else:
+            where.append("s.id IN (SELECT rowid FROM station_names WHERE name LIKE ? ESCAPE '\\')")
+            params.append("%" + re.sub(r"([%_\\])", r"\\\1", q) + "%")
+    sql = ("SELECT s.uuid, s.name, s.url, s.homepage, s.favicon, s.countrycode, s.codec,"
+           " s.bitrate, s.tags, s.clickcount FROM stations s"
+           + (" WHERE " + " AND ".join(where) if where else "")
+           + " ORDER BY s.clickcount DESC LIMIT ?")
+    params.append(max(1, int(limit or 20)))
+    with connect(path) as con:
+        rows = con.execute(sql, params).fetchall()
+    return [{"stationuuid": r["uuid"], "name": r["name"], "url": r["url"], "url_resolved": r["url"],
+             "homepage": r["homepage"], "favicon": r["favicon"], "countrycode": r["countrycode"],
+             "codec": r["codec"].upper(), "bitrate": r["bitrate"], "tags": r["tags"],
+             "clickcount": r["clickcount"]} for r in rows]
@@ -0,0 +1,315 @@
+# services/radio/probe.py
+# -----------------------------------------------------------------------------
+# Verificação de streams de rádio (asyncio, sem bloquear a página)
+# - cada URL: ligação + pedido HTTP/1.0 (ICY ou HTTP), time-to-first-byte,
+#   content-type, icy-br e bitrate real medido numa amostra curta do áudio
+# - segue redirects (Location) e playlists .pls/.m3u/.m3u8 (HLS via m3u8)
+# - um event loop numa thread de background faz as verificações em paralelo
+#   (semáforo); a UI só pede (request_probes) e lê o que já há (cached)
+# - resultados partilhados pelo processo, por URL, com TTL
+# Notas: GET em vez de HEAD (muitos servidores ICY não respondem a HEAD); só
+# lemos cabeçalhos + SAMPLE_S de áudio e fechamos.
+# -----------------------------------------------------------------------------
+from __future__ import annotations
+
+import asyncio
+import re
+import ssl
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+CONNECT_TIMEOUT = 4.0   # seg (ligação + cabeçalhos)
+SAMPLE_S = 1.5          # seg de áudio lidos para medir o bitrate
+CONCURRENCY = 16
+TTL_S = 15 * 60
+SLOW_TTFB_MS = 1500
+MAX_REDIRECTS = 5
+USER_AGENT = "Music4all/1.0 (+radio)"
+
+PLAYLIST_TYPES = {
+    "audio/x-scpls": "pls", "application/pls+xml": "pls",
+    "audio/x-mpegurl": "m3u", "audio/mpegurl": "m3u",
+    "application/vnd.apple.mpegurl": "m3u8", "application/x-mpegurl": "m3u8",
+}
+
+_lock = threading.Lock()
+_results: Dict[str, Tuple[float, Dict[str, Any]]] = {}   # url → (ts, resultado)
+_pending: set[str] = set()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_sem: Optional[asyncio.Semaphore] = None
+_ssl = ssl.create_default_context()
+
+
+# ======================
+# HTTP mínimo (asyncio streams)
+# ======================
+async def _open(url: str, timeout: float):
+    """→ (status, headers, reader, writer). Pedido HTTP/1.0 (sem chunked) com Icy-MetaData: 0."""
+    u = urlsplit(url)
+    https = u.scheme == "https"
+    host = u.hostname or ""
+    port = u.port or (443 if https else 80)
+    path = (u.path or "/") + (f"?{u.query}" if u.query else "")
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(host, port, ssl=_ssl if https else None,
+                                server_hostname=host if https else None),
+        timeout,
+    )
+    writer.write((f"GET {path} HTTP/1.0\r\nHost: {u.netloc}\r\nUser-Agent: {USER_AGENT}\r\n"
+                  "Accept: */*\r\nIcy-MetaData: 0\r\nConnection: close\r\n\r\n").encode())
+    await writer.drain()
+    line = (await asyncio.wait_for(reader.readline(), timeout)).decode("latin-1").strip()
+    m = re.match(r"^(?:HTTP/\d(?:\.\d)?|ICY)\s+(\d{3})", line)
+    status = int(m.group(1)) if m else 0
+    headers: Dict[str, str] = {}
+    for _ in range(100):
+        h = (await asyncio.wait_for(reader.readline(), timeout)).decode("latin-1").strip()
+        if not h:
+            break
+        k, _, v = h.partition(":")
+        headers[k.strip().lower()] = v.strip()
+    return status, headers, reader, writer
+
+
+def _close(writer) -> None:
+    try:
+        writer.close()
+    except Exception:
+        pass
+
+
+async def _sample_kbps(reader, seconds: float) -> int:
+    """kbps medidos na 2ª metade da amostra (ignora o burst inicial do servidor)."""
+    t0 = time.monotonic()
+    half, counted, t_half = t0 + seconds / 2, 0, None
+    while True:
+        left = t0 + seconds - time.monotonic()
+        if left <= 0:
+            break
+        try:
+            chunk = await asyncio.wait_for(reader.read(16384), left)
+        except asyncio.TimeoutError:
+            break
+        if not chunk:
+            break
+        now = time.monotonic()
+        if now >= half:
+            t_half = t_half or now
+            counted += len(chunk)
+    elapsed = time.monotonic() - (t_half or t0)
+    return int(counted * 8 / 1000 / elapsed) if counted and elapsed > 0.2 else 0
+
+
+def _playlist_kind(url: str, ctype: str) -> Optional[str]:
+    kind = PLAYLIST_TYPES.get(ctype)
+    if kind:
+        return kind
+    path = urlsplit(url).path.lower()
+    for ext in ("pls", "m3u8", "m3u"):
+        if path.endswith("." + ext):
+            return ext
+    return None
+
+
+def _playlist_entries(kind: str, text: str, base: str) -> Tuple[List[str], int]:
+    """(URLs, bitrate declarado em kbps) de uma playlist .pls/.m3u/.m3u8."""
+    if kind == "pls":
+        urls = [v.strip() for k, _, v in (ln.partition("=") for ln in text.splitlines())
+                if re.match(r"^\s*file\d+\s*$", k, re.I)]
+        return [urljoin(base, u) for u in urls if u], 0
+    if kind == "m3u8" or "#EXT-X-" in text:
+        try:
+            import m3u8
+            pl = m3u8.loads(text, uri=base)
+            if pl.is_variant:
+                variants = sorted(pl.playlists, key=lambda p: p.stream_info.bandwidth or 0)
+                return ([urljoin(base, p.uri) for p in variants],
+                        int((variants[0].stream_info.bandwidth or 0) / 1000) if variants else 0)
+            return [urljoin(base, s.uri) for s in pl.segments], 0
+        except ImportError:
+            pass
+    urls = [ln.strip() for ln in text.splitlines() if ln.strip() and not ln.startswith("#")]
+    bws = [int(b) for b in re.findall(r"BANDWIDTH=(\d+)", text)]
+    return [urljoin(base, u) for u in urls], (min(bws) // 1000 if bws else 0)
+
+
+async def probe_url(url: str, timeout: float = CONNECT_TIMEOUT,
+                    sample_s: float = SAMPLE_S) -> Dict[str, Any]:
+    """Verifica um stream. Devolve {ok, status, ttfb_ms, content_type, bitrate,
+    declared_bitrate, final_url, hls, error, checked_at}."""
+    res: Dict[str, Any] = {"ok": False, "status": 0, "ttfb_ms": None, "content_type": "",
+                           "bitrate": 0, "declared_bitrate": 0, "final_url": url,
+                           "hls": False, "error": "", "checked_at": time.time()}
+    t0 = time.monotonic()
+    cur, hops = (url or "").strip(), 0
+    try:
+        while True:
+            if urlsplit(cur).scheme not in ("http", "https"):
+                res["error"] = "bad url"
+                return res
+            status, headers, reader, writer = await _open(cur, timeout)
+            try:
+                if res["ttfb_ms"] is None:
+                    res["ttfb_ms"] = int((time.monotonic() - t0) * 1000)
+                res.update(status=status, final_url=cur,
+                           content_type=headers.get("content-type", "").split(";")[0].strip().lower())
+                if headers.get("icy-br"):
+                    res["declared_bitrate"] = int(re.sub(r"\D.*", "", headers["icy-br"]) or 0)
+                if status in (301, 302, 303, 307, 308) and headers.get("location"):
+                    hops += 1
+                    if hops > MAX_REDIRECTS:
+                        res["error"] = "too many redirects"
+                        return res
+                    cur = urljoin(cur, headers["location"])
+                    continue
+                if status != 200:
+                    res["error"] = f"HTTP {status}" if status else "no response"
+                    return res
+                kind = _playlist_kind(cur, res["content_type"])
+                if kind:
+                    body = await asyncio.wait_for(reader.read(65536), timeout)
+                    entries, declared = _playlist_entries(kind, body.decode("utf-8", "ignore"), cur)
+                    res["declared_bitrate"] = res["declared_bitrate"] or declared
+                    if kind == "m3u8" or b"#EXT-X-" in body:
+                        # HLS: basta a playlist (de media) ter segmentos / variantes acessíveis
+                        res["hls"] = True
+                        if declared and entries:
+                            hops += 1
+                            if hops > MAX_REDIRECTS:
+                                res["error"] = "too many redirects"
+                                return res
+                            cur = entries[0]
+                            continue
+                        res["ok"] = bool(entries)
+                        res["bitrate"] = res["declared_bitrate"]
+                        res["error"] = "" if entries else "empty playlist"
+                        return res
+                    if not entries:
+                        res["error"] = "empty playlist"
+                        return res
+                    hops += 1
+                    if hops > MAX_REDIRECTS:
+                        res["error"] = "too many redirects"
+                        return res
+                    cur = entries[0]
+                    continue
+                res["bitrate"] = await _sample_kbps(reader, sample_s)
+                res["ok"] = res["bitrate"] > 0 or res["content_type"].startswith(("audio/", "application/ogg"))
+                if not res["ok"]:
+                    res["error"] = "no audio data"
+                return res
+            finally:
+                _close(writer)
+    except asyncio.TimeoutError:
+        res["error"] = "timeout"
+    except (OSError, ssl.SSLError, ValueError, UnicodeError) as e:
+        res["error"] = type(e).__name__
+    return res
+
+
+async def probe_many(urls: Iterable[str], concurrency: int = CONCURRENCY, **kw) -> Dict[str, Dict]:
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def _one(u):
+        async with sem:
+            return u, await probe_url(u, **kw)
+
+    return dict(await asyncio.gather(*[_one(u) for u in dict.fromkeys(urls) if u]))
+
+
+# ======================
+# Background (UI)
+# ======================
+def _ensure_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _sem
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="radio-probe", daemon=True).start()
+            _sem = asyncio.Semaphore(CONCURRENCY)
+        return _loop
+
+
+async def _bg_probe(url: str) -> None:
+    try:
+        async with _sem:
+            res = await probe_url(url)
+    except Exception as e:  # nunca deixar a URL presa em _pending
+        res = {"ok": False, "error": type(e).__name__, "checked_at": time.time()}
+    with _lock:
+        _results[url] = (time.monotonic(), res)
+        _pending.discard(url)
+
+
+def station_url(s: Dict) -> str:
+    return (s.get("url_resolved") or s.get("url") or "").strip()
+
+
+def request_probes(stations: Iterable[Dict]) -> int:
+    """Agenda (sem esperar) a verificação das estações sem resultado válido. Devolve nº agendado."""
+    now = time.monotonic()
+    todo = []
+    with _lock:
+        for s in stations:
+            u = station_url(s)
+            if not u or u in _pending:
+                continue
+            hit = _results.get(u)
+            if hit and now - hit[0] < TTL_S:
+                continue
+            _pending.add(u)
+            todo.append(u)
+    if todo:
+        loop = _ensure_loop()
+        for u in todo:
+            asyncio.run_coroutine_threadsafe(_bg_probe(u), loop)
+    return len(todo)
+
+
+def cached(stations: Iterable[Dict]) -> Dict[str, Dict]:
+    """{url: resultado} das estações já verificadas (dentro do TTL)."""
+    now = time.monotonic()
+    out = {}
+    with _lock:
+        for s in stations:
+            u = station_url(s)
+            hit = _results.get(u)
+            if hit and now - hit[0] < TTL_S:
+                out[u] = hit[1]
+    return out
+
+
+def pending_count(stations: Iterable[Dict]) -> int:
+    with _lock:
+        return sum(1 for s in stations if station_url(s) in _pending)
+
+
+def health_rank(res: Optional[Dict]) -> int:
+    """0 = ok e rápido · 1 = por verificar · 2 = lento · 3 = morto."""
+    if not res:
+        return 1
+    if not res.get("ok"):
+        return 3
+    return 2 if (res.get("ttfb_ms") or 0) > SLOW_TTFB_MS else 0
+
+
+def rank_stations(stations: List[Dict], results: Dict[str, Dict]) -> List[Dict]:
+    """Ordenação estável por saúde (dentro de cada grupo mantém a ordem por clickcount)."""
+    return sorted(stations, key=lambda s: health_rank(results.get(station_url(s))))
+
+
+def health_badge(res: Optional[Dict]) -> str:
+    if not res:
+        return "⏳ a verificar"
+    if not res.get("ok"):
+        return f"🔴 offline ({res.get('error') or 'erro'})"
+    br = res.get("bitrate") or res.get("declared_bitrate") or 0
+    parts = [f"{res.get('ttfb_ms')} ms"]
+    if br:
+        parts.append(f"~{br} kbps")
+    if res.get("hls"):
+        parts.append("HLS")
+    icon = "🟠" if health_rank(res) == 2 else "🟢"
+    return f"{icon} " + " · ".join(parts)
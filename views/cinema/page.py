@@ -2,10 +2,10 @@
 from __future__ import annotations
 import os
 from datetime import date
-import pandas as pd
 import streamlit as st
 
 from cinema.data import load_genres, load_table
+from cinema.library import lookup_watched
 
 from views.cinema.ui.helpers import key_for, author_label_and_key
 from views.cinema.ui.search import run_search
@@ -54,28 +54,8 @@ def _parse_date_like(v):
 
 
 def _lookup_local_watched(section: str, title: str, year_val) -> tuple[bool, str]:
-    """Procura no CSV (Movies/Series) por título + ano e devolve (watched, watched_date)."""
-    base = load_table("Movies" if section == "Movies" else "Series").copy()
-    if base.empty:
-        return False, ""
-    base["__t"] = base["title"].astype(str).str.strip().str.casefold()
-    t = (title or "").strip().casefold()
-    ycol = "year" if section == "Movies" else "year_start"
-
-    mask = base["__t"] == t
-    if ycol in base.columns and year_val not in (None, "", "nan"):
-        try:
-            y = int(str(year_val)[:4])
-            mask &= (pd.to_numeric(base[ycol], errors="coerce") == y)
-        except Exception:
-            pass
-
-    row = base.loc[mask].head(1)
-    if row.empty:
-        return False, ""
-    w = bool(row.iloc[0].get("watched", False))
-    wd = str(row.iloc[0].get("watched_date") or "")
-    return w, wd
+    """(watched, watched_date) por título + ano, via índice em memória da biblioteca."""
+    return lookup_watched("Movies" if section == "Movies" else "Series", [(title, year_val)])[0]
 
 
 def render_cinema_page(section: str = "Movies") -> None:
@@ -5,31 +5,18 @@ import requests
 import pandas as pd
 import streamlit as st
 
-from cinema.providers.tmdb import tmdb_poster_url
 #from cinema.views.spotify_embed import render_player
 from streamlit import components
 import re
 from services.music.spotify.lookup import embed_spotify
 
-from cinema.data import load_table
+from cinema.library import lookup_enrichment, lookup_watched
+from cinema.scoring import rank_titles
 from .helpers import (
-    key_for, title_match_score, artists_from_row_or_fetch, parse_date_like,
+    key_for, artists_from_row_or_fetch, parse_date_like,
     on_click_play, safe_intlike, to_spotify_embed,
     save_watched_item_movies, save_watched_item_series
 )
-from cinema.providers.tmdb import (
-    tmdb_poster_url,
-    tmdb_best_trailer_url,
-    _tmdb_watch_providers,
-    tmdb_search_id,          # ← novo: fallback para obter o ID
-)
-
-from .helpers import (
-    key_for, title_match_score, artists_from_row_or_fetch, parse_date_like,
-    on_click_play, safe_intlike, to_spotify_embed,
-    save_watched_item_movies, save_watched_item_series,
-    resolve_tmdb_id,   # <-- acrescenta isto se ainda não estiver
-)
 # === TMDb key (env ou secrets) ===
 TMDB_API_KEY = (
     os.getenv("TMDB_API_KEY")
@@ -57,28 +44,6 @@ def _render_spotify_src_compact(src: str) -> None:
     # fallback seguro
     components.v1.iframe(src, height=232, width=380)
 
-# --- lookup watched no CSV (Movies/Series) ---
-def _lookup_local_watched(section: str, title: str, year_val):
-    base = load_table("Movies" if section == "Movies" else "Series").copy()
-    if base.empty:
-        return False, ""
-    base["__t"] = base["title"].astype(str).str.strip().str.casefold()
-    tnorm = (title or "").strip().casefold()
-    ycol = "year" if section == "Movies" else "year_start"
-    mask = base["__t"] == tnorm
-    if ycol in base.columns and year_val not in (None, "", "nan"):
-        try:
-            want_y = int(str(year_val)[:4])
-            base[ycol] = pd.to_numeric(base[ycol], errors="coerce")
-            mask &= (base[ycol] == want_y)
-        except Exception:
-            pass
-    row = base.loc[mask].head(1)
-    if row.empty:
-        return False, ""
-    return bool(row.iloc[0].get("watched", False)), str(row.iloc[0].get("watched_date") or "")
-
-
 # --- NEW: TMDb watch/providers por região (cacheado) ---
 @st.cache_data(ttl=86400, show_spinner=False)
 def _tmdb_watch_providers(media_type: str, tmdb_id: int, region: str) -> str:
@@ -117,11 +82,6 @@ def _tmdb_watch_providers(media_type: str, tmdb_id: int, region: str) -> str:
 
 
 def render_remote_results(section: str, remote: list[dict], query_title: str, region_code: str = "PT") -> None:
-    import urllib.parse  # para o fallback de pesquisa no YouTube
-    from cinema.providers.tmdb import (
-        tmdb_poster_url, tmdb_best_trailer_url, _tmdb_watch_providers, tmdb_search_id
-    )
-
     if not remote:
         return
     st.subheader("Online results")
@@ -153,14 +113,9 @@ def render_remote_results(section: str, remote: list[dict], query_title: str, re
 
     # Ordenação por relevância (título aproximado)
     if (query_title or "").strip():
-        df_remote["__ttl"] = df_remote.get("title", df_remote.get("name", ""))
-        df_remote["__score"] = df_remote["__ttl"].apply(lambda s: title_match_score(str(s), query_title))
-        df_remote = (
-            df_remote
-            .sort_values(["__score"], ascending=[False])
-            .drop(columns=["__score", "__ttl"], errors="ignore")
-            .reset_index(drop=True)
-        )
+        ttl = df_remote.get("title", df_remote.get("name", pd.Series("", index=df_remote.index)))
+        order = rank_titles(ttl.fillna("").astype(str).tolist(), query_title)
+        df_remote = df_remote.iloc[order].reset_index(drop=True)
 
     year_col = "year" if "year" in df_remote.columns else "year_start"
     if year_col not in df_remote.columns:
@@ -189,6 +144,17 @@ def render_remote_results(section: str, remote: list[dict], query_title: str, re
         axis=1
     )
 
+    _remote_cards(section, df_remote, year_col, region_code)
+
+
+@st.fragment
+def _remote_cards(section: str, df_remote: pd.DataFrame, year_col: str, region_code: str) -> None:
+    """Paginação + cartões num fragmento: Prev/Next, trailer, Play e Save só
+    re-executam esta lista (a pesquisa/ranking acima não volta a correr)."""
+    from cinema.providers.tmdb import (
+        tmdb_poster_url, tmdb_best_trailer_url, _tmdb_watch_providers, tmdb_search_id
+    )
+
     # Paginação
     per_page = 10
     total = len(df_remote)
@@ -223,6 +189,17 @@ def render_remote_results(section: str, remote: list[dict], query_title: str, re
             except TypeError:
                 return _tmdb_watch_providers(mt, tid) or ""
 
+    # Watched (biblioteca) para a página inteira num só lookup
+    watched_page = lookup_watched(
+        "Movies" if section == "Movies" else "Series",
+        [(r.get("title") or r.get("name") or "—", r.get(year_col)) for r in page_rows.to_dict("records")],
+    )
+
+    enriched_page = [
+        lookup_enrichment("Movies" if section == "Movies" else "Series", r.get("title") or r.get("name") or "", r.get(year_col))
+        for r in page_rows.to_dict("records")
+    ]
+
     # Cartões
     for i, r in page_rows.iterrows():
         row = r.to_dict()
@@ -250,13 +227,16 @@ def render_remote_results(section: str, remote: list[dict], query_title: str, re
         header = " ".join(head_bits).strip()
 
         # Watched do CSV → badge + sufixo no título
-        w_local, wd_local = _lookup_local_watched(section, title_i, yv)
+        w_local, wd_local = watched_page[i]
         header2 = f"{header} • ✅ Watched" if w_local else header
 
+        # Metadados já enriquecidos na biblioteca (scripts/enrich_cinema_library.py)
+        enr = enriched_page[i] or {}
+
         # Poster
         poster = row.get("poster_url") or row.get("poster") or row.get("image") or ""
         if not poster:
-            ppath = row.get("poster_path") or ""
+            ppath = row.get("poster_path") or enr.get("poster_path") or ""
             if ppath:
                 poster = f"https://image.tmdb.org/t/p/w185{ppath}"
         if not poster:
@@ -274,7 +254,7 @@ def render_remote_results(section: str, remote: list[dict], query_title: str, re
             )
 
         # --- TMDb ID robusto (necessário para providers/trailer) ---
-        tmdb_id_val = row.get("tmdb_id") or row.get("id")
+        tmdb_id_val = row.get("tmdb_id") or row.get("id") or enr.get("tmdb_id")
         tid = safe_intlike(tmdb_id_val)
 
         if not tid:
@@ -288,8 +268,12 @@ def render_remote_results(section: str, remote: list[dict], query_title: str, re
             tid = tmdb_search_id(kind, title_i, y_guess)
 
         # Providers para a região escolhida
+        # enriquecimento com dados (título encontrado no TMDb) → sem pedidos ao vivo
+        enriched = bool(enr.get("fetched_at") and enr.get("tmdb_id"))
         providers_txt = ""
-        if tid:
+        if enriched:
+            providers_txt = (enr.get("providers") or {}).get(str(region_code).upper(), "")
+        elif tid:
             mt = "movie" if section == "Movies" else "tv"
             providers_txt = _providers(mt, int(tid), region_code)
 
@@ -337,8 +321,8 @@ def render_remote_results(section: str, remote: list[dict], query_title: str, re
 
                 
                 # ▶ Trailer (YouTube/Vimeo) — com fallback de pesquisa
-                trailer_url = None
-                if tid:
+                trailer_url = enr.get("trailer_url") or None
+                if tid and not trailer_url and not enriched:
                     try:
                         trailer_url = tmdb_best_trailer_url("movie" if section == "Movies" else "tv", int(tid))
                     except Exception:
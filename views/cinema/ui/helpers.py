@@ -1,10 +1,10 @@
 # cinema/ui/helpers.py
 from __future__ import annotations
-import os, re, requests, unicodedata, datetime
+import os, re, requests, datetime
 from typing import Any
-import pandas as pd
 import streamlit as st
-from rapidfuzz import fuzz
+from cinema.library import lookup_enrichment
+from cinema.scoring import norm, title_scores
 
 TMDB_API_KEY = (
     os.getenv("TMDB_API_KEY", "")
@@ -53,24 +53,10 @@ def parse_date_like(v) -> datetime.date | None:
         return None
 
 # ---------- Title scoring ----------
-def _norm(s: str) -> str:
-    s = (s or "").lower()
-    s = unicodedata.normalize("NFKD", s)
-    s = "".join(ch for ch in s if not unicodedata.combining(ch))
-    return re.sub(r"[\W_]+", " ", s).strip()
+_norm = norm
 
 def title_match_score(title: str, query: str) -> float:
-    t = _norm(title)
-    q = _norm(query)
-    if not t or not q:
-        return 0.0
-    qtoks, ttoks = set(q.split()), set(t.split())
-    coverage = len(qtoks & ttoks) / max(1, len(qtoks))
-    base = max(fuzz.WRatio(t, q), fuzz.token_set_ratio(t, q))
-    phrase_bonus = 25 if q in t else 0
-    prefix_bonus = 10 if t.startswith(q) else 0
-    loose_pen = -20 if coverage < 0.6 else 0
-    return float(base + phrase_bonus + prefix_bonus + (coverage * 15) + loose_pen)
+    return float(title_scores([title], query)[0])
 
 # ---------- Spotify helpers ----------
 def to_spotify_embed(url_or_uri: str) -> str:
@@ -218,20 +204,23 @@ def ost_link_cached(title: str, year: int | str | None, section: str = "Movies",
         hint_artists = []
     year_txt = str(year) if year not in (None, "", "nan") else ""
     media_kind = "tv" if section == "Series" else "movie"
-    try:
-        return pick_best_soundtrack(title=title or "", year_txt=year_txt,
-                                    media_kind=media_kind, hint_artists=hint_artists) or {}
-    except TypeError:
-        return pick_best_soundtrack(title=title or "", year_txt=year_txt,
-                                    media_kind=media_kind) or {}
+    # strict: uma falha (429, rede) levanta exceção → st.cache_data não guarda o vazio
+    return pick_best_soundtrack(title=title or "", year_txt=year_txt, media_kind=media_kind,
+                                hint_artists=hint_artists, strict=True) or {}
 
 def on_click_play(section: str, rid: int, title_i: str, yv, tmdb_id: int | None = None):
     from cinema.providers.spotify import compact_embed_url
     # manter cartão aberto
     st.session_state[key_for(section, "open_card_id")] = rid
     st.session_state[key_for(section, "play_open_id")] = rid
-    info = ost_link_cached(title_i, yv, section, tmdb_id=tmdb_id)
-    raw = (info or {}).get("uri") or (info or {}).get("url") or ""
+    enr = lookup_enrichment("Movies" if section == "Movies" else "Series", title_i, yv) or {}
+    raw = enr.get("ost_uri") or ""
+    if not raw:
+        try:
+            info = ost_link_cached(title_i, yv, section, tmdb_id=tmdb_id)
+        except Exception:
+            info = {}  # falha temporária: não fica em cache, tenta-se no próximo clique
+        raw = (info or {}).get("uri") or (info or {}).get("url") or ""
     if raw:
         if not st.session_state.get("spfy_compact", False):
             src = to_spotify_embed(raw); height = 380
@@ -245,79 +234,51 @@ def on_click_play(section: str, rid: int, title_i: str, yv, tmdb_id: int | None
         st.session_state[key_for(section, "play_msg")] = "🎧 Soundtrack not found"
 
 # ---------- Save helpers ----------
-from cinema.data import load_table, save_table
+from cinema.library import find_ids, set_watched, upsert_rows
 
 def save_watched_item_movies(row: dict, watched: bool, watched_date: str) -> tuple[int, int]:
-    base_df = load_table("Movies"); updates = inserts = 0
     y = safe_year(row.get("year"))
-    title_r = (row.get("title") or row.get("name") or "").strip().casefold()
-    mask = (base_df["title"].astype(str).str.strip().str.casefold() == title_r)
-    if y is not None and "year" in base_df.columns:
-        mask &= (pd.to_numeric(base_df["year"], errors="coerce") == y)
-    if mask.any():
-        chg = False
-        if bool(base_df.loc[mask, "watched"].iloc[0]) != bool(watched):
-            base_df.loc[mask, "watched"] = bool(watched); chg = True
-        wd = (watched_date or "")[:10]
-        if str(base_df.loc[mask, "watched_date"].iloc[0] or "") != wd:
-            base_df.loc[mask, "watched_date"] = wd; chg = True
-        if chg: updates += 1
-    else:
-        new_id = int(base_df["id"].max()) + 1 if "id" in base_df.columns and not base_df.empty else 1
-        base_df.loc[len(base_df)] = {
-            "id": new_id,
-            "title": row.get("title", "") or row.get("name", ""),
-            "director": row.get("director", ""),
-            "year": y or "",
-            "genre": row.get("genre", "") if "genre" in base_df.columns else "",
-            "streaming": row.get("streaming", "") if "streaming" in base_df.columns else "",
-            "rating": row.get("rating", "") or "",
-            "notes": "",
-            "watched": bool(watched),
-            "watched_date": (watched_date or "")[:10] if "watched_date" in base_df.columns else "",
-        }
-        inserts += 1
-    save_table("Movies", base_df)
-    return updates, inserts
+    title = row.get("title") or row.get("name") or ""
+    wd = (watched_date or "")[:10]
+    ids = find_ids("Movies", title, year=y)
+    if ids:
+        return set_watched("Movies", [(i, bool(watched), wd) for i in ids]), 0
+    upsert_rows("Movies", [{
+        "title": title,
+        "director": row.get("director", ""),
+        "year": y,
+        "genre": row.get("genre", ""),
+        "streaming": row.get("streaming", ""),
+        "rating": row.get("rating", "") or "",
+        "notes": "",
+        "watched": bool(watched),
+        "watched_date": wd,
+    }])
+    return 0, 1
 
 def save_watched_item_series(row: dict, watched: bool, watched_date: str) -> tuple[int, int]:
-    base_df = load_table("Series"); updates = inserts = 0
     ys = safe_year(row.get("year_start"))
     season = row.get("season")
-    title_r = (row.get("title") or row.get("name") or "").strip().casefold()
-    mask = (base_df["title"].astype(str).str.strip().str.casefold() == title_r)
-    if "season" in base_df.columns and season not in (None, "", "nan"):
-        try:
-            season_i = int(float(season))
-            mask &= (pd.to_numeric(base_df["season"], errors="coerce") == season_i)
-        except Exception:
-            pass
-    if ys is not None and "year_start" in base_df.columns:
-        mask &= (pd.to_numeric(base_df["year_start"], errors="coerce") == ys)
-    if mask.any():
-        chg = False
-        if bool(base_df.loc[mask, "watched"].iloc[0]) != bool(watched):
-            base_df.loc[mask, "watched"] = bool(watched); chg = True
-        wd = (watched_date or "")[:10]
-        if str(base_df.loc[mask, "watched_date"].iloc[0] or "") != wd:
-            base_df.loc[mask, "watched_date"] = wd; chg = True
-        if chg: updates += 1
-    else:
-        new_id = int(base_df["id"].max()) + 1 if "id" in base_df.columns and not base_df.empty else 1
-        base_df.loc[len(base_df)] = {
-            "id": new_id,
-            "title": row.get("title") or row.get("name") or "",
-            "creator": row.get("creator", ""),
-            "season": int(season) if str(season).isdigit() else season,
-            "year_start": ys or "",
-            "year_end": row.get("year_end", "") or "",
-            "genre": row.get("genre", "") if "genre" in base_df.columns else "",
-            "streaming": row.get("streaming", "") if "streaming" in base_df.columns else "",
-            "rating": row.get("rating", "") or "",
-            "notes": "",
-            "watched": bool(watched),
-            "watched_date": (watched_date or "")[:10],
-        }
-        inserts += 1
-    save_table("Series", base_df)
-    return updates, inserts
+    try:
+        season_i = int(float(season)) if season not in (None, "", "nan") else None
+    except Exception:
+        season_i = None
+    title = row.get("title") or row.get("name") or ""
+    wd = (watched_date or "")[:10]
+    ids = find_ids("Series", title, year=ys, season=season_i)
+    if ids:
+        return set_watched("Series", [(i, bool(watched), wd) for i in ids]), 0
+    upsert_rows("Series", [{
+        "title": title,
+        "creator": row.get("creator", ""),
+        "season": season_i,
+        "year_start": ys,
+        "year_end": row.get("year_end", "") or "",
+        "genre": row.get("genre", ""),
+        "streaming": row.get("streaming", ""),
+        "rating": row.get("rating", "") or "",
+        "notes": "",
+        "watched": bool(watched),
+        "watched_date": wd,
+    }])
+    return 0, 1
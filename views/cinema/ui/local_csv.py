@@ -2,7 +2,9 @@
 from __future__ import annotations
 import pandas as pd
 import streamlit as st
-from cinema.data import load_table, save_table
+from cinema.data import load_table
+from cinema.enrich import refresh_metadata
+from cinema.library import delete_ids, enrichment_index, set_watched
 from .helpers import key_for
 
 def _to_datestr(v):
@@ -23,11 +25,19 @@ def _streaming_as_text(df: pd.DataFrame) -> None:
             lambda v: "" if (v is None or (isinstance(v, float) and pd.isna(v))) else str(v)
         )
 
-def _safe_int(v):
-    try:
-        return int(v)
-    except Exception:
-        return None
+def _watched_changes(before: pd.DataFrame, edited: pd.DataFrame) -> list[tuple[int, bool, str]]:
+    """(id, watched, watched_date) só das linhas que o editor alterou."""
+    w_new = edited["watched"].fillna(False).astype(bool)
+    d_new = edited["watched_date"].map(_to_datestr)
+    w_old = before["watched"].reindex(edited.index).fillna(False).astype(bool)
+    d_old = before["watched_date"].reindex(edited.index).map(_to_datestr)
+    ids = pd.to_numeric(edited["id"], errors="coerce")
+    mask = ((w_new != w_old) | (d_new != d_old)) & ids.notna()
+    return list(zip(ids[mask].astype(int).tolist(), w_new[mask].tolist(), d_new[mask].tolist()))
+
+def _marked_ids(edited: pd.DataFrame) -> list[int]:
+    ids = pd.to_numeric(edited.loc[edited["delete"].fillna(False).astype(bool), "id"], errors="coerce")
+    return ids.dropna().astype(int).tolist()
 
 def _post_save_refresh(section: str, df_new: pd.DataFrame):
     # Atualiza a store local no estado e tenta forçar rerun (se disponível)
@@ -36,6 +46,28 @@ def _post_save_refresh(section: str, df_new: pd.DataFrame):
     if callable(rerun):
         rerun()
 
+def _attach_posters(section: str, df: pd.DataFrame) -> None:
+    """Coluna 'poster' a partir do enriquecimento gravado (sem chamadas de rede)."""
+    idx = enrichment_index(section)
+    ids = pd.to_numeric(df.get("id"), errors="coerce")
+    df["poster"] = [
+        f"https://image.tmdb.org/t/p/w92{idx[int(i)]['poster_path']}"
+        if pd.notna(i) and int(i) in idx and idx[int(i)].get("poster_path") else None
+        for i in ids
+    ]
+
+def _refresh_metadata_button(section: str) -> None:
+    if st.button("🔄 Refresh metadata", key=key_for(section, "refresh_meta"),
+                 help="Atualiza TMDb id, poster, providers, trailer e OST das linhas desatualizadas (>30 dias)."):
+        bar = st.progress(0.0)
+        errors: list = []
+        n = refresh_metadata(section, progress=lambda i, tot: bar.progress(min(1.0, i / max(1, tot))),
+                             errors=errors)
+        bar.empty()
+        st.success(f"Metadata refreshed for {n} row(s).")
+        if errors:
+            st.warning(f"{len(errors)} row(s) failed (network/rate limit) and will be retried next time.")
+
 def render_local_results(section: str, local_out: pd.DataFrame) -> None:
     st.subheader("Local results (CSV)")
 
@@ -55,7 +87,8 @@ def render_local_results(section: str, local_out: pd.DataFrame) -> None:
 
         _streaming_as_text(df)  # manter nomes dos fornecedores (texto)
 
-        view_cols = ["delete","id","title","director","year","genre","streaming","rating","watched","watched_date"]
+        _attach_posters(section, df)
+        view_cols = ["delete","poster","id","title","director","year","genre","streaming","rating","watched","watched_date"]
         for c in view_cols:
             if c not in df.columns:
                 df[c] = (
@@ -78,6 +111,7 @@ def render_local_results(section: str, local_out: pd.DataFrame) -> None:
             key=key_for(section, "editor_movies"),
             column_config={
                 "delete": st.column_config.CheckboxColumn("Delete"),
+                "poster": st.column_config.ImageColumn("Poster", width="small"),
                 "year": st.column_config.NumberColumn("Year", format="%d", step=1),
                 "rating": st.column_config.NumberColumn("Rating", format="%.1f", step=0.1),
                 "streaming": st.column_config.TextColumn("Streaming"),
@@ -85,44 +119,27 @@ def render_local_results(section: str, local_out: pd.DataFrame) -> None:
                 "watched_date": st.column_config.DateColumn("Watched date", format="YYYY-MM-DD"),
             },
             # Só editar o que é persistido + delete
-            disabled=["id","title","director","year","genre","streaming","rating"],
+            disabled=["poster","id","title","director","year","genre","streaming","rating"],
         )
 
-        col_a, col_b = st.columns([1,1])
+        col_a, col_b, col_c = st.columns([1,1,1])
+        with col_c:
+            _refresh_metadata_button(section)
         with col_a:
             if st.button("Save watched changes", key=key_for(section, "save_watched_movies")):
-                base = load_table("Movies"); updates = 0
-                edited["watched"] = edited["watched"].fillna(False).astype(bool)
-                for _, row in edited.iterrows():
-                    mid = _safe_int(row["id"])
-                    if mid is None: continue
-                    mask = base["id"] == mid
-                    if not mask.any(): continue
-                    chg = False
-                    if bool(base.loc[mask, "watched"].iloc[0]) != bool(row["watched"]):
-                        base.loc[mask, "watched"] = bool(row["watched"]); chg = True
-                    wd_str = _to_datestr(row.get("watched_date"))
-                    if str(base.loc[mask, "watched_date"].iloc[0] or "") != wd_str:
-                        base.loc[mask, "watched_date"] = wd_str; chg = True
-                    if chg: updates += 1
-                save_table("Movies", base)
+                updates = set_watched("Movies", _watched_changes(local_view, edited))
                 st.success(f"Saved {updates} change(s).")
-                _post_save_refresh(section, base)
+                _post_save_refresh(section, load_table("Movies"))
 
         with col_b:
             if st.button("Delete selected (Movies)", type="secondary", key=key_for(section, "delete_movies")):
-                to_del = [ _safe_int(r["id"]) for _, r in edited.iterrows() if bool(r.get("delete")) ]
-                to_del = [i for i in to_del if i is not None]
+                to_del = _marked_ids(edited)
                 if not to_del:
                     st.info("No rows marked for deletion.")
                 else:
-                    base = load_table("Movies")
-                    before = len(base)
-                    base = base[~base["id"].isin(to_del)].copy()
-                    removed = before - len(base)
-                    save_table("Movies", base)
+                    removed = delete_ids("Movies", to_del)
                     st.success(f"Deleted {removed} row(s).")
-                    _post_save_refresh(section, base)
+                    _post_save_refresh(section, load_table("Movies"))
 
     elif section == "Series":
         df = local_out.copy()
@@ -140,7 +157,8 @@ def render_local_results(section: str, local_out: pd.DataFrame) -> None:
 
         _streaming_as_text(df)  # manter nomes dos fornecedores (texto)
 
-        view_cols = ["delete","id","title","creator","season","year_start","year_end","genre","streaming","rating","watched","watched_date"]
+        _attach_posters(section, df)
+        view_cols = ["delete","poster","id","title","creator","season","year_start","year_end","genre","streaming","rating","watched","watched_date"]
         for c in view_cols:
             if c not in df.columns:
                 df[c] = (
@@ -164,6 +182,7 @@ def render_local_results(section: str, local_out: pd.DataFrame) -> None:
             key=key_for(section, "editor_series"),
             column_config={
                 "delete": st.column_config.CheckboxColumn("Delete"),
+                "poster": st.column_config.ImageColumn("Poster", width="small"),
                 "season": st.column_config.NumberColumn("Season", format="%d", step=1),
                 "year_start": st.column_config.NumberColumn("Year start", format="%d", step=1),
                 "year_end": st.column_config.NumberColumn("Year end", format="%d", step=1),
@@ -172,44 +191,27 @@ def render_local_results(section: str, local_out: pd.DataFrame) -> None:
                 "watched": st.column_config.CheckboxColumn("Watched"),
                 "watched_date": st.column_config.DateColumn("Watched date", format="YYYY-MM-DD"),
             },
-            disabled=["id","title","creator","season","year_start","year_end","genre","streaming","rating"],
+            disabled=["poster","id","title","creator","season","year_start","year_end","genre","streaming","rating"],
         )
 
-        col_a, col_b = st.columns([1,1])
+        col_a, col_b, col_c = st.columns([1,1,1])
+        with col_c:
+            _refresh_metadata_button(section)
         with col_a:
             if st.button("Save watched changes (Series)", key=key_for(section, "save_watched_series_local")):
-                base = load_table("Series"); updates = 0
-                edited["watched"] = edited["watched"].fillna(False).astype(bool)
-                for _, row in edited.iterrows():
-                    sid = _safe_int(row["id"])
-                    if sid is None: continue
-                    mask = base["id"] == sid
-                    if not mask.any(): continue
-                    chg = False
-                    if bool(base.loc[mask, "watched"].iloc[0]) != bool(row["watched"]):
-                        base.loc[mask, "watched"] = bool(row["watched"]); chg = True
-                    wd_str = _to_datestr(row.get("watched_date"))
-                    if str(base.loc[mask, "watched_date"].iloc[0] or "") != wd_str:
-                        base.loc[mask, "watched_date"] = wd_str; chg = True
-                    if chg: updates += 1
-                save_table("Series", base)
+                updates = set_watched("Series", _watched_changes(local_view, edited))
                 st.success(f"Saved {updates} change(s).")
-                _post_save_refresh(section, base)
+                _post_save_refresh(section, load_table("Series"))
 
         with col_b:
             if st.button("Delete selected (Series)", type="secondary", key=key_for(section, "delete_series")):
-                to_del = [ _safe_int(r["id"]) for _, r in edited.iterrows() if bool(r.get("delete")) ]
-                to_del = [i for i in to_del if i is not None]
+                to_del = _marked_ids(edited)
                 if not to_del:
                     st.info("No rows marked for deletion.")
                 else:
-                    base = load_table("Series")
-                    before = len(base)
-                    base = base[~base["id"].isin(to_del)].copy()
-                    removed = before - len(base)
-                    save_table("Series", base)
+                    removed = delete_ids("Series", to_del)
                     st.success(f"Deleted {removed} row(s).")
-                    _post_save_refresh(section, base)
+                    _post_save_refresh(section, load_table("Series"))
 
     else:
         # Soundtracks: leitura + apagar
@@ -238,15 +240,10 @@ def render_local_results(section: str, local_out: pd.DataFrame) -> None:
         )
 
         if st.button("Delete selected (Soundtracks)", type="secondary", key=key_for(section, "delete_st")):
-            to_del = [ _safe_int(r["id"]) for _, r in edited.iterrows() if bool(r.get("delete")) ]
-            to_del = [i for i in to_del if i is not None]
+            to_del = _marked_ids(edited)
             if not to_del:
                 st.info("No rows marked for deletion.")
             else:
-                base = load_table("Soundtracks")
-                before = len(base)
-                base = base[~base["id"].isin(to_del)].copy()
-                removed = before - len(base)
-                save_table("Soundtracks", base)
+                removed = delete_ids("Soundtracks", to_del)
                 st.success(f"Deleted {removed} row(s).")
-                _post_save_refresh(section, base)
+                _post_save_refresh(section, load_table("Soundtracks"))
@@ -5,7 +5,7 @@ import pandas as pd
 from cinema.filters import apply_filters
 from cinema.providers.tmdb import tmdb_search_movies_advanced, tmdb_search_series_advanced
 from cinema.providers.spotify import search_soundtrack_albums
-from .helpers import title_match_score  # <- vamos usar o mesmo score da UI
+from cinema.scoring import title_scores  # <- o mesmo score da UI, em lote
 
 def _norm(s: str) -> str:
     # normaliza: minúsculas, só letras/dígitos/espaços, trim e comprime espaços
@@ -22,15 +22,10 @@ def _filter_by_title_phrase_then_fuzzy(items: list[dict], query: str) -> list[di
     if phrase:
         return phrase
 
-    # 2) fallback: fuzzy score (evita ficar sem resultados)
+    # 2) fallback: fuzzy score (evita ficar sem resultados), todos os títulos num só cdist
     thr = 0.62 if len(q.split()) >= 2 else 0.70
-    fuzzy = []
-    for it in items:
-        t = it.get("title") or it.get("name") or ""
-        sc = title_match_score(str(t), query)
-        if sc >= thr:
-            fuzzy.append(it)
-    return fuzzy
+    scores = title_scores([it.get("title") or it.get("name") or "" for it in items], query)
+    return [it for it, sc in zip(items, scores) if sc >= thr]
 
 def run_search(section: str, df_local: pd.DataFrame, *,
                title: str, genre: str, year_txt: str, min_rating: float,
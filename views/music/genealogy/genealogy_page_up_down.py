@@ -1,6 +1,5 @@
 ﻿
 from __future__ import annotations
-from services.common.paths import MUSIC_DATA
 
 # views/genealogy_page.py
 # -----------------------------------------------------------------------------
@@ -12,18 +11,19 @@ from services.common.paths import MUSIC_DATA
 # -----------------------------------------------------------------------------
 
 
-import os
-import re
 from collections import defaultdict, deque
-from typing import Dict, List, Set, Tuple
+from typing import Dict, List, Tuple
 import numpy as np
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import streamlit as st
 
-from services.genre_csv import load_hierarchy_csv, build_indices, norm
+from services.common.fingerprint_cache import source_cached
+from services.genre_csv import CSV_PATHS, load_hierarchy_csv, build_indices
 from services.genres_kb import genre_summary, kb_neighbors, canonical_name, BLURBS
+from services.genre_names import canonical_many, warm as warm_genre_names
+from services.genre_snapshot import genre_artist_counts, subtree_count
+from services.genre_graph import LAYER_HIER, layer_mask, layer_names, load_genre_graph
 from services.page_help import show_page_help
 
 
@@ -32,7 +32,7 @@ from services.page_help import show_page_help
 # ======================
 def _unique_sorted(labels: List[str]) -> List[str]:
     """Unique + sort (case/alias-insensitive)."""
-    cleaned = {canonical_name(x) for x in labels if isinstance(x, str) and x.strip()}
+    cleaned = set(canonical_many([x for x in labels if isinstance(x, str) and x.strip()]))
     return sorted(cleaned, key=str.lower)
 
 
@@ -48,156 +48,38 @@ def _set_query(name: str):
 # ======================
 # Dynamic CSV
 # ======================
-@st.cache_data(ttl=3600, show_spinner=False)
+# índices derivados do CSV: cache por origem (caminho, mtime, tamanho), não por
+# hash do dict children_index em cada chamada
+@source_cached(*CSV_PATHS)
 def _load_children_index():
     df, _ = load_hierarchy_csv()
     children, leaves, roots, leaf_url = build_indices(df)
     return children  # dict[prefix(tuple) -> set(children_str)]
 
 
-@st.cache_data(ttl=3600, show_spinner=False)
+@source_cached()
 def _all_labels(children_index):
     labels = set()
     for pref, kids in children_index.items():
         if pref:
             labels.add(pref[-1])
         labels.update({k for k in kids if k})
+    warm_genre_names(labels)  # canónico/chaves de todos os rótulos em cache (BFS)
     return sorted(labels, key=str.lower)
 
 
-def _neighbors(label: str, children_index):
-    """Pais e filhos imediatos a partir do índice de prefixos do CSV dinâmico."""
-    lab_n = norm(label)
-    parents, childs = set(), set()
-    for pref, kids in children_index.items():
-        parent = pref[-1] if pref else None
-        if pref and norm(pref[-1]) == lab_n:
-            childs.update({k for k in kids if k})
-        if any(norm(k) == lab_n for k in kids):
-            if parent:
-                parents.add(parent)
-    parents = sorted({p for p in parents if p.lower() != label.lower()}, key=str.lower)
-    childs  = sorted({c for c in childs  if c.lower() != label.lower()}, key=str.lower)
-    return parents, childs
-
-
-# ======================
-# Extra hierarchical CSV (L1..Ln) — opcional
-# ======================
-@st.cache_data(ttl=3600, show_spinner=False)
-def _load_extra_edges(path: str = MUSIC_DATA / "influences_origins.csv", sep: str = ";"):
-    edges = set()
-    if not os.path.exists(path):
-        return edges
-    try:
-        df = pd.read_csv(path, sep=sep)
-    except Exception:
-        return edges
-
-    cols = [c for c in df.columns if re.match(r"^L\d+$", str(c), flags=re.I)]
-    if not cols:
-        return edges
-    cols.sort(key=lambda c: int(re.findall(r"\d+", str(c))[0]))
-    for _, row in df.iterrows():
-        seq = [str(row[c]).strip() for c in cols
-               if str(row[c]).strip() and str(row[c]).strip().lower() != "nan"]
-        for i in range(len(seq) - 1):
-            a, b = seq[i], seq[i+1]
-            if a and b and a != b:
-                edges.add((a, b))
-    return edges
-
-
-def _neighbors_from_edges(label: str, edges):
-    lab_n = norm(label)
-    parents, childs = set(), set()
-    for p, c in edges:
-        if norm(p) == lab_n:
-            childs.add(c)
-        if norm(c) == lab_n:
-            parents.add(p)
-    parents = sorted({p for p in parents if p.lower() != label.lower()}, key=str.lower)
-    childs  = sorted({c for c in childs  if c.lower() != label.lower()}, key=str.lower)
-    return parents, childs
-
-
 # ======================
-# Grafo (downstream) + destaque do caminho
+# Grafo multi-fonte (services.genre_graph) + destaque do caminho
 # ======================
-@st.cache_data(ttl=3600, show_spinner=False)
-def _build_label_adjacency(children_index) -> Dict[str, Set[str]]:
-    """ParentLabel -> {children labels} (ambos canonicalizados)."""
-    adj: Dict[str, Set[str]] = defaultdict(set)
-    for pref, kids in children_index.items():
-        if not pref:
-            continue
-        parent = canonical_name(pref[-1])
-        for k in kids:
-            if k:
-                adj[parent].add(canonical_name(k))
-    return adj
-
-
-def _bfs_down_labels(adj: Dict[str, Set[str]], root: str, depth: int):
-    """BFS a partir de root por labels (até 'depth' níveis)."""
-    root = canonical_name(root)
-    nodes = {root}
-    edges: List[Tuple[str, str]] = []
-    level = {root: 0}
-    q = deque([root])
-
-    while q:
-        u = q.popleft()
-        if level[u] >= depth:
-            continue
-        for v in sorted(adj.get(u, set()), key=str.lower):
-            v = canonical_name(v)
-            edges.append((u, v))
-            if v not in nodes:
-                nodes.add(v)
-                level[v] = level[u] + 1
-                q.append(v)
-
-    ordered = sorted(nodes, key=lambda n: (level[n], n.lower()))
-    return ordered, edges, level
-
+SOURCE_LABELS = {"hierarchy": "Hierarchy CSV", "kb": "Curated KB", "influences": "Influences / origins"}
 
-def _build_reverse_adjacency(adj: Dict[str, Set[str]]) -> Dict[str, Set[str]]:
-    """child -> {parents} a partir de Parent -> {children}."""
-    rev: Dict[str, Set[str]] = defaultdict(set)
-    for parent, childs in adj.items():
-        for c in childs:
-            if c:
-                rev[canonical_name(c)].add(canonical_name(parent))
-    return rev
 
-
-def _bfs_up_labels(adj_up: Dict[str, Set[str]], root: str, depth: int):
-    """
-    BFS 'para cima' (upstream), com níveis negativos:
-    root = 0; pais diretos = -1; avós = -2; ...
-    As arestas continuam orientadas Parent → Child (esquerda → direita).
-    """
-    root = canonical_name(root)
-    nodes = {root}
-    edges: List[Tuple[str, str]] = []
-    level: Dict[str, int] = {root: 0}
-    q = deque([root])
-
-    while q:
-        u = q.popleft()
-        if abs(level[u]) >= depth:
-            continue
-        for p in sorted(adj_up.get(u, set()), key=str.lower):
-            p = canonical_name(p)
-            edges.append((p, u))  # parent → child
-            if p not in nodes:
-                nodes.add(p)
-                level[p] = level[u] - 1
-                q.append(p)
-
-    ordered = sorted(nodes, key=lambda n: (level[n], n.lower()))
-    return ordered, edges, level
+def _edge_provenance(graph, parent: str, child: str) -> str:
+    """'Hierarchy CSV + Curated KB · conf 1.00' para o hover das ligações."""
+    bits, conf = graph.edge(parent, child)
+    if not bits:
+        return ""
+    return " + ".join(SOURCE_LABELS[n] for n in layer_names(bits)) + f" · conf {conf:.2f}"
 
 
 def _path_edges(edges: List[Tuple[str, str]], start: str, target: str) -> List[Tuple[str, str]]:
@@ -239,6 +121,8 @@ def _branch_sankey(
     focus: str,
     branch_only: bool = False,
     is_mobile: bool = False,
+    counts: Dict[str, dict] | None = None,
+    edge_info: Dict[Tuple[str, str], str] | None = None,
 ):
     """
     Sankey com:
@@ -246,9 +130,10 @@ def _branch_sankey(
       • ramo root→focus a azul,
       • esquerda (upstream) a azul translúcido,
       • direita (downstream) em cinzentos por ramo de 1º nível,
-      • linhas fininhas via link ‘calibrador’ invisível fora do grafo.
+      • linhas fininhas via link ‘calibrador’ invisível fora do grafo
+        (só sem `counts`; com contagens, ligação = artistas da subárvore do filho
+        e irmãos ordenados por esse total).
     """
-    import numpy as np
     from collections import defaultdict, deque as _deque
 
     FONT = "Segoe UI, Roboto, Helvetica, Arial, sans-serif"
@@ -256,8 +141,11 @@ def _branch_sankey(
     LINK_GREY = "rgba(0,0,0,0.24)"
     BLUE = "#3b82f6"
 
+    def _weight(name: str) -> int:
+        return max(1, subtree_count(counts, name, default=1))
+
     # ---- Calibrar para links finos com par de nós invisíveis isolados ----
-    CALIBRATE_THIN = True
+    CALIBRATE_THIN = not counts
     DUMMY_A = "\u200b"   # zero-width space
     DUMMY_B = "\u200c"   # zero-width non-joiner
     if CALIBRATE_THIN and DUMMY_A not in nodes:
@@ -284,7 +172,9 @@ def _branch_sankey(
         if not col:
             continue
         ys_lv = np.linspace(0.20, 0.80, num=len(col))  # ajusta 0.20..0.80 conforme preferires
-        for n, y in zip(sorted(col, key=str.lower), ys_lv):
+        col_sorted = (sorted(col, key=lambda n: (-_weight(n), n.lower())) if counts
+                      else sorted(col, key=str.lower))
+        for n, y in zip(col_sorted, ys_lv):
             ys_map[n] = float(y)
     for d in DUMMIES:
         ys_map[d] = 0.5  # dummys ao centro
@@ -333,11 +223,12 @@ def _branch_sankey(
         ncolors[idx[DUMMY_B]] = "rgba(0,0,0,0)"
 
     # Ligações
-    src, dst, val, lcol = [], [], [], []
+    src, dst, val, lcol, info = [], [], [], [], []
     for a, b in edges:
         if a not in idx or b not in idx:
             continue
-        src.append(idx[a]); dst.append(idx[b]); val.append(1)
+        src.append(idx[a]); dst.append(idx[b]); val.append(_weight(b) if counts else 1)
+        info.append((edge_info or {}).get((a, b), ""))
 
         is_left_edge = (level.get(a, 0) < 0) and (level.get(b, 0) <= 0)
         on_path = (a, b) in path
@@ -362,6 +253,7 @@ def _branch_sankey(
         dst.append(idx[DUMMY_B])
         val.append(max(40, CAL_FACTOR * len(edges)))
         lcol.append("rgba(0,0,0,0)")
+        info.append("")
 
     # Proporções / tamanhos
     few = len(nodes) <= 8
@@ -399,7 +291,9 @@ def _branch_sankey(
             target=dst,
             value=val,
             color=lcol,
-            hovertemplate="%{source.label} → %{target.label}<extra></extra>",
+            customdata=info,
+            hovertemplate=("%{source.label} → %{target.label}"
+                           + ("<br>%{customdata}" if edge_info else "") + "<extra></extra>"),
         ),
     ))
 
@@ -455,7 +349,23 @@ def render_genealogy_page():
     except Exception as e:
         st.error(f"Error loading dynamic genres CSV: {e}")
         return
+    graph = load_genre_graph()
+
+    # Fontes do grafo (camadas) — uma só travessia sobre as escolhidas
+    src_sel = st.multiselect(
+        "Sources",
+        options=list(SOURCE_LABELS),
+        default=["hierarchy"],
+        format_func=SOURCE_LABELS.get,
+        key="gen_sources",
+        help="Curated KB, the genre hierarchy CSV and the influences/origins paths. "
+             "Edges keep the sources they come from (shown on hover).",
+    )
+    layers = layer_mask(src_sel) or LAYER_HIER
+
     labels = _all_labels(children_index)
+    if layers != LAYER_HIER:
+        labels = sorted(set(labels) | set(graph.labels(layers)), key=str.lower)
 
     # Pesquisa
     st.text_input(
@@ -476,6 +386,8 @@ def render_genealogy_page():
         genre = canonical_name(matches[0])
     else:
         genre = ""   # sem root fixo; o utilizador escolhe no Level 1
+    if genre:
+        genre = graph.name_of(genre) or genre   # nome do nó (maiúsculas/aliases entre fontes)
 
     # Dica quando há ambiguidade
     if q and not genre and len(matches) > 1:
@@ -491,8 +403,8 @@ def render_genealogy_page():
             )
         return
 
-    adj    = _build_label_adjacency(children_index)
-    adj_up = _build_reverse_adjacency(adj)
+    adj    = graph.adjacency(layers)
+    adj_up = graph.adjacency(layers, up=True)
 
     # Vizinhos DIRETOS do género selecionado (o que o grafo mostra a 1 nível)
     parents  = sorted(adj_up.get(genre, set()), key=str.lower)   # esquerda
@@ -525,7 +437,6 @@ def render_genealogy_page():
     st.markdown("<div style='height:12px'></div>", unsafe_allow_html=True)
 
     # ----- Gráfico: controlos -----
-    adj = _build_label_adjacency(children_index)
     depth = st.slider("Map depth (levels below this genre)", 1, 4, 2, key="gen_depth")
 
     # Selectboxes em cascata (nível a nível)
@@ -589,11 +500,10 @@ def render_genealogy_page():
 
     # ----- Construção do grafo e desenho -----
     # Downstream (direita)
-    nodes_ds, edges_ds, level_ds = _bfs_down_labels(adj, genre, depth)
+    nodes_ds, edges_ds, level_ds = graph.bfs(genre, depth, layers)
 
     # Upstream (esquerda) — níveis negativos
-    adj_up = _build_reverse_adjacency(adj)
-    nodes_up, edges_up, level_up = _bfs_up_labels(adj_up, genre, depth)
+    nodes_up, edges_up, level_up = graph.bfs(genre, depth, layers, up=True)
 
     # Merge dos dois lados, com o género a nível 0
     nodes = sorted(set([*nodes_up, *nodes_ds, genre]), key=str.lower)
@@ -604,8 +514,8 @@ def render_genealogy_page():
     selected_first = path[1] if len(path) > 1 else None
     if (branch_only or force_branch_only) and selected_first:
         # Reconstroi o lado direito apenas para o subgénero escolhido
-        right_nodes, right_edges, right_level = _bfs_down_labels(
-            adj, selected_first, max(0, depth - 1)
+        right_nodes, right_edges, right_level = graph.bfs(
+            selected_first, max(0, depth - 1), layers
         )
         edges = edges_up + [(genre, selected_first)] + right_edges
         level = {
@@ -633,6 +543,8 @@ def render_genealogy_page():
             root=genre, focus=focus,
             branch_only=(branch_only or force_branch_only),
             is_mobile=is_mobile,
+            counts=genre_artist_counts(),
+            edge_info={e: _edge_provenance(graph, *e) for e in edges},
         )
         st.plotly_chart(fig, use_container_width=True, config={"displayModeBar": False})
         st.caption("Blue = highlighted path from the selected genre to the chosen branch.")
@@ -9,18 +9,13 @@ from typing import List, Tuple, Dict, Set
 import numpy as np  
 from collections import defaultdict as _dd, deque as _deq
 
+from services.genre_names import canonical_name, label_key
+from services.genre_snapshot import subtree_count
+
 Edge = Tuple[str, str]
 
-def _norm(s: str) -> str:
-    if s is None:
-        return ""
-    # normaliza hífens/dashes e NBSP para garantir matching de labels
-    return (str(s)
-            .replace("\u2011", "-").replace("\u2013", "-").replace("\u2014", "-")
-            .replace("–", "-").replace("—", "-")
-            .replace("\xa0", " ")
-            .strip()
-            .casefold())
+# normaliza hífens/dashes e NBSP para garantir matching de labels (com cache)
+_norm = label_key
 
 def _path_root_to_focus(root: str, focus: str, edges: List[Edge], level: Dict[str, int]) -> List[Edge]:
     """
@@ -77,12 +72,6 @@ def _path_root_to_focus(root: str, focus: str, edges: List[Edge], level: Dict[st
             path_orig.append(e)
     return path_orig
 
-# canonical_name opcional (fallback seguro)
-try:
-    from services.genres_kb import canonical_name
-except Exception:
-    def canonical_name(x: str) -> str: return (x or "").strip()
-
 def build_label_adjacency(children_index):
     adj = defaultdict(set)
     for pref, kids in children_index.items():
@@ -145,8 +134,14 @@ def _path_edges(edges, start: str, target: str):
 def branch_sankey(
     nodes, edges, level, root, focus,
     branch_only=False, is_mobile=False,
-    height_override=None, font_size_override=None
+    height_override=None, font_size_override=None,
+    counts=None,
 ):
+    """
+    counts: contagens de artistas por género (services.genre_snapshot.genre_artist_counts).
+    Quando existem, o valor de cada ligação é o total de artistas da subárvore do
+    filho e os irmãos são ordenados por esse total (dispensa o nó calibrador).
+    """
     # 🎨 TEMA (dark) — igual ao original
     DARK_BG = "#0b0f19"
     FONT_CLR = "#e5e7eb"
@@ -161,15 +156,6 @@ def branch_sankey(
 
     PALETTE = px.colors.qualitative.Dark24
 
-    # -------- normalização p/ lookups robustos --------
-    def _norm(s: str) -> str:
-        if s is None:
-            return ""
-        return (str(s)
-                .replace("\u2011", "-").replace("\u2013", "-").replace("\u2014", "-")
-                .replace("–", "-").replace("—", "-").replace("\xa0", " ")
-                .strip().casefold())
-
     # mapa de níveis mutável; inclui chaves normalizadas para fallback
     level_mut = dict(level)  # cópia
     level_norm = { _norm(k): v for k, v in level.items() }
@@ -182,8 +168,11 @@ def branch_sankey(
             return level_norm[n]
         return default
 
-    # --- calibração p/ links finos (como no original) ---
-    CALIBRATE_THIN = True
+    def _weight(name: str) -> int:
+        return max(1, subtree_count(counts, name, default=1))
+
+    # --- calibração p/ links finos (só sem contagens reais) ---
+    CALIBRATE_THIN = not counts
     DUMMY_A = "\u200b"; DUMMY_B = "\u200c"
     if CALIBRATE_THIN and DUMMY_A not in nodes:
         nodes = nodes + [DUMMY_A, DUMMY_B]
@@ -234,7 +223,9 @@ def branch_sankey(
         if not col:
             continue
         ys_lv = np.linspace(0.20, 0.80, num=len(col))
-        for n, y in zip(sorted(col, key=str.lower), ys_lv):
+        col_sorted = (sorted(col, key=lambda n: (-_weight(n), n.lower())) if counts
+                      else sorted(col, key=str.lower))
+        for n, y in zip(col_sorted, ys_lv):
             ys_map[n] = float(y)
     ys_map[DUMMY_A] = ys_map.get(DUMMY_A, 0.5)
     ys_map[DUMMY_B] = ys_map.get(DUMMY_B, 0.5)
@@ -283,7 +274,7 @@ def branch_sankey(
     for a, b in edges:
         if a not in idx or b not in idx:
             continue
-        src.append(idx[a]); dst.append(idx[b]); val.append(1)
+        src.append(idx[a]); dst.append(idx[b]); val.append(_weight(b) if counts else 1)
 
         la, lb = get_lvl(a, 0), get_lvl(b, 0)
         is_left_edge = (la < 0 and lb <= 0)  # upstream (à esquerda)
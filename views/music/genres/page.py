@@ -11,12 +11,14 @@ from services.genre_csv import load_hierarchy_csv, make_key as _key
 
 from .css import STYLE
 from .state import PLACEHOLDER, CLEAR_FLAG, on_root_change
-from .search import build_indices_cached, search_paths
+from .search import build_indices_cached, search_genre_paths
 from .graph import (
     build_label_adjacency, build_reverse_adjacency,
     bfs_down_labels, bfs_up_labels, branch_sankey
 )
 from . import wiki as WIKI
+from .tree import MAX_NODES, TREE_EVENTS, picked_node, st_echarts, subtree_data, tree_options
+from services.genre_snapshot import genre_artist_counts
 
 # (opcional) Spotify – é seguro falhar
 try:
@@ -98,6 +100,104 @@ def _orient_lr(edges, level):
     return out
 
 
+def _render_facts(children_idx, focus: str):
+    """Influências (a montante) e derivados (a jusante) do género em foco."""
+    from html import escape
+    adj_rel = build_label_adjacency(children_idx)
+    facts = st.columns([1, 1])
+    with facts[0]:
+        nodes_u, edges_u, level_u = bfs_up_labels(build_reverse_adjacency(adj_rel), focus, depth=6)
+        upstream = sorted({n for n in nodes_u if level_u.get(n, 0) < 0}, key=str.lower)
+        st.markdown(f"**Influences ({len(upstream)} upstream)**")
+        st.markdown(" • ".join(upstream) if upstream else "—")
+    with facts[1]:
+        nodes_d, edges_d, level_d = bfs_down_labels(adj_rel, focus, depth=6)
+        downstream = sorted({n for n in nodes_d if level_d.get(n, 0) > 0}, key=str.lower)
+        st.markdown(f"**Derivatives ({len(downstream)} downstream)**")
+        st.markdown(
+            f'<div class="chips-scroll"><span>{" • ".join(escape(x) for x in downstream)}</span></div>',
+            unsafe_allow_html=True
+        ) if downstream else st.markdown("—")
+
+
+def _chart_size():
+    """Preset de tamanho do gráfico → (altura px, tamanho da fonte)."""
+    preset = st.selectbox("Chart options",
+                          ["Default","Compact","Large labels","Tall chart","Custom"],
+                          index=0, key="chart_opts")
+    gh, fs = 680, 15
+    if preset == "Compact": gh, fs = 420, 13
+    elif preset == "Large labels": gh, fs = 560, 18
+    elif preset == "Tall chart": gh, fs = 760, 15
+    elif preset == "Custom":
+        gh = st.slider("Height (px)", 300, 900, 520, 20, key="g_height")
+        fs = st.slider("Label size", 10, 22, 15, 1, key="g_font")
+    return gh, fs
+
+
+def _tree_top(path):
+    """Nó de topo da árvore (tuplo); volta ao root se o caminho já não passa por ele."""
+    top = tuple(st.session_state.get("genres_tree_top") or ())
+    if not top or tuple(path[:len(top)]) != top:
+        top = tuple(path[:1])
+        st.session_state["genres_tree_top"] = top
+    return top
+
+
+def _reset_tree_top():
+    st.session_state.pop("genres_tree_top", None)
+
+
+def _back_one_level():
+    st.session_state["genres_path"] = st.session_state["genres_path"][:-1]
+
+
+def _render_tree_view(children_idx, leaf_url):
+    """
+    Vista em árvore (ECharts): o ramo vai 1× para o browser e a navegação
+    (expandir/colapsar, zoom) é toda no cliente. O duplo clique num nó é o único
+    pedido ao servidor — e é tratado neste mesmo run: a árvore é desenhada antes
+    do painel de detalhes, que já mostra o nó escolhido (sem st.rerun).
+    """
+    path = st.session_state["genres_path"]
+    top = _tree_top(path)
+    colL, colRight = st.columns([3, 7])
+
+    with colRight:
+        gh, fs = _chart_size()
+        data, paths = subtree_data(children_idx, top)
+        event = st_echarts(tree_options(data, fs), events=TREE_EVENTS,
+                           height=f"{gh}px", key=_key("genre_tree", list(top)))
+        hit = picked_node(event, paths, st.session_state.get("_genre_tree_event"))
+        if hit:
+            st.session_state["_genre_tree_event"] = event
+            p, more = hit
+            path = st.session_state["genres_path"] = list(p)
+            if more:  # "… +N more": a árvore passa a começar neste ramo
+                st.session_state["genres_tree_top"] = top = tuple(p)
+        tip = "Click to expand/collapse · drag/scroll to pan/zoom · double-click a genre for details."
+        if len(paths) >= MAX_NODES:
+            tip += " Large branch: double-click “… more” to open it on its own."
+        st.caption(tip)
+
+    with colL:
+        focus = path[-1]
+        st.caption("Path:")
+        st.write(" / ".join(path))
+        if (u := leaf_url.get(tuple(path))): st.caption(f"[Wikipedia]({u})")
+        if len(path) > 1:
+            st.button("⬅ Back one level", key="genre_tree_back", on_click=_back_one_level)
+        if len(top) > 1:
+            st.button(f"↥ Whole {path[0]} tree", key="genre_tree_whole", on_click=_reset_tree_top)
+        if len(path) > 1:
+            blurb, src = _genre_blurb_and_source(focus)
+            st.markdown(f"#### {focus}")
+            st.markdown(blurb)
+            if src: st.caption(f"Source: [Wikipedia]({src})")
+        st.divider()
+        _render_facts(children_idx, focus)
+
+
 # ---------- Página ----------
 
 def render_genres_page_roots():
@@ -129,7 +229,7 @@ def render_genres_page_roots():
         if st.button("🔎 Search", key="genres_top_search"):
             q = (st.session_state.get("genres_search_q") or "").strip()
             if q:
-                hits = search_paths(df, q)
+                hits = search_genre_paths(df, q)
                 st.session_state["genres_search_results"] = {"query": q, "hits": hits}
                 st.session_state["genres_search_page"] = 1
             else:
@@ -205,6 +305,15 @@ def render_genres_page_roots():
     st.markdown(blurb)
     if src: st.caption(f"Source: [Wikipedia]({src})")
 
+    # árvore ECharts (navegação no cliente) se a lib existir; senão o Sankey
+    view = "Sankey"
+    if st_echarts is not None:
+        view = st.radio("View", ["Tree", "Sankey"], horizontal=True, key="gen_view",
+                        label_visibility="collapsed")
+    if view == "Tree":
+        _render_tree_view(children_idx, leaf_url)
+        return
+
     colL, colRight = st.columns([3, 7])
 
     # ------ Navegação (esquerda) ------
@@ -246,39 +355,14 @@ def render_genres_page_roots():
     with colRight:
         focus = path[-1] if path else root_genre
 
-        facts = st.columns([1, 1])
-        with facts[0]:
-            adj_rel = build_label_adjacency(children_idx)
-            nodes_u, edges_u, level_u = bfs_up_labels(build_reverse_adjacency(adj_rel), focus, depth=6)
-            upstream = sorted({n for n in nodes_u if level_u.get(n, 0) < 0}, key=str.lower)
-            st.markdown(f"**Influences ({len(upstream)} upstream)**")
-            st.markdown(" • ".join(upstream) if upstream else "—")
-        with facts[1]:
-            adj_rel = build_label_adjacency(children_idx)
-            nodes_d, edges_d, level_d = bfs_down_labels(adj_rel, focus, depth=6)
-            downstream = sorted({n for n in nodes_d if level_d.get(n, 0) > 0}, key=str.lower)
-            from html import escape
-            st.markdown(f"**Derivatives ({len(downstream)} downstream)**")
-            st.markdown(
-                f'<div class="chips-scroll"><span>{" • ".join(escape(x) for x in downstream)}</span></div>',
-                unsafe_allow_html=True
-            ) if downstream else st.markdown("—")
+        _render_facts(children_idx, focus)
 
         # Controlo
         ctrlL, ctrlR = st.columns([3, 2])
         with ctrlL:
             depth = st.slider("Map depth (levels down)", 1, 4, 2, key="gen_depth")
         with ctrlR:
-            preset = st.selectbox("Chart options",
-                                  ["Default","Compact","Large labels","Tall chart","Custom"],
-                                  index=0, key="chart_opts")
-            gh, fs = 680, 15
-            if preset == "Compact": gh, fs = 420, 13
-            elif preset == "Large labels": gh, fs = 560, 18
-            elif preset == "Tall chart": gh, fs = 760, 15
-            elif preset == "Custom":
-                gh = st.slider("Height (px)", 300, 900, 520, 20, key="g_height")
-                fs = st.slider("Label size", 10, 22, 15, 1, key="g_font")
+            gh, fs = _chart_size()
 
         depth = max(depth, max(1, len(path) - 1))  # respeita o caminho já escolhido
 
@@ -339,6 +423,7 @@ def render_genres_page_roots():
                 root=root_genre, focus=path[-1],
                 branch_only=True, is_mobile=False,
                 height_override=gh, font_size_override=fs,
+                counts=genre_artist_counts(),
             )
             st.plotly_chart(fig, use_container_width=True, config={"displayModeBar": False})
             st.caption("Blue = highlighted path from root to the selected branch.")
@@ -363,6 +448,7 @@ def render_genres_page_roots():
                 root=root_genre, focus=path[-1] if path else root_genre,
                 branch_only=False, is_mobile=False,
                 height_override=gh, font_size_override=fs,
+                counts=genre_artist_counts(),
             )
             st.plotly_chart(fig, use_container_width=True, config={"displayModeBar": False})
             st.caption("Blue = highlighted path from root to the selected branch.")
@@ -1,14 +1,16 @@
 # views/genres/search.py
-import streamlit as st
+from services.common.fingerprint_cache import source_cached
 from services.genre_csv import build_indices, norm
+from services.music_data import compiled_search
 
-@st.cache_data(ttl=86400, show_spinner=False)
+# df vem de load_hierarchy_csv (também @source_cached) → a chave é a origem do
+# CSV (caminho, mtime, tamanho), sem hashear o DataFrame em cada run
+@source_cached()
 def build_indices_cached(df):
     return build_indices(df)
 
-@st.cache_data(ttl=86400, show_spinner=False)
+@source_cached()
 def flatten_all_paths(df):
-    children, leaves, roots, leaf_url = build_indices(df)
     paths_set = set()
     level_cols = [c for c in df.columns if c.startswith("H")]
     level_cols.sort(key=lambda x: int(x[1:]) if x[1:].isdigit() else 99)
@@ -32,11 +34,32 @@ def flatten_all_paths(df):
     return sorted(paths_set), url_by_path
 
 def search_paths(paths, q, max_results=300):
-    qn = norm(q)
+    qn = norm(q).casefold()
     if not qn: return []
     hits = []
     for p in paths:
-        if qn in norm(" / ".join(p)):
+        if qn in norm(" / ".join(p)).casefold():
             hits.append(p)
             if len(hits) >= max_results: break
     return hits
+
+def search_genre_paths(df, q, max_results=300):
+    """
+    Pesquisa de caminhos para a página Genres → [{'path': [...], 'url': str}].
+    Usa o índice pré-compilado (music_compiled.json) quando existe; senão
+    achata o DataFrame da hierarquia (cache) e faz o mesmo matching.
+    """
+    idx = compiled_search()
+    if idx.get("paths"):
+        qn = norm(q).casefold()
+        if not qn: return []
+        urls = idx.get("urls") or {}
+        hits = []
+        for p, k in zip(idx["paths"], idx["keys"]):
+            if qn in k:
+                hits.append({"path": p, "url": urls.get(" / ".join(p), "")})
+                if len(hits) >= max_results: break
+        return hits
+    paths, url_by_path = flatten_all_paths(df)
+    return [{"path": list(p), "url": url_by_path.get(p, "")}
+            for p in search_paths(paths, q, max_results)]
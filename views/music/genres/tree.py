@@ -0,0 +1,129 @@
+# views/genres/tree.py
+# Árvore interativa (ECharts) da página Genres
+# - subtree_data(): subárvore do ramo escolhido em JSON compacto
+#   ({"name", "k", "value", "children"}), limitada a MAX_NODES nós (BFS, os
+#   níveis de cima primeiro); ramos cortados ganham um nó "… +N more"
+# - vai para o browser 1× por ramo: expandir/colapsar, pan/zoom e destaque
+#   acontecem no cliente, sem rerun
+# - só o duplo clique num nó devolve algo ao servidor: [k, more, nonce], com
+#   k = índice em `paths` (caminho completo desde o root)
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from services.common.fingerprint_cache import source_cached
+
+try:
+    from streamlit_echarts import st_echarts  # type: ignore
+except Exception:  # lib opcional → a página cai para o Sankey
+    st_echarts = None
+
+MAX_NODES = 500   # nós enviados por ramo (~25 KB de JSON)
+MAX_DEPTH = 7     # níveis abaixo do nó de topo (a hierarquia tem H1..H7)
+
+# duplo clique = escolher o nó; clique simples fica para expandir/colapsar
+TREE_EVENTS = {
+    "dblclick": "function(p){ if (!p.data || p.data.k === undefined) return null;"
+                " return [p.data.k, p.data.more ? 1 : 0, Date.now()]; }",
+}
+
+Path = Tuple[str, ...]
+
+
+@source_cached()
+def subtree_data(children_idx, top: Path, max_nodes: int = MAX_NODES,
+                 max_depth: int = MAX_DEPTH) -> Tuple[dict, List[Path]]:
+    """
+    (árvore, paths) a partir do prefixo `top` de children_idx (build_indices_cached).
+    `paths[k]` é o caminho completo do nó com "k"; "value" = nº de subgéneros
+    abaixo do nó (incluindo os que ficaram de fora por causa do limite).
+    """
+    top = tuple(top)
+    paths: List[Path] = [top]
+    root = {"name": top[-1], "k": 0}
+    nodes: Dict[Path, dict] = {top: root}
+    q = deque([top])
+    while q:
+        p = q.popleft()
+        kids = sorted((k for k in children_idx.get(p, []) if k), key=str.lower)
+        if not kids or len(p) - len(top) >= max_depth:
+            continue
+        room = max(max_nodes - len(paths), 0)
+        out = []
+        for name in kids[:room]:
+            cp = p + (name,)
+            node = {"name": name, "k": len(paths)}
+            paths.append(cp)
+            nodes[cp] = node
+            out.append(node)
+            q.append(cp)
+        if len(kids) > room:
+            # aponta para o pai: escolhê-lo reabre a árvore a partir desse ramo
+            out.append({"name": f"… +{len(kids) - room} more", "k": nodes[p]["k"], "more": 1})
+        nodes[p]["children"] = out
+    _count(root, children_idx, top)
+    return root, paths
+
+
+def _count(node: dict, children_idx, path: Path) -> int:
+    """Preenche "value" (subgéneros abaixo) — conta também os ramos cortados."""
+    total = 0
+    shown = {c["name"]: c for c in node.get("children", ()) if not c.get("more")}
+    for name in children_idx.get(path, []):
+        if not name:
+            continue
+        child = shown.get(name)
+        total += 1 + (_count(child, children_idx, path + (name,)) if child is not None
+                      else _descendants(children_idx, path + (name,)))
+    if total:
+        node["value"] = total
+    return total
+
+
+def _descendants(children_idx, path: Path) -> int:
+    n = 0
+    stack = [path]
+    while stack:
+        p = stack.pop()
+        for name in children_idx.get(p, []):
+            if name:
+                n += 1
+                stack.append(p + (name,))
+    return n
+
+
+def tree_options(data: dict, font_size: int = 13) -> dict:
+    """Opções ECharts (série 'tree', esquerda → direita, 1 nível aberto)."""
+    return {
+        "tooltip": {"trigger": "item", "triggerOn": "mousemove"},   # nome + nº de subgéneros
+        "series": [{
+            "type": "tree",
+            "data": [data],
+            "orient": "LR",
+            "top": "2%", "bottom": "2%", "left": "12%", "right": "22%",
+            "symbolSize": 8,
+            "roam": True,
+            "initialTreeDepth": 1,
+            "expandAndCollapse": True,
+            "animationDuration": 300,
+            "animationDurationUpdate": 400,
+            "label": {"position": "left", "verticalAlign": "middle", "align": "right",
+                      "fontSize": font_size},
+            "leaves": {"label": {"position": "right", "verticalAlign": "middle", "align": "left"}},
+            "emphasis": {"focus": "descendant"},
+        }],
+    }
+
+
+def picked_node(event, paths: Sequence[Path], last) -> Optional[Tuple[Path, bool]]:
+    """Evento novo do duplo clique → (caminho, é nó "more"); repetido/inválido → None."""
+    if not isinstance(event, (list, tuple)) or len(event) < 3 or event == last:
+        return None
+    try:
+        k = int(event[0])
+    except (TypeError, ValueError):
+        return None
+    if not 0 <= k < len(paths):
+        return None
+    return paths[k], bool(event[1])
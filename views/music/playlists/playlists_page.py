@@ -1,7 +1,6 @@
 ﻿# views/playlists_page.py
 from __future__ import annotations
 
-import io
 from pathlib import Path
 from typing import List, Dict, Any
 
@@ -16,8 +15,17 @@ from services.playlist import (
     ensure_playlist,
     add_tracks_to_playlist,
     remove_track_at,
+    playlist_tracks,
+    session_playlists,
 )  # :contentReference[oaicite:0]{index=0}
 from services.music.spotify.session_push import push_session_playlist
+from services.playlist_store import (
+    csv_to_playlists,
+    list_names as stored_playlist_names,
+    load_playlist as load_stored_playlist,
+    read_csv_text,
+    replace_playlist,
+)
 from services.page_help import show_page_help
 
 
@@ -27,122 +35,25 @@ from services.page_help import show_page_help
 # =========================
 
 CSV_COLS = ["PlaylistName", "Title", "Artists", "Album", "Duration", "TrackID", "TrackURI", "TrackURL"]
-CSV_PATH = Path("playlist.csv")
-
-
-def _normalize_row(r: Dict[str, Any]) -> Dict[str, Any]:
-    """Mapeia colunas de CSV para o formato interno usado no buffer de sessão."""
-    return {
-        "id": r.get("TrackID") or r.get("id") or "",
-        "uri": r.get("TrackURI") or r.get("uri") or "",
-        "name": r.get("Title") or r.get("name") or "",
-        "artists": r.get("Artists") or r.get("artists") or "",
-        "album": r.get("Album") or r.get("album") or "",
-        "duration_ms": r.get("duration_ms") or 0,
-        "external_url": r.get("TrackURL") or r.get("external_url") or "",
-    }
 
 
 def _parse_csv_to_rows(file_bytes: bytes) -> List[Dict[str, Any]]:
-    """Aceita ; ou , como separador e devolve rows normalizados."""
-    text = file_bytes.decode("utf-8", errors="ignore")
-    # tenta ';' primeiro (é o que exportamos), depois ','
-    try:
-        df = pd.read_csv(io.StringIO(text), sep=";")
-        if df.shape[1] == 1:
-            raise ValueError
-    except Exception:
-        df = pd.read_csv(io.StringIO(text), sep=",")
-    return [
-        _normalize_row(
-            {
-                "Title": row.get("Title"),
-                "Artists": row.get("Artists"),
-                "Album": row.get("Album"),
-                "Duration": row.get("Duration"),
-                "TrackID": row.get("TrackID"),
-                "TrackURI": row.get("TrackURI"),
-                "TrackURL": row.get("TrackURL"),
-            }
-        )
-        for _, row in df.iterrows()
-    ]
-
-
-def _load_playlists_from_csv(path: Path = CSV_PATH) -> Dict[str, List[Dict[str, Any]]]:
-    """Lê playlist.csv → dict[name] = list[rows]. Tolerante a ; ou , e capitalização."""
-    if not path.exists():
-        return {}
-    try:
-        # tenta ';' e depois ','
-        try:
-            df = pd.read_csv(path, sep=";")
-            if df.shape[1] == 1:
-                raise ValueError
-        except Exception:
-            df = pd.read_csv(path, sep=",")
-        # normalizar nomes de colunas
-        cols = {c.lower(): c for c in df.columns}
-        req = ["playlistname", "title"]
-        if not all(c in cols for c in req):
-            return {}
-        # garantir restantes
-        for c in ["artists", "album", "duration", "trackid", "trackuri", "trackurl"]:
-            cols.setdefault(c, c)
-        out: Dict[str, List[Dict[str, Any]]] = {}
-        for _, r in df.iterrows():
-            pl = (r.get(cols["playlistname"]) or "").strip() or "My Playlist"
-            row = {
-                "Title": r.get(cols["title"]),
-                "Artists": r.get(cols["artists"]),
-                "Album": r.get(cols["album"]),
-                "Duration": r.get(cols["duration"]),
-                "TrackID": r.get(cols["trackid"]),
-                "TrackURI": r.get(cols["trackuri"]),
-                "TrackURL": r.get(cols["trackurl"]),
-            }
-            out.setdefault(pl, []).append(_normalize_row(row))
-        return out
-    except Exception:
-        return {}
+    """Aceita ; ou , como separador e devolve rows normalizados (todas as playlists do ficheiro juntas)."""
+    df = read_csv_text(file_bytes.decode("utf-8", errors="ignore"))
+    return [t for tracks in csv_to_playlists(df).values() for t in tracks]
 
 
 def _get_session_playlists_dict() -> Dict[str, List[Dict[str, Any]]]:
-    """Obtém todas as playlists em memória como dict[name] -> rows."""
-    names = list_playlists() or []  # :contentReference[oaicite:1]{index=1}
-    out: Dict[str, List[Dict[str, Any]]] = {}
-    # percorre por nome usando get_current_playlist para não depender de implementação interna
-    current_name, _ = get_current_playlist()  # :contentReference[oaicite:2]{index=2}
-    for nm in names:
-        set_current_playlist(nm)  # move o ponteiro; seguro porque é sessão
-        _, pl = get_current_playlist()
-        out[nm] = list(pl.get("tracks") or [])
-    # repor seleção original
-    set_current_playlist(current_name)
-    return out
-
-
-def _write_playlists_to_csv(playlists: Dict[str, List[Dict[str, Any]]], path: Path = CSV_PATH) -> None:
-    """Escreve TODO o estado (memória ∪ CSV anterior) para playlist.csv (separador ';')."""
-    rows = []
+    """Playlists em memória a gravar (mexidas nesta sessão ou não vazias) como dict[name] -> rows."""
+    return session_playlists(changed_only=True)
+
+
+def _save_session_playlists(playlists: Dict[str, List[Dict[str, Any]]]) -> None:
+    """Grava na store só as playlists da sessão (cada uma substituída por inteiro,
+    vazias incluídas — esvaziar uma playlist também é gravado; as restantes
+    playlists gravadas não são lidas nem reescritas)."""
     for name, tracks in (playlists or {}).items():
-        for t in tracks or []:
-            rows.append(
-                {
-                    "PlaylistName": name,
-                    "Title": t.get("name", ""),
-                    "Artists": t.get("artists", ""),
-                    "Album": t.get("album", ""),
-                    "Duration": ms_to_mmss(t.get("duration_ms") or 0),
-                    "TrackID": t.get("id", ""),
-                    "TrackURI": t.get("uri", ""),
-                    "TrackURL": t.get("external_url", ""),
-                }
-            )
-    df = pd.DataFrame(rows, columns=CSV_COLS)
-    # criar pasta se necessário
-    path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(path, index=False, sep=";")
+        replace_playlist(name, tracks)
 
 
 def _export_csv_bytes(playlist_name: str, tracks: List[Dict[str, Any]]) -> bytes:
@@ -174,11 +85,10 @@ def render_playlists_page():
 
     st.header("Session playlist")
 
-    # ---------- Nomes: memória ∪ CSV ----------
+    # ---------- Nomes: memória ∪ gravadas (só nomes; faixas lidas ao selecionar) ----------
     mem_names = list_playlists() or []            # memória  :contentReference[oaicite:3]{index=3}
-    csv_dict = _load_playlists_from_csv()         # CSV (se houver)
-    csv_names = list(csv_dict.keys())
-    all_names = sorted({*(mem_names or []), *csv_names} or {"My Playlist"})
+    saved_names = stored_playlist_names()
+    all_names = sorted({*(mem_names or []), *saved_names} or {"My Playlist"})
 
     # Seleção atual (se não existir, usa o 1º)
     cur_name, _pl = get_current_playlist()        # :contentReference[oaicite:4]{index=4}
@@ -195,10 +105,10 @@ def render_playlists_page():
             key="ui_pl_sel",
         )
         if sel != cur_name:
-            # Se veio só do CSV, importa para memória
-            if sel not in (mem_names or []) and sel in csv_dict:
+            # Se só existe gravada, carrega essa playlist para memória
+            if sel not in (mem_names or []) and sel in saved_names:
                 ensure_playlist(sel)                                  # cria vazia em memória  :contentReference[oaicite:5]{index=5}
-                add_tracks_to_playlist(sel, csv_dict[sel])            # carrega faixas       :contentReference[oaicite:6]{index=6}
+                add_tracks_to_playlist(sel, load_stored_playlist(sel))  # carrega faixas     :contentReference[oaicite:6]{index=6}
             set_current_playlist(sel)                                  # passa a atual        :contentReference[oaicite:7]{index=7}
             cur_name, _pl = get_current_playlist()
 
@@ -209,22 +119,18 @@ def render_playlists_page():
                 if playlist_id:
                     st.success(f"Sent {added} tracks to '{cur_name}'.")
                     if misses:
-                        st.info(f"Couldn't resolve {len(misses)} track(s) without URI.")
+                        st.info(f"Couldn't resolve {misses} track(s) without URI.")
                 else:
                     st.info("Nothing to send.")
             except Exception as e:
                 st.error(f"Failed to send: {e}")
             else:
-                # ✅ AUTOSAVE: escrever playlist.csv com o estado completo (memória ∪ CSV antigo)
-                state_mem = _get_session_playlists_dict()
-                # merge: prioriza o que está em memória; mantém listas do CSV que não existirem na memória
-                merged = dict(csv_dict)
-                merged.update(state_mem)
-                _write_playlists_to_csv(merged)
+                # ✅ AUTOSAVE: gravar as playlists da sessão (as outras gravadas ficam intactas)
+                _save_session_playlists(_get_session_playlists_dict())
 
     # ---------- (Opcional) Export CSV — DESCOMENTA para ativar ----------
     # cur_n, pl_n = get_current_playlist()
-    # csv_bytes = _export_csv_bytes(cur_n, list(pl_n.get("tracks") or []))
+    # csv_bytes = _export_csv_bytes(cur_n, playlist_tracks(cur_n))
     # st.download_button(
     #     "💾 Export CSV",
     #     data=csv_bytes,
@@ -252,8 +158,8 @@ def render_playlists_page():
                 st.error(f"Import failed: {e}")
 
     # ---------- Conteúdo da playlist selecionada + remoção ----------
-    cur_name, pl = get_current_playlist()
-    tracks = list(pl.get("tracks") or [])
+    cur_name, _pl = get_current_playlist()
+    tracks = playlist_tracks(cur_name)
     st.subheader(f"Current: {cur_name} — {len(tracks)} track(s)")
 
     if not tracks:
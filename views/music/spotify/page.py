@@ -13,7 +13,6 @@ from services.music.spotify.genres import fetch_spotify_genre_seeds  # opcional:
 from .components.legacy_ui import (
     render_spotify_filters,
     render_top_action_buttons_spotify,
-    render_pagination_controls,
 )
 
 def render_spotify_page(token: str, client_id: str, client_secret: str):
@@ -21,8 +20,8 @@ def render_spotify_page(token: str, client_id: str, client_secret: str):
     Página Spotify.
     - Pré-carrega lista de géneros (Spotify API; fallback CSV) e guarda em st.session_state['genres_list'].
     - Desenha os filtros (que usam 'genres_list' no selectbox).
-    - Mostra barra de paginação (Pag: N/M | Prev | Next) na mesma linha, estilo wiki.
-    - Renderiza os resultados conforme st.session_state['query'].
+    - Renderiza os resultados conforme st.session_state['query'] (a barra de paginação
+      Pag: N/M | Prev | Next vive no fragmento dos resultados).
     """
     st.subheader("🎧 Spotify")
     render_top_action_buttons_spotify()  # botões pequenos ao lado do título
@@ -37,10 +36,7 @@ def render_spotify_page(token: str, client_id: str, client_secret: str):
     # 2) filtros (usa a lista acima)
     render_spotify_filters(genres=spotify_genres)
 
-    # 3) paginação na MESMA linha (Pag: N/M | ◀ Previous | Next ▶)
-    render_pagination_controls()
-
-    # 4) resultados
+    # 3) resultados + paginação (fragmento: mudar de página não refaz a pesquisa)
     render_spotify_results(token)
 
 
@@ -29,6 +29,7 @@ from .search import (
     filter_artists_by_genre,
 )
 from .wiki import artist_blurb
+from ..components.legacy_ui import render_pagination_controls
 
 
 # ---------- API auxiliar (tracks de um álbum) ----------
@@ -105,12 +106,21 @@ def render_spotify_results(token: str):
             st.info(f'No artists found for genre "{genre_term}".')
         return
 
+    _results_page(token, results, mobile)
+
+
+@st.fragment
+def _results_page(token: str, results: list[dict], mobile: bool):
+    """Barra de paginação + cartões num fragmento: Previous/Next, ▶, This Is,
+    Radio e o painel de álbuns só re-executam esta lista (a pesquisa não)."""
     # Paginação
     per_page = 10
     total = len(results)
     total_pages = (total - 1) // per_page + 1
+    st.session_state["sp_total_pages"] = total_pages
     page = max(1, min(int(st.session_state.get("page", 1) or 1), total_pages))
-    st.session_state["page"] = page
+    st.session_state["page"] = st.session_state["page_input"] = page
+    render_pagination_controls()
     start, end = (page - 1) * per_page, (page - 1) * per_page + per_page
     items = results[start:end]
 
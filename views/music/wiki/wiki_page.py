@@ -7,6 +7,7 @@ import pandas as pd
 import streamlit as st
 from urllib.parse import quote
 from services.page_help import show_page_help
+from services.artist_similarity import similar_artists
 
 
     
@@ -168,14 +169,22 @@ def render_wikipedia_page(token: str):
 
     # ---- Paginação estilo Spotify (fixo: 10 por página)
     page_size = 10
-    total = len(sub)
-    total_pages = (total - 1) // page_size + 1 if total else 1
 
     # reset quando mudam os filtros (antes de instanciar botões)
     if st.session_state.get("_wiki_last_filter") != (filter_txt, sel_style):
         st.session_state["_wiki_last_filter"] = (filter_txt, sel_style)
         st.session_state["wiki_csv_page"] = 1
 
+    _wiki_list(sub, page_size)
+
+
+@st.fragment
+def _wiki_list(sub, page_size: int):
+    """Paginação + lista + detalhe: Previous/Next e Open/Close detail só
+    re-executam este fragmento (o CSV e os filtros não são recalculados)."""
+    total = len(sub)
+    total_pages = (total - 1) // page_size + 1 if total else 1
+
     # página atual (em state)
     page = int(st.session_state.get("wiki_csv_page", 1) or 1)
     page = max(1, min(page, total_pages))
@@ -221,7 +230,7 @@ def render_wikipedia_page(token: str):
             if st.button("Open detail", key=f"wiki_csv_open_{i}"):
                 st.session_state['wiki_open_name'] = name
                 st.session_state['wiki_open_url'] = wiki_url
-                st.rerun()
+                st.rerun(scope="fragment")
 
         # Detalhe on demand (thumb + resumo + links)
         if selected_name == name:
@@ -250,8 +259,15 @@ def render_wikipedia_page(token: str):
                 links.append(f"[Search in Spotify](https://open.spotify.com/search/{quote(f'artist:{name}').replace('%20','%20')})")
                 st.markdown(" • ".join(links))
 
+                # artistas parecidos (índice local, sem Spotify)
+                sims = similar_artists(name, k=8)
+                if sims:
+                    st.caption("Similar artists: " + " • ".join(
+                        f"[{s['name']}]({s['url']})" if s.get("url") else s["name"] for s in sims
+                    ))
+
             if st.button("Close detail", key=f"wiki_close_{i}"):
                 st.session_state.pop('wiki_open_name', None)
                 st.session_state.pop('wiki_open_url', None)
-                st.rerun()
+                st.rerun(scope="fragment")
 
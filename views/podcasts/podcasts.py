@@ -1,23 +1,14 @@
 ﻿# views/podcasts/podcasts.py
 from __future__ import annotations
 
-import json
 from typing import Dict, List, Optional
 
 import requests
 import streamlit as st
 from streamlit import components
 
-# LocalStorage (com fallback caso a lib não exista na cloud)
-try:
-    from streamlit_local_storage import LocalStorage  # type: ignore
-except Exception:
-    class LocalStorage:  # type: ignore
-        def getItem(self, k: str):
-            v = st.session_state.get(f"_ls:{k}")
-            return v if isinstance(v, str) else None
-        def setItem(self, k: str, v: str):
-            st.session_state[f"_ls:{k}"] = v
+# Preferências do dispositivo (blob único em localStorage)
+from services.common import device_prefs
 
 # Spotify helpers
 from services.music.spotify.lookup import get_spotify_token_cached, embed_spotify
@@ -38,7 +29,7 @@ except Exception:
         return s if (len(s) == 2 and s.isalpha()) else default
 
 # Serviço de episódios (usa o teu módulo)
-from services.music.spotify.episodes import list_episodes
+from services.music.spotify.episodes import list_episodes, shows_batch
 
 # ===================== Defaults & LocalStorage =====================
 
@@ -53,21 +44,6 @@ WKEY = {"term": "pod_term", "country": "pod_country", "limit": "pod_limit"}
 
 TOGGLE_KEY = "podcasts_show_favs_v2"
 
-_ls = LocalStorage()
-
-def _ls_set(key: str, value: str) -> None:
-    try:
-        _ls.setItem(key, value)
-    except Exception:
-        st.session_state[key] = value
-
-def _ls_get(key: str) -> Optional[str]:
-    try:
-        return _ls.getItem(key)
-    except Exception:
-        v = st.session_state.get(key)
-        return v if isinstance(v, str) else None
-
 def _merge_defaults(d: Dict | None) -> Dict:
     out = DEFAULTS.copy()
     if isinstance(d, dict):
@@ -78,25 +54,17 @@ def _merge_defaults(d: Dict | None) -> Dict:
     return out
 
 def load_device_defaults() -> Dict:
-    raw = _ls_get("podcasts.defaults")
-    try:
-        return _merge_defaults(json.loads(raw) if raw else {})
-    except Exception:
-        return DEFAULTS.copy()
+    return _merge_defaults(device_prefs.get("podcasts", "defaults", {}))
 
 def save_device_defaults(prefs: Dict) -> None:
-    _ls_set("podcasts.defaults", json.dumps(_merge_defaults(prefs), ensure_ascii=False))
+    device_prefs.set("podcasts", "defaults", _merge_defaults(prefs))
 
 def load_device_favorites() -> List[Dict]:
-    raw = _ls_get("podcasts.favorites")
-    try:
-        rows = json.loads(raw) if raw else []
-        return rows if isinstance(rows, list) else []
-    except Exception:
-        return []
+    rows = device_prefs.get("podcasts", "favorites", [])
+    return rows if isinstance(rows, list) else []
 
 def save_device_favorites(rows: List[Dict]) -> None:
-    _ls_set("podcasts.favorites", json.dumps(rows, ensure_ascii=False))
+    device_prefs.set("podcasts", "favorites", rows)
 
 def _fav_key(show: Dict) -> str:
     return str(show.get("id") or "").strip()
@@ -112,6 +80,8 @@ def _show_minimal(show: Dict) -> Dict:
         "languages": show.get("languages") or [],
         "image": img,
         "url": (show.get("external_urls") or {}).get("spotify", ""),
+        # nº de episódios visto na última visita (None = ainda não sabemos)
+        "seen_total": show.get("total_episodes"),
     }
 
 def add_favorite_local(show: Dict) -> None:
@@ -125,89 +95,118 @@ def remove_favorite_local(key: str) -> None:
     favs = [r for r in load_device_favorites() if r.get("key") != key]
     save_device_favorites(favs)
 
+def favorites_feed(favs: List[Dict], country: str) -> Dict[str, Dict]:
+    """
+    Estado atual de todos os favoritos num só pedido (/v1/shows?ids=, lotes de 50, cache 15 min).
+    Acrescenta "new" = episódios publicados desde a última visita (total − seen_total).
+    Favoritos antigos sem seen_total ficam com o total atual (sem falsos "novos") e são gravados.
+    """
+    ids = tuple(sorted({str(r.get("id") or "") for r in favs} - {""}))
+    feed = shows_batch(ids, norm_market(country, default="PT") or "PT") if ids else {}
+    changed = False
+    out: Dict[str, Dict] = {}
+    for r in favs:
+        sh = feed.get(r.get("id") or "")
+        if not sh:
+            continue
+        if r.get("seen_total") is None:
+            r["seen_total"] = sh["total_episodes"]
+            changed = True
+        out[sh["id"]] = {**sh, "new": max(0, sh["total_episodes"] - int(r.get("seen_total") or 0))}
+    if changed:
+        save_device_favorites(favs)
+    return out
+
+def mark_favorite_seen(key: str, total: int) -> None:
+    favs = load_device_favorites()
+    for r in favs:
+        if r.get("key") == key and r.get("seen_total") != total:
+            r["seen_total"] = total
+            save_device_favorites(favs)
+            return
+
 # ===================== Spotify API helpers =====================
 
 def _sp_headers() -> Dict:
     tok = get_spotify_token_cached()
     return {"Authorization": f"Bearer {tok}"} if tok else {}
 
-def _sp_get(path: str, params: Dict | None = None) -> Dict:
+def _sp_get(path: str, params: Dict | None = None, headers: Dict | None = None) -> Dict:
     r = requests.get(
         f"https://api.spotify.com/v1{path}",
-        headers=_sp_headers(),
+        headers=headers if headers is not None else _sp_headers(),
         params=params or {},
         timeout=15,
     )
     r.raise_for_status()
     return r.json()
 
-@st.cache_data(ttl=900, show_spinner=True)
+def _fold(s: str) -> str:
+    """minúsculas, sem acentos, espaços colapsados."""
+    import unicodedata, re
+    s = unicodedata.normalize("NFKD", s or "")
+    s = "".join(c for c in s if not unicodedata.combining(c))
+    return re.sub(r"\s+", " ", s).strip().lower()
+
+def _query_key(term: str) -> str:
+    """Termo normalizado para a cache (mantém acentos; Spotify já os ignora)."""
+    return " ".join((term or "").split()).casefold()
+
 def search_shows(term: str, country: str, limit: int) -> List[Dict]:
+    """Pesquisa robusta por shows (ver _search_shows); cache por (termo normalizado, market, limite)."""
+    q = _query_key(term)
+    if not q:
+        return []
+    return _search_shows(q, norm_market(country, default="PT"), max(1, min(int(limit or 30), 50)))
+
+@st.cache_data(ttl=900, show_spinner=True)
+def _search_shows(q_raw: str, mk: str, lim: int) -> List[Dict]:
     """
-    Pesquisa robusta por shows:
+    Estratégias (todas pedidas em paralelo, juntas por prioridade):
       P1) frase exata em shows
-      P2) todas as palavras em shows
-      P3) frase exata em episodes (promove show pai)
-      P4) fallback simples
+      P2) todas as palavras em shows            (usada se P1 < 5)
+      P3) frase exata em episodes (show pai)    (usada se P1+P2 < 5)
+      P4) fallback simples                      (usada se nada antes)
     Filtra resultados para garantir que todas as palavras surgem em name|publisher (sem acentos).
     """
-    import unicodedata, re
-
-    def _norm(s: str) -> str:
-        s = unicodedata.normalize("NFKD", s or "")
-        s = "".join(c for c in s if not unicodedata.combining(c))
-        s = re.sub(r"\s+", " ", s).strip().lower()
-        return s
+    from concurrent.futures import ThreadPoolExecutor
 
-    def _has_all_words(hay: str, words: list[str]) -> bool:
-        h = _norm(hay)
-        return all(w in h for w in words)
-
-    q_raw = (term or "").strip()
-    if not q_raw:
-        return []
-
-    mk  = norm_market(country, default="PT")
-    lim = max(1, min(int(limit or 30), 50))
-    words = [w for w in _norm(q_raw).split(" ") if w]
+    words = [w for w in _fold(q_raw).split(" ") if w]
+    headers = _sp_headers()  # token obtido uma vez, fora das threads
 
     def _fetch(q: str, type_: str):
         try:
-            return _sp_get(
-                "/search",
-                {"q": q, "type": type_, "market": mk, "limit": lim},
-            )
+            return _sp_get("/search", {"q": q, "type": type_, "market": mk, "limit": lim}, headers)
         except Exception:
             return {}
 
-    results: List[Dict] = []
+    plan = {"p1": (f'"{q_raw}"', "show"), "p3": (f'"{q_raw}"', "episode"), "p4": (q_raw, "show")}
+    if len(words) > 1:
+        plan["p2"] = (" ".join(words), "show")
+    with ThreadPoolExecutor(max_workers=len(plan)) as ex:
+        futs = {k: ex.submit(_fetch, *v) for k, v in plan.items()}
+        data = {k: f.result() for k, f in futs.items()}
+
+    folded: Dict[str, str] = {}  # id → "name publisher" sem acentos (1× por item)
 
-    # P1: frase exata em shows
-    data = _fetch(f'"{q_raw}"', "show")
-    items = ((data.get("shows") or {}).get("items")) or []
-    results += [it for it in items
-                if _has_all_words(f"{it.get('name','')} {it.get('publisher','')}", words)]
+    def _match(it: Dict) -> bool:
+        sid = it.get("id") or ""
+        hay = folded.get(sid)
+        if hay is None:
+            hay = folded[sid] = _fold(f"{it.get('name','')} {it.get('publisher','')}")
+        return all(w in hay for w in words)
 
-    # P2: todas as palavras em shows (broad)
-    if len(results) < 5 and len(words) > 1:
-        data = _fetch(" ".join(words), "show")
-        items = ((data.get("shows") or {}).get("items")) or []
-        results += [it for it in items
-                    if _has_all_words(f"{it.get('name','')} {it.get('publisher','')}", words)]
+    def _shows(k: str) -> List[Dict]:
+        return [it for it in ((((data.get(k) or {}).get("shows") or {}).get("items")) or []) if it]
 
-    # P3: frase exata em episodes → sobe show pai
+    results: List[Dict] = [it for it in _shows("p1") if _match(it)]
+    if len(results) < 5 and "p2" in data:
+        results += [it for it in _shows("p2") if _match(it)]
     if len(results) < 5:
-        data = _fetch(f'"{q_raw}"', "episode")
-        eps = ((data.get("episodes") or {}).get("items")) or []
-        for ep in eps:
-            sh = (ep.get("show") or {})
-            if sh and _has_all_words(f"{sh.get('name','')} {sh.get('publisher','')}", words):
-                results.append(sh)
-
-    # P4: fallback simples
+        eps = (((data.get("p3") or {}).get("episodes") or {}).get("items")) or []
+        results += [sh for sh in ((ep or {}).get("show") or {} for ep in eps) if sh and _match(sh)]
     if not results:
-        data = _fetch(q_raw, "show")
-        results += ((data.get("shows") or {}).get("items")) or []
+        results += _shows("p4")
 
     # dedupe preservando ordem
     seen: set[str] = set()
@@ -259,10 +258,15 @@ def _toggle_embed(kind: str, sid: str, idx, src: str):
         _set_embed(None, None, None, None)   # fechar se clicar de novo
     else:
         _set_embed(kind, sid, idx, src)
+        # o player aberto vivia no outro fragmento (resultados ↔ favoritos):
+        # só um rerun completo o fecha lá
+        if cur and cur[3] != src:
+            st.rerun()
 
 # ===================== Página =====================
 
 def render_podcasts_page():
+    device_prefs.load()  # 1 leitura do blob por sessão
     # === CSS compacto ===
     st.markdown("""
     <style>
@@ -361,6 +365,31 @@ def render_podcasts_page():
     st.write(f"Found **{len(results)}** podcast(s).")
     fav_ids = {r.get("id") for r in load_device_favorites()}
 
+    _results_list(results, fav_ids)
+
+    st.markdown("---")
+
+    # === Favoritos (toggle e lista) ===
+    st.markdown("### ⭐ My favorites (on this device)")
+
+    _show_default = device_prefs.get("podcasts", "showFavs", True) is not False
+    show_favs = st.toggle("Show favorites", value=_show_default, key=TOGGLE_KEY)
+    if show_favs != _show_default:
+        device_prefs.set("podcasts", "showFavs", bool(show_favs))
+
+    if show_favs:
+        _favorites_list()
+
+    st.markdown("---")
+
+    # um único setItem por run, só se algo mudou
+    device_prefs.flush()
+
+
+
+@st.fragment
+def _results_list(results: List[Dict], fav_ids: set):
+    """Cartões dos resultados: Play latest / Close player só re-executam este fragmento."""
     for i, show in enumerate(results, start=1):
         with st.container(border=True):
             c1, c2, c3 = st.columns([0.14, 0.56, 0.30])
@@ -390,7 +419,7 @@ def render_podcasts_page():
                             remove_favorite_local(sid)
                         else:
                             add_favorite_local(show)
-                        st.rerun()
+                        st.rerun()  # a lista de favoritos também muda
                 with a2:
                     if st.button("Play latest", key=f"pod_play_{i}", use_container_width=True):
                         ep = latest_episode_id(sid, st.session_state.get(WKEY["country"], DEFAULTS["country"]))
@@ -414,119 +443,126 @@ def render_podcasts_page():
             _embed(kind, sid)
             if st.button("✖ Close player", key=f"close_res_{i}", help="Hide player"):
                 _set_embed(None, None, None, None)
-                st.rerun()
+                st.rerun(scope="fragment")
 
-        # Episodes (expandable, com Refresh sem cache)
-        pass
 
-    st.markdown("---")
-
-    # === Favoritos (toggle e lista) ===
-    st.markdown("### ⭐ My favorites (on this device)")
-
-    _raw = (_ls_get("podcasts.showFavs") or "true").strip().lower()
-    _show_default = _raw in ("true", "1", "yes", "on")
-    show_favs = st.toggle("Show favorites", value=_show_default, key=TOGGLE_KEY)
-    if show_favs != _show_default:
-        _ls_set("podcasts.showFavs", "true" if show_favs else "false")
-
-    if show_favs:
-        favs = load_device_favorites()
-        if not favs:
-            st.info("No favorites yet.")
-        else:
-            st.caption(f"{len(favs)} favorite(s)")
-            for j, row in enumerate(favs, start=1):
-                row_key = (row.get("key") or row.get("id") or str(j)).replace(" ", "_")
+@st.fragment
+def _favorites_list():
+    """Favoritos + episódios: Play, Close, Episodes e Refresh só re-executam este
+    fragmento (remover um favorito refaz a página: os resultados mostram-no)."""
+    favs = load_device_favorites()
+    if not favs:
+        st.info("No favorites yet.")
+    else:
+        fav_country = st.session_state.get(WKEY["country"], str(DEFAULTS["country"]))
+        feed = favorites_feed(favs, fav_country)
+        n_new = sum(1 for f in feed.values() if f["new"])
+        fc1, fc2 = st.columns([0.74, 0.26])
+        with fc1:
+            st.caption(f"{len(favs)} favorite(s)" + (f" • 🆕 {n_new} with new episodes" if n_new else ""))
+        with fc2:
+            if st.button("⟳ Refresh all", key="fav_feed_refresh", use_container_width=True):
+                shows_batch.clear()
+                st.rerun(scope="fragment")
+        for j, row in enumerate(favs, start=1):
+            row_key = (row.get("key") or row.get("id") or str(j)).replace(" ", "_")
+            with st.container(border=True):
+                c1, c2, c3 = st.columns([0.14, 0.56, 0.30])
+
+                with c1:
+                    if row.get("image"):
+                        st.image(row["image"], width=56)
+                    else:
+                        st.write("—")
+
+                info = feed.get(row.get("id") or "") or {}
+                with c2:
+                    name = info.get("name") or row.get("name") or "—"
+                    pub  = info.get("publisher") or row.get("publisher") or "—"
+                    langs = ", ".join(info.get("languages") or row.get("languages") or [])
+                    meta = pub + (f" • {langs}" if langs else "")
+                    if info.get("new"):
+                        meta += f" • 🆕 **{info['new']} new**"
+                    st.markdown(f"**{name}**  \n{meta}")
+
+                with c3:
+                    a1, a2, a3 = st.columns([0.28, 0.44, 0.28])
+
+                    # 🗑 remover dos favoritos
+                    with a1:
+                        if st.button("🗑 Remove", key=f"fav_del_{row_key}",
+                                     help="Remove from favorites", use_container_width=True):
+                            remove_favorite_local(row_key)
+                            # fecha lista de episódios se estiver aberta
+                            st.session_state["pod_fav_eps_open"].pop(row_key, None)
+                            st.rerun()
+
+                    # 📻 abrir/fechar lista de episódios deste favorito
+                    with a2:
+                        opened = bool(st.session_state["pod_fav_eps_open"].get(row_key))
+                        label  = "📻 Episodes (hide)" if opened else "📻 Episodes"
+                        if st.button(label, key=f"fav_eps_btn_{row_key}", use_container_width=True):
+                            st.session_state["pod_fav_eps_open"][row_key] = not opened
+                            if not opened and info:
+                                # "novos" ficam visíveis nesta abertura; a próxima visita parte daqui
+                                st.session_state.setdefault("pod_fav_new", {})[row_key] = info.get("new", 0)
+                                mark_favorite_seen(row_key, int(info.get("total_episodes") or 0))
+                            st.rerun(scope="fragment")
+
+                    with a3:
+                        if row.get("url"):
+                            st.link_button("Open", row["url"], use_container_width=True)
+
+            # === lista de episódios do favorito (se aberta) ===
+            if st.session_state["pod_fav_eps_open"].get(row_key):
                 with st.container(border=True):
-                    c1, c2, c3 = st.columns([0.14, 0.56, 0.30])
-
-                    with c1:
-                        if row.get("image"):
-                            st.image(row["image"], width=56)
-                        else:
-                            st.write("—")
-
-                    with c2:
-                        name = row.get("name") or "—"
-                        pub  = row.get("publisher") or "—"
-                        langs = ", ".join(row.get("languages") or [])
-                        meta = pub + (f" • {langs}" if langs else "")
-                        st.markdown(f"**{name}**  \n{meta}")
-
-                    with c3:
-                        a1, a2, a3 = st.columns([0.28, 0.44, 0.28])
-
-                        # 🗑 remover dos favoritos
-                        with a1:
-                            if st.button("🗑 Remove", key=f"fav_del_{row_key}",
-                                         help="Remove from favorites", use_container_width=True):
-                                remove_favorite_local(row_key)
-                                # fecha lista de episódios se estiver aberta
-                                st.session_state["pod_fav_eps_open"].pop(row_key, None)
-                                st.rerun()
-
-                        # 📻 abrir/fechar lista de episódios deste favorito
-                        with a2:
-                            opened = bool(st.session_state["pod_fav_eps_open"].get(row_key))
-                            label  = "📻 Episodes (hide)" if opened else "📻 Episodes"
-                            if st.button(label, key=f"fav_eps_btn_{row_key}", use_container_width=True):
-                                st.session_state["pod_fav_eps_open"][row_key] = not opened
-                                st.rerun()
-
-                        with a3:
-                            if row.get("url"):
-                                st.link_button("Open", row["url"], use_container_width=True)
-
-                # === lista de episódios do favorito (se aberta) ===
-                if st.session_state["pod_fav_eps_open"].get(row_key):
-                    with st.container(border=True):
-                        sid = row.get("id") or ""
-                        mk  = norm_market(st.session_state.get(WKEY["country"], str(DEFAULTS["country"])), default="PT") or "PT"
-
-                        b1, b2 = st.columns([0.22, 0.78])
-                        with b1:
-                            refresh = st.button("⟳ Refresh", key=f"fav_eps_refresh_{row_key}", use_container_width=True)
-                        with b2:
-                            if not get_spotify_token_cached():
-                                st.warning("Spotify token missing — episodes may be empty.")
-
-                        eps_pack = (list_episodes.__wrapped__(sid, mk, limit=50, offset=0) if refresh
-                                    else list_episodes(sid, mk, limit=50, offset=0))
-                        eps = (eps_pack or {}).get("items") or []
-
-                        if not eps:
-                            st.caption("No episodes found.")
-                        else:
-                            for k, ep in enumerate(eps, start=1):
-                                ec1, ec2, ec3 = st.columns([0.68, 0.18, 0.14])
-                                with ec1:
-                                    line = f"**{ep['name']}**  \n{ep['release_date']} • {ep['duration']}"
-                                    if ep.get("explicit"):
-                                        line += " • 🔞 explicit"
-                                    st.markdown(line)
-                                with ec2:
-                                    if st.button("▶ Play", key=f"fav_ep_play_{row_key}_{k}", use_container_width=True):
-                                        _toggle_embed("episode", ep["id"], f"fav_ep_{row_key}_{k}", "fav_eps")
-                                    emb = st.session_state.get("pod_embed")
-                                    if emb and emb[2] == f"fav_ep_{row_key}_{k}" and emb[3] == "fav_eps":
-                                        st.markdown('<span class="pod-badge">Playing</span>', unsafe_allow_html=True)
-                                with ec3:
-                                    if ep.get("url"):
-                                        st.link_button("Open", ep["url"], use_container_width=True)
-
-                                # player inline por episódio (favoritos)
+                    sid = row.get("id") or ""
+                    mk  = norm_market(st.session_state.get(WKEY["country"], str(DEFAULTS["country"])), default="PT") or "PT"
+
+                    b1, b2 = st.columns([0.22, 0.78])
+                    with b1:
+                        refresh = st.button("⟳ Refresh", key=f"fav_eps_refresh_{row_key}", use_container_width=True)
+                    with b2:
+                        if not get_spotify_token_cached():
+                            st.warning("Spotify token missing — episodes may be empty.")
+
+                    eps_pack = (list_episodes.__wrapped__(sid, mk, limit=50, offset=0) if refresh
+                                else list_episodes(sid, mk, limit=50, offset=0))
+                    eps = (eps_pack or {}).get("items") or []
+
+                    if not eps:
+                        st.caption("No episodes found.")
+                    else:
+                        n_fresh = int(st.session_state.get("pod_fav_new", {}).get(row_key, 0))
+                        for k, ep in enumerate(eps, start=1):
+                            ec1, ec2, ec3 = st.columns([0.68, 0.18, 0.14])
+                            with ec1:
+                                badge = "🆕 " if k <= n_fresh else ""
+                                line = f"{badge}**{ep['name']}**  \n{ep['release_date']} • {ep['duration']}"
+                                if ep.get("explicit"):
+                                    line += " • 🔞 explicit"
+                                st.markdown(line)
+                            with ec2:
+                                if st.button("▶ Play", key=f"fav_ep_play_{row_key}_{k}", use_container_width=True):
+                                    _toggle_embed("episode", ep["id"], f"fav_ep_{row_key}_{k}", "fav_eps")
                                 emb = st.session_state.get("pod_embed")
                                 if emb and emb[2] == f"fav_ep_{row_key}_{k}" and emb[3] == "fav_eps":
-                                    _embed("episode", ep["id"])
-                                    if st.button("✖ Close player", key=f"close_fav_ep_{row_key}_{k}", help="Hide player"):
-                                        _set_embed(None, None, None, None)
-                                        st.rerun()
-
-
-    st.markdown("---")
+                                    st.markdown('<span class="pod-badge">Playing</span>', unsafe_allow_html=True)
+                            with ec3:
+                                if ep.get("url"):
+                                    st.link_button("Open", ep["url"], use_container_width=True)
+
+                            # player inline por episódio (favoritos)
+                            emb = st.session_state.get("pod_embed")
+                            if emb and emb[2] == f"fav_ep_{row_key}_{k}" and emb[3] == "fav_eps":
+                                _embed("episode", ep["id"])
+                                if st.button("✖ Close player", key=f"close_fav_ep_{row_key}_{k}", help="Hide player"):
+                                    _set_embed(None, None, None, None)
+                                    st.rerun(scope="fragment")
+
+    # "visto" dos episódios abertos num rerun só deste fragmento
+    device_prefs.flush()
 
-  
 
 if __name__ == "__main__":
     st.set_page_config(page_title="Podcasts", page_icon="🎙️", layout="centered")
@@ -4,21 +4,21 @@
 
 from __future__ import annotations
 
-import json
 import re
 from typing import Dict, List, Optional
 
-import requests
 import streamlit as st
-from streamlit_local_storage import LocalStorage
+
+from services.common import device_prefs
+from services.radio import catalog as radio_catalog
+from services.radio import probe as radio_probe
+from services.radio.browser import search_online
 
 
 # =========================
 #   Config / Constantes
 # =========================
 
-RADIO_BROWSER_ENDPOINT = "https://de1.api.radio-browser.info/json/stations/search"
-REQ_TIMEOUT = 12  # seg
 
 DEFAULTS: Dict[str, object] = {
     "name": "",
@@ -30,37 +30,16 @@ DEFAULTS: Dict[str, object] = {
     "show_favs": True,
 }
 
-# instancia localStorage (browser) — segura para usar em callbacks
-ls = LocalStorage()
-
-
 # =========================
-#   Helpers de LocalStorage
+#   Preferências do dispositivo (blob único em localStorage, ver device_prefs)
 # =========================
 
-def _ls_set(key: str, value: str) -> None:
-    try:
-        ls.setItem(key, value)
-    except Exception:
-        # ambiente sem localStorage (ex.: teste headless)
-        st.session_state[key] = value
-
-def _ls_get(key: str) -> Optional[str]:
-    try:
-        return ls.getItem(key)
-    except Exception:
-        return st.session_state.get(key)
-
 def _ls_save_bool(key: str, val: bool) -> None:
-    _ls_set(key, "true" if val else "false")
+    device_prefs.set("radio", key, bool(val))
 
 def _ls_load_bool(key: str, default: bool = False) -> bool:
-    raw = _ls_get(key)
-    if isinstance(raw, str):
-        s = raw.strip().lower()
-        if s in ("true", "1", "yes", "on"):  return True
-        if s in ("false", "0", "no", "off"): return False
-    return bool(default)
+    val = device_prefs.get("radio", key)
+    return val if isinstance(val, bool) else bool(default)
 
 
 # =========================
@@ -76,15 +55,10 @@ def _merge_defaults(data: Dict | None) -> Dict:
     return base
 
 def load_device_defaults() -> Dict:
-    raw = _ls_get("radio.defaults")
-    try:
-        return _merge_defaults(json.loads(raw) if raw else {})
-    except Exception:
-        return DEFAULTS.copy()
+    return _merge_defaults(device_prefs.get("radio", "defaults", {}))
 
 def save_device_defaults(d: Dict) -> None:
-    payload = {k: d.get(k, DEFAULTS[k]) for k in DEFAULTS}
-    _ls_set("radio.defaults", json.dumps(payload, ensure_ascii=False))
+    device_prefs.set("radio", "defaults", {k: d.get(k, DEFAULTS[k]) for k in DEFAULTS})
 
 
 # =========================
@@ -99,16 +73,19 @@ def _fav_key(s: Dict) -> str:
     home = (s.get("homepage") or "").strip().lower()
     return uuid or url or (name + "|" + home)
 
+def _widget_key(prefix: str, key: str, seen: Dict[str, int]) -> str:
+    """Chave de widget pela estação (não pela posição: a lista é reordenada);
+    duplicados na mesma lista ganham sufixo."""
+    n = seen.get(key, 0)
+    seen[key] = n + 1
+    return f"{prefix}_{key}" + (f"_{n}" if n else "")
+
 def load_device_favorites() -> List[Dict]:
-    raw = _ls_get("radio.favorites")
-    try:
-        rows = json.loads(raw) if raw else []
-        return rows if isinstance(rows, list) else []
-    except Exception:
-        return []
+    rows = device_prefs.get("radio", "favorites", [])
+    return rows if isinstance(rows, list) else []
 
 def save_device_favorites(rows: List[Dict]) -> None:
-    _ls_set("radio.favorites", json.dumps(rows, ensure_ascii=False))
+    device_prefs.set("radio", "favorites", rows)
 
 def add_favorite_local(station: Dict) -> None:
     favs = load_device_favorites()
@@ -150,29 +127,37 @@ def _parse_tags(s: str) -> str:
 
 def search_stations(name: str = "", country: str = "", tag: str = "",
                     codec: str = "", bitrate_min: int = 0, limit: int = 20) -> List[Dict]:
+    limit = max(1, min(int(limit or 20), 50))
+    # catálogo local (se sincronizado): resposta em ms, sem rede
+    if radio_catalog.ready():
+        radio_catalog.maybe_sync_async()
+        try:
+            return radio_catalog.search(
+                name=_clean_query_text(name), country=_clean_query_text(country),
+                tags=[t for t in _parse_tags(tag).split(",") if t],
+                codec=_clean_query_text(codec), bitrate_min=int(bitrate_min or 0), limit=limit,
+            )
+        except Exception:
+            pass  # BD indisponível → online
+
     params = {
         "name": _clean_query_text(name),
         "countrycode": _clean_query_text(country),
         "tagList": _parse_tags(tag),
         "codec": _clean_query_text(codec).lower(),
         "bitrate_min": max(0, int(bitrate_min or 0)),
-        "is_https": True,
+        "is_https": "true",
         "order": "clickcount",   # popularidade
-        "reverse": False,
-        "hidebroken": True,
-        "limit": max(1, min(int(limit or 20), 50)),
+        "reverse": "true",
+        "hidebroken": "true",
+        "limit": limit,
         "offset": 0,
     }
     # remove vazios
     params = {k: v for k, v in params.items() if v not in ("", None)}
 
     try:
-        r = requests.get(RADIO_BROWSER_ENDPOINT, params=params, timeout=REQ_TIMEOUT)
-        if r.status_code != 200:
-            return []
-        data = r.json() or []
-        # protege contra itens None
-        return [x for x in data if isinstance(x, dict)]
+        return search_online(params)  # failover entre mirrors
     except Exception:
         return []
 
@@ -182,8 +167,11 @@ def search_stations(name: str = "", country: str = "", tag: str = "",
 # =========================
 
 def _ensure_ss_defaults() -> None:
-    if "radio_defaults" not in st.session_state:
+    # relê quando as preferências acabam de chegar do browser (1º/2º run da sessão)
+    loaded = device_prefs.load()
+    if "radio_defaults" not in st.session_state or not st.session_state.get("_radio_defaults_ok"):
         st.session_state["radio_defaults"] = load_device_defaults()
+        st.session_state["_radio_defaults_ok"] = loaded
     st.session_state.setdefault("radio_results", [])
     st.session_state.setdefault("radio_play_url", "")
     st.session_state.setdefault("radio_play_idx", None)
@@ -257,149 +245,197 @@ def render_radio_page() -> None:
     if not results:
         st.info("Use os filtros acima e carregue em **Pesquisar** para encontrar estações.")
     else:
-        # favoritos atuais (para pintar 🤔/🙂 nos resultados)
-        fav_keys = {_fav_key(r) for r in load_device_favorites()}
-        st.caption(f"{len(results)} estação(ões) encontradas.")
+        _results_list(results)
+
+    st.markdown("---")
+
+    # =========================
+    #   Favoritos (DEPOIS)
+    # =========================
+    st.markdown("### ⭐ Favoritos (neste dispositivo)")
+
+    show_default = _ls_load_bool("showFavs", bool(DEFAULTS["show_favs"]))
+    show_favs = st.toggle(
+        "Mostrar lista de favoritos",
+        value=show_default,
+        key="radio_show_favs",
+    )
+    # persistência da preferência (gravada no flush do fim da página, sem rerun),
+    # só quando o utilizador a muda
+    if bool(show_favs) != show_default:
+        _ls_save_bool("showFavs", bool(show_favs))
 
-        for i, s in enumerate(results, start=1):
+    if show_favs:
+        _favorites_list()
+
+    # um único setItem por run, só se algo mudou
+    device_prefs.flush()
+
+
+
+def _play(url: str, idx: str, source: str) -> None:
+    """Um só player ativo; se estava no outro fragmento (resultados ↔ favoritos)
+    é preciso um rerun completo para o fechar lá."""
+    prev = st.session_state.get("radio_play_source")
+    st.session_state["radio_play_url"] = url
+    st.session_state["radio_play_idx"] = idx
+    st.session_state["radio_play_source"] = source
+    st.session_state["radio_audio_rev"] += 1
+    if prev and prev != source:
+        st.rerun()
+
+
+@st.fragment
+def _results_list(results: List[Dict]) -> None:
+    """Cartões dos resultados: Play, ordenar por saúde e ↻ Atualizar só
+    re-executam este fragmento."""
+    # favoritos atuais (para pintar 🤔/🙂 nos resultados)
+    fav_keys = {_fav_key(r) for r in load_device_favorites()}
+
+    # verificação dos streams em background (não bloqueia); usa o que já houver
+    radio_probe.request_probes(results)
+    health = radio_probe.cached(results)
+    pending = radio_probe.pending_count(results)
+    hc1, hc2, hc3 = st.columns([0.5, 0.3, 0.2])
+    with hc1:
+        st.caption(f"{len(results)} estação(ões) encontradas."
+                   + (f" ⏳ a verificar {pending} stream(s)…" if pending else ""))
+    with hc2:
+        rank_health = st.toggle("Ordenar por saúde", value=True, key="radio_rank_health",
+                                help="Streams offline/lentos passam para o fim")
+    with hc3:
+        if pending and st.button("↻ Atualizar", key="radio_probe_refresh", use_container_width=True):
+            st.rerun(scope="fragment")
+    if rank_health:
+        results = radio_probe.rank_stations(results, health)
+
+    seen: Dict[str, int] = {}
+    for s in results:
+        with st.container(border=True):
+            cols = st.columns([0.12, 0.63, 0.25])
+
+            # Logo — 40px
+            with cols[0]:
+                logo = _result_logo_url(s)
+                if logo:
+                    st.image(logo, width=40)
+                else:
+                    st.write("—")
+
+            # Info
+            with cols[1]:
+                name = s.get("name") or "—"
+                country = s.get("countrycode") or s.get("country") or "—"
+                codec = (s.get("codec") or "—").upper()
+                br = int(s.get("bitrate") or 0)
+                tags = s.get("tags") or s.get("tag") or ""
+                st.markdown(f"**{name}**  \n{country} • {codec} • {br} kbps")
+                if tags:
+                    st.caption(_format_tags(tags))
+                st.caption(radio_probe.health_badge(health.get(radio_probe.station_url(s))))
+
+            # Actions
+            with cols[2]:
+                url = s.get("url_resolved") or s.get("url") or ""
+                key = _fav_key(s)
+                is_fav = key in fav_keys
+                wkey = _widget_key("radio_res", key, seen)
+
+                a1, a2, a3 = st.columns([0.25, 0.4, 0.35])
+
+                with a1:
+                    face = "🙂" if is_fav else "🤔"
+                    tip  = "Remover dos favoritos" if is_fav else "Adicionar aos favoritos"
+                    if st.button(face, key=f"{wkey}_face", help=tip, use_container_width=True):
+                        if is_fav:
+                            remove_favorite_local(key)
+                        else:
+                            add_favorite_local(s)
+                        st.rerun()  # a lista de favoritos também muda
+
+                with a2:
+                    if st.button("Play", key=f"{wkey}_play", use_container_width=True):
+                        _play(url, key, "results")  # key: estável se a ordem mudar
+
+                with a3:
+                    home = (s.get("homepage") or "").strip()
+                    if home:
+                        st.link_button("Homepage", home, use_container_width=True)
+
+            # Inline player (apenas um ativo)
+            if (
+                st.session_state.get("radio_play_source") == "results" and
+                st.session_state.get("radio_play_idx") == _fav_key(s) and
+                st.session_state.get("radio_play_url")
+            ):
+                st.audio(st.session_state["radio_play_url"])
+                st.caption(st.session_state["radio_play_url"])
+
+
+@st.fragment
+def _favorites_list() -> None:
+    """Favoritos com player inline: Play só re-executa este fragmento."""
+    favs = load_device_favorites()
+    radio_probe.request_probes(favs)
+    fav_health = radio_probe.cached(favs)
+    if not favs:
+        st.info("Ainda não tem favoritos. Use **🤔** para adicionar a partir dos resultados.")
+    else:
+        st.caption(f"{len(favs)} favorito(s). Toque em **Play** para ouvir.")
+        seen: Dict[str, int] = {}
+        for row in favs:
+            wkey = _widget_key("radio_fav", _fav_key(row), seen)
             with st.container(border=True):
                 cols = st.columns([0.12, 0.63, 0.25])
 
-                # Logo — 40px
+                # logo
                 with cols[0]:
-                    logo = _result_logo_url(s)
-                    if logo:
-                        st.image(logo, width=40)
+                    favico = (row.get("favicon") or "").strip()
+                    if favico:
+                        st.image(favico, width=40)
                     else:
                         st.write("—")
 
-                # Info
+                # info
                 with cols[1]:
-                    name = s.get("name") or "—"
-                    country = s.get("countrycode") or s.get("country") or "—"
-                    codec = (s.get("codec") or "—").upper()
-                    br = int(s.get("bitrate") or 0)
-                    tags = s.get("tags") or s.get("tag") or ""
+                    name = row.get("name") or "—"
+                    country = row.get("countrycode") or "—"
+                    codec = (row.get("codec") or "—").upper()
+                    br = int(row.get("bitrate") or 0)
+                    tags = row.get("tags") or ""
                     st.markdown(f"**{name}**  \n{country} • {codec} • {br} kbps")
                     if tags:
                         st.caption(_format_tags(tags))
+                    st.caption(radio_probe.health_badge(fav_health.get(radio_probe.station_url(row))))
 
-                # Actions
+                # actions
                 with cols[2]:
-                    url = s.get("url_resolved") or s.get("url") or ""
-                    key = _fav_key(s)
-                    is_fav = key in fav_keys
-
                     a1, a2, a3 = st.columns([0.25, 0.4, 0.35])
 
                     with a1:
-                        face = "🙂" if is_fav else "🤔"
-                        tip  = "Remover dos favoritos" if is_fav else "Adicionar aos favoritos"
-                        if st.button(face, key=f"radio_res_face_{i}", help=tip, use_container_width=True):
-                            if is_fav:
-                                remove_favorite_local(key)
-                            else:
-                                add_favorite_local(s)
-                            st.rerun()
+                        # sempre “🙂” porque já é favorito; botão para remover
+                        if st.button("🙂", key=f"{wkey}_icon", help="Remover dos favoritos", use_container_width=True):
+                            remove_favorite_local(_fav_key(row))
+                            st.rerun()  # os resultados também mostram o 🙂
 
                     with a2:
-                        if st.button("Play", key=f"radio_res_play_{i}", use_container_width=True):
-                            st.session_state["radio_play_url"] = url
-                            st.session_state["radio_play_idx"] = i
-                            st.session_state["radio_play_source"] = "results"
-                            st.session_state["radio_audio_rev"] += 1
+                        if st.button("Play", key=f"{wkey}_play", use_container_width=True):
+                            _play(row.get("url",""), wkey, "favorites")
 
                     with a3:
-                        home = (s.get("homepage") or "").strip()
+                        home = (row.get("homepage") or "").strip()
                         if home:
                             st.link_button("Homepage", home, use_container_width=True)
 
-                # Inline player (apenas um ativo)
+                # inline player
                 if (
-                    st.session_state.get("radio_play_source") == "results" and
-                    st.session_state.get("radio_play_idx") == i and
+                    st.session_state.get("radio_play_source") == "favorites" and
+                    st.session_state.get("radio_play_idx") == wkey and
                     st.session_state.get("radio_play_url")
                 ):
                     st.audio(st.session_state["radio_play_url"])
                     st.caption(st.session_state["radio_play_url"])
 
-    st.markdown("---")
-
-    # =========================
-    #   Favoritos (DEPOIS)
-    # =========================
-    st.markdown("### ⭐ Favoritos (neste dispositivo)")
-
-    show_favs = st.toggle(
-        "Mostrar lista de favoritos",
-        value=_ls_load_bool("radio.showFavs", bool(DEFAULTS["show_favs"])),
-        key="radio_show_favs",
-    )
-    # persistência da preferência (e rerender suave)
-    if show_favs != _ls_load_bool("radio.showFavs", bool(DEFAULTS["show_favs"])):
-        _ls_save_bool("radio.showFavs", bool(show_favs))
-        st.rerun()
-
-    if show_favs:
-        favs = load_device_favorites()
-        if not favs:
-            st.info("Ainda não tem favoritos. Use **🤔** para adicionar a partir dos resultados.")
-        else:
-            st.caption(f"{len(favs)} favorito(s). Toque em **Play** para ouvir.")
-            for j, row in enumerate(favs, start=1):
-                with st.container(border=True):
-                    cols = st.columns([0.12, 0.63, 0.25])
-
-                    # logo
-                    with cols[0]:
-                        favico = (row.get("favicon") or "").strip()
-                        if favico:
-                            st.image(favico, width=40)
-                        else:
-                            st.write("—")
-
-                    # info
-                    with cols[1]:
-                        name = row.get("name") or "—"
-                        country = row.get("countrycode") or "—"
-                        codec = (row.get("codec") or "—").upper()
-                        br = int(row.get("bitrate") or 0)
-                        tags = row.get("tags") or ""
-                        st.markdown(f"**{name}**  \n{country} • {codec} • {br} kbps")
-                        if tags:
-                            st.caption(_format_tags(tags))
-
-                    # actions
-                    with cols[2]:
-                        a1, a2, a3 = st.columns([0.25, 0.4, 0.35])
-
-                        with a1:
-                            # sempre “🙂” porque já é favorito; botão para remover
-                            if st.button("🙂", key=f"radio_fav_icon_{j}", help="Remover dos favoritos", use_container_width=True):
-                                remove_favorite_local(_fav_key(row))
-                                st.rerun()
-
-                        with a2:
-                            if st.button("Play", key=f"radio_fav_play_{j}", use_container_width=True):
-                                st.session_state["radio_play_url"] = row.get("url","")
-                                st.session_state["radio_play_idx"] = f"fav_{j}"
-                                st.session_state["radio_play_source"] = "favorites"
-                                st.session_state["radio_audio_rev"] += 1
-
-                        with a3:
-                            home = (row.get("homepage") or "").strip()
-                            if home:
-                                st.link_button("Homepage", home, use_container_width=True)
-
-                    # inline player
-                    if (
-                        st.session_state.get("radio_play_source") == "favorites" and
-                        st.session_state.get("radio_play_idx") == f"fav_{j}" and
-                        st.session_state.get("radio_play_url")
-                    ):
-                        st.audio(st.session_state["radio_play_url"])
-                        st.caption(st.session_state["radio_play_url"])
-
 
 # Permite correr isolado para teste rápido
 if __name__ == "__main__":